@@ -1,6 +1,6 @@
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime
 import json
 import uuid
@@ -11,11 +11,13 @@ from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain.memory import ConversationBufferWindowMemory
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain.callbacks.base import BaseCallbackHandler, AsyncCallbackHandler
 
 from config.settings import settings, AgentType, get_agent_config
 from memory.chroma_manager import chroma_manager
 from utils.logger import get_agent_logger, log_agent_activity, log_task_execution, log_error, log_performance
+from utils.rate_limiter import llm_rate_limiter, set_llm_priority, reset_llm_priority, request_rank, estimate_tokens
+from utils.payloads import dumps
 
 @dataclass
 class AgentTask:
@@ -56,6 +58,9 @@ class AgentResponse:
         if self.metadata is None:
             self.metadata = {}
 
+class AgentBusyError(Exception):
+    """Raised when a task reaches an agent that is still running another one"""
+
 class AgentCallbackHandler(BaseCallbackHandler):
     """Custom callback handler for agent monitoring."""
     
@@ -87,6 +92,58 @@ class AgentCallbackHandler(BaseCallbackHandler):
             self.tokens_used += token_usage.get('total_tokens', 0)
             self.logger.debug(f"LLM call completed. Tokens used: {token_usage}")
 
+class RateLimitCallbackHandler(AsyncCallbackHandler):
+    """Holds each LLM call until the shared rate limiter admits it."""
+    
+    # Surface limiter timeouts to the caller instead of only logging them
+    raise_error = True
+    
+    def __init__(self, model: str, api_key: Optional[str], max_tokens: int):
+        self.model = model
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self.reserved: Dict[uuid.UUID, Tuple[int, int]] = {}  # run -> (tokens reserved, estimated prompt tokens)
+    
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: uuid.UUID, **kwargs):
+        prompt_length = sum(len(str(message.content)) for batch in messages for message in batch)
+        await self._acquire(run_id, prompt_length)
+        
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: uuid.UUID, **kwargs):
+        await self._acquire(run_id, sum(len(prompt) for prompt in prompts))
+        
+    async def _acquire(self, run_id: uuid.UUID, prompt_length: int):
+        # Reserve for the longest possible completion; on_llm_end settles the difference
+        prompt_tokens = estimate_tokens(prompt_length)
+        reserved = await llm_rate_limiter.acquire(self.model, self.api_key, prompt_tokens + self.max_tokens)
+        self.reserved[run_id] = (reserved, prompt_tokens)
+        
+    async def on_llm_end(self, response, *, run_id: uuid.UUID, **kwargs):
+        if run_id not in self.reserved:
+            return
+        reserved, prompt_tokens = self.reserved.pop(run_id)
+        token_usage = (getattr(response, 'llm_output', None) or {}).get('token_usage') or {}
+        used = token_usage.get('total_tokens')
+        if not used:
+            # No usage reported (e.g. streaming): charge the prompt and completion estimates
+            completion_length = sum(len(getattr(generation, 'text', '') or '')
+                                    for batch in getattr(response, 'generations', None) or []
+                                    for generation in batch)
+            used = prompt_tokens + estimate_tokens(completion_length)
+        llm_rate_limiter.settle(self.model, self.api_key, reserved, used)
+            
+    async def on_llm_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs):
+        if run_id in self.reserved:
+            # The call did not go through: give the whole reservation back
+            reserved, _ = self.reserved.pop(run_id)
+            llm_rate_limiter.settle(self.model, self.api_key, reserved, 0)
+        if getattr(error, 'status_code', None) == 429:
+            headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+            try:
+                retry_after = float(headers.get('retry-after'))
+            except (TypeError, ValueError):
+                retry_after = None
+            llm_rate_limiter.throttled(self.model, self.api_key, retry_after)
+
 class BaseAgent(ABC):
     """Base class for all AI agents."""
     
@@ -122,12 +179,15 @@ class BaseAgent(ABC):
             self.logger.info(f"Initializing {self.config['name']}...")
             
             # Initialize LLM
+            model = self.config.get('model', settings.default_model.value)
+            max_tokens = self.config.get('max_tokens', settings.max_tokens)
             self.llm = ChatOpenAI(
-                model=self.config.get('model', settings.default_model.value),
+                model=model,
                 temperature=self.config.get('temperature', settings.temperature),
-                max_tokens=self.config.get('max_tokens', settings.max_tokens),
+                max_tokens=max_tokens,
                 openai_api_key=settings.openai_api_key,
-                openai_api_base=settings.openai_api_base
+                openai_api_base=settings.openai_api_base,
+                callbacks=[RateLimitCallbackHandler(getattr(model, 'value', model), settings.openai_api_key, max_tokens)]
             )
             
             # Initialize memory
@@ -205,17 +265,24 @@ class BaseAgent(ABC):
             await self.initialize()
             
         if self.is_busy:
-            raise Exception(f"Agent {self.agent_type.value} is currently busy")
+            raise AgentBusyError(f"Agent {self.agent_type.value} is currently busy")
             
         self.is_busy = True
         self.current_task = task
         start_time = datetime.utcnow()
         
+        # Automated work queues behind interactive requests for LLM capacity
+        automated = bool((task.input_data.get("metadata") or {}).get("automated"))
+        
+        priority_token = set_llm_priority(request_rank(task.priority, background=automated))
+        
         try:
             log_task_execution(task.id, self.agent_type.value, "started", self.organization_id)
             
             # Load relevant memories
+            memory_started = datetime.utcnow()
             await self._load_relevant_memories(task)
+            memory_io_time = (datetime.utcnow() - memory_started).total_seconds()
             
             # Process the task
             result = await self._process_task(task)
@@ -238,10 +305,13 @@ class BaseAgent(ABC):
             )
             
             # Update performance metrics
+            memory_started = datetime.utcnow()
             await self._update_performance_metrics(response)
             
             # Store task result in memory
             await self._store_task_result(task, response)
+            memory_io_time += (datetime.utcnow() - memory_started).total_seconds()
+            response.metadata["timings"] = {"memory_io": memory_io_time}
             
             log_task_execution(task.id, self.agent_type.value, "completed", self.organization_id, {
                 "execution_time": execution_time,
@@ -251,6 +321,14 @@ class BaseAgent(ABC):
             
             return response
             
+        except asyncio.CancelledError:
+            # The caller gave up (workflow cancelled or timed out); the pending LLM call is
+            # cancelled with us and the finally block frees the agent for the next task
+            log_task_execution(task.id, self.agent_type.value, "cancelled", self.organization_id, {
+                "execution_time": (datetime.utcnow() - start_time).total_seconds()
+            })
+            raise
+            
         except Exception as e:
             execution_time = (datetime.utcnow() - start_time).total_seconds()
             
@@ -276,6 +354,7 @@ class BaseAgent(ABC):
             return response
             
         finally:
+            reset_llm_priority(priority_token)
             self.is_busy = False
             self.current_task = None
     
@@ -332,7 +411,7 @@ class BaseAgent(ABC):
     async def _store_task_result(self, task: AgentTask, response: AgentResponse):
         """Store task result in memory for future reference."""
         try:
-            memory_content = f"Task: {task.type}\nInput: {json.dumps(task.input_data)}\nResult: {json.dumps(response.result) if response.success else 'Failed'}\nConfidence: {response.confidence}"
+            memory_content = f"Task: {task.type}\nInput: {dumps(task.input_data)}\nResult: {json.dumps(response.result) if response.success else 'Failed'}\nConfidence: {response.confidence}"
             
             await self._store_agent_memory(
                 memory_content,
@@ -443,6 +522,16 @@ class BaseAgent(ABC):
         self.is_initialized = False
         self.logger.info(f"{self.config['name']} stopped")
     
+    def get_load_metrics(self) -> Dict[str, Any]:
+        """Get load figures reported to the coordinator with each heartbeat."""
+        total_tasks = self.performance_metrics["tasks_completed"] + self.performance_metrics["tasks_failed"]
+        return {
+            "in_flight": 1 if self.is_busy else 0,
+            "queue_depth": 0,
+            "ewma_latency": self.performance_metrics["average_execution_time"] if total_tasks else None,
+            "error_rate": 1.0 - self.performance_metrics["success_rate"] if total_tasks else 0.0
+        }
+    
     def get_capabilities(self):
         """Get agent capabilities."""
         return {
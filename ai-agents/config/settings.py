@@ -4,6 +4,9 @@ from pydantic_settings import BaseSettings
 from pydantic import Field
 from enum import Enum
 
+# The ai-agents directory; default data files live under it whatever the working directory
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Environment(str, Enum):
     DEVELOPMENT = "development"
     STAGING = "staging"
@@ -47,10 +50,22 @@ class Settings(BaseSettings):
     fallback_model: AIModel = Field(default=AIModel.GPT_3_5_TURBO)
     max_tokens: int = Field(default=4000)
     temperature: float = Field(default=0.7)
+    llm_requests_per_minute: int = Field(default=500)  # per API key and model, per process
+    llm_tokens_per_minute: int = Field(default=150000)
+    llm_model_rate_limits: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # model -> {"requests_per_minute", "tokens_per_minute"}
+    llm_rate_limit_max_wait: Optional[float] = Field(default=120.0)  # seconds a call may queue for capacity
     
     # Agent Configuration
     max_concurrent_agents: int = Field(default=5)
+    agent_worker_processes: int = Field(default=0)  # worker processes per agent; 0 = agents run in-process only
+    max_concurrent_workflows: int = Field(default=10)
+    max_concurrent_workflows_per_org: int = Field(default=3)
+    workflow_queue_max_depth: Optional[int] = Field(default=None)  # None = unbounded
     agent_timeout: int = Field(default=300)  # 5 minutes
+    agent_heartbeat_interval: float = Field(default=5.0)  # seconds between agent load reports
+    agent_circuit_failure_threshold: int = Field(default=5)  # consecutive failures that open an agent's circuit
+    agent_circuit_error_rate: float = Field(default=0.5)  # error rate (EWMA) that opens an agent's circuit
+    agent_circuit_cooldown: float = Field(default=30.0)  # seconds before a tripped agent gets a probe task
     max_retries: int = Field(default=3)
     retry_delay: int = Field(default=5)  # seconds
     
@@ -63,6 +78,19 @@ class Settings(BaseSettings):
     celery_broker_url: str = Field(default="redis://localhost:6379/0")
     celery_result_backend: str = Field(default="redis://localhost:6379/0")
     task_queue_name: str = Field(default="ai_agents")
+    task_queue_backend: str = Field(default="memory")  # "memory" or "redis" (Redis Streams)
+    task_queue_visibility_timeout: int = Field(default=300)  # seconds before an unacked task is redelivered
+    task_queue_max_deliveries: int = Field(default=5)  # deliveries before a task is dead-lettered
+    task_dedupe_window: int = Field(default=900)  # seconds an automated submission's dedupe key collapses duplicates
+    message_transport: str = Field(default="memory")  # agent messaging between processes: "memory" (none) or "redis"
+    message_transport_batch_size: int = Field(default=100)  # envelopes written to Redis in one pipeline
+    message_transport_batch_interval: float = Field(default=0.005)  # seconds outgoing envelopes wait to be batched
+    shared_data_max_bytes: Optional[int] = Field(default=None)  # bound on data shared between agents (LRU eviction); None = unbounded
+    scheduler_store: str = Field(default="sqlite")  # where scheduled tasks persist: "sqlite" or "memory" (lost on restart)
+    scheduler_db_path: str = Field(default=os.path.join(PACKAGE_DIR, "data", "scheduler.db"))
+    scheduler_misfire_policy: str = Field(default="run_once")  # runs missed while down: "skip", "run_once" or "run_all"
+    scheduler_misfire_grace: int = Field(default=60)  # seconds late a run may still start under the "skip" policy
+    scheduler_lease_ttl: int = Field(default=30)  # seconds a scheduler instance keeps firing schedules without renewing its lease
     
     # Logging Configuration
     log_level: str = Field(default="INFO")
@@ -16,6 +16,9 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from orchestrator.agent_coordinator import coordinator
+from orchestrator.agent_registry import normalize_agent_type
+from orchestrator.worker_pool import WorkerSupervisor, WorkerSpec
+from config.settings import settings
 from agents.intelligence.intelligence_agent import IntelligenceAgent
 from agents.strategy.strategy_agent import StrategyAgent
 from agents.content.content_agent import ContentAgent
@@ -43,6 +46,7 @@ class AIAgentsSystem:
     
     def __init__(self):
         self.agents = {}
+        self.worker_supervisor = None
         self.running = False
         self.setup_signal_handlers()
     
@@ -86,6 +90,10 @@ class AIAgentsSystem:
         logger.info("Stopping AI Agents System...")
         self.running = False
         
+        # Let worker processes finish their current tasks
+        if self.worker_supervisor:
+            await self.worker_supervisor.drain()
+        
         # Stop all agents
         for agent in self.agents.values():
             try:
@@ -190,13 +198,9 @@ class AIAgentsSystem:
         """Start all AI agents"""
         logger.info("Starting AI agents...")
         
-        # Register agents with coordinator
-        for agent_type, agent in self.agents.items():
-            coordinator.register_agent(
-                agent_id=agent.agent_id,
-                agent_type=agent_type,
-                capabilities=agent.get_capabilities()
-            )
+        # Register agent instances with coordinator so tasks are dispatched straight to them
+        for agent in self.agents.values():
+            coordinator.register_agent_instance(agent)
         
         # Start all agents
         for agent in self.agents.values():
@@ -206,6 +210,20 @@ class AIAgentsSystem:
             except Exception as e:
                 logger.error(f"Error starting agent {agent.agent_id}: {e}")
         
+        # Additional agent instances in worker processes, so agent work scales across cores
+        if settings.agent_worker_processes > 0:
+            self.worker_supervisor = WorkerSupervisor([
+                WorkerSpec(
+                    agent_type=normalize_agent_type(agent.agent_type),
+                    organization_id=agent.organization_id,
+                    processes=settings.agent_worker_processes
+                )
+                for agent in self.agents.values()
+            ])
+            await self.worker_supervisor.start()
+            for proxy in self.worker_supervisor.proxies():
+                coordinator.register_agent_instance(proxy)
+        
         logger.info("All AI agents started")
     
     def get_system_status(self):
@@ -215,10 +233,11 @@ class AIAgentsSystem:
             "agents_count": len(self.agents),
             "coordinator_status": coordinator.get_agent_status(),
             "task_queue_status": coordinator.get_task_queue_status(),
-            "performance_metrics": coordinator.get_performance_metrics()
+            "performance_metrics": coordinator.get_performance_metrics(),
+            "worker_processes": self.worker_supervisor.get_status() if self.worker_supervisor else None
         }
 
-# Global system instance for coordinator access
+# Global system instance
 system = None
 
 async def main():
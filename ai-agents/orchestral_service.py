@@ -17,6 +17,7 @@ import uvicorn
 from orchestrator.enhanced_agent_coordinator import enhanced_coordinator
 from services.agent_communication import AgentCommunication
 from orchestrator.workflow_engine import WorkflowEngine
+from orchestrator.admission_control import AdmissionRejectedError
 from utils.logger import get_orchestral_logger
 
 logger = get_orchestral_logger("orchestral_service")
@@ -93,7 +94,7 @@ async def execute_workflow(request: WorkflowExecuteRequest):
     try:
         logger.info(f"Executing workflow: {request.workflow_id} for org: {request.organization_id}")
         
-        execution_id = await enhanced_coordinator.workflow_engine.execute_workflow(
+        execution_id = await enhanced_coordinator.execute_orchestral_workflow(
             workflow_id=request.workflow_id,
             organization_id=request.organization_id,
             input_data=request.input_data,
@@ -107,6 +108,9 @@ async def execute_workflow(request: WorkflowExecuteRequest):
             "status": "started",
             "timestamp": datetime.now().isoformat()
         }
+    except AdmissionRejectedError as e:
+        logger.warning(f"Workflow {request.workflow_id} rejected for org {request.organization_id}: {e}")
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error executing workflow: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -126,6 +130,27 @@ async def get_workflow_status(execution_id: str):
         logger.error(f"Error getting workflow status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/orchestral/workflows/{execution_id}/trace")
+async def get_workflow_trace(execution_id: str):
+    """Get workflow execution trace with per-step timing and critical path"""
+    try:
+        trace = enhanced_coordinator.get_workflow_trace(execution_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail=f"No trace found for execution {execution_id}")
+        
+        return {
+            "success": True,
+            "execution_id": execution_id,
+            "trace": trace,
+            "step_latency": enhanced_coordinator.get_workflow_step_latency(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting workflow trace: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/orchestral/workflows/active")
 async def get_active_workflows():
     """Get currently active workflows"""
@@ -145,7 +170,7 @@ async def get_active_workflows():
 async def cancel_workflow(execution_id: str):
     """Cancel workflow execution"""
     try:
-        result = await enhanced_coordinator.workflow_engine.cancel_workflow(execution_id)
+        result = await enhanced_coordinator.cancel_workflow(execution_id)
         return {
             "success": True,
             "execution_id": execution_id,
@@ -161,8 +186,7 @@ async def get_orchestral_status():
     """Get orchestral system status"""
     try:
         agent_count = len(enhanced_coordinator.agents)
-        workflow_status = enhanced_coordinator.workflow_engine.get_system_status()
-        communication_status = enhanced_coordinator.communication.get_stats()
+        orchestral_status = enhanced_coordinator.get_orchestral_status()
         
         return {
             "success": True,
@@ -172,8 +196,8 @@ async def get_orchestral_status():
                 "active": agent_count,
                 "registered": list(enhanced_coordinator.agents.keys())
             },
-            "workflow_engine": workflow_status,
-            "communication": communication_status,
+            "workflow_engine": orchestral_status.get("workflow_engine", {}),
+            "communication": orchestral_status.get("communication", {}),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -184,7 +208,7 @@ async def get_orchestral_status():
 async def get_communication_stats():
     """Get agent communication statistics"""
     try:
-        stats = enhanced_coordinator.communication.get_stats()
+        stats = enhanced_coordinator.get_communication_stats()
         return {
             "success": True,
             "communication_stats": stats,
@@ -0,0 +1,255 @@
+"""
+Workflow Admission Control
+Caps concurrent workflow executions globally and per organization, queueing the rest
+with priority classes and weighted-fair ordering across organizations
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+class PriorityClass(Enum):
+    INTERACTIVE = 0  # user is waiting on the result
+    NORMAL = 1
+    BACKGROUND = 2  # scheduled / automated work
+
+# Priority strings used across the API and the automation tools
+PRIORITY_ALIASES = {
+    "interactive": PriorityClass.INTERACTIVE,
+    "urgent": PriorityClass.INTERACTIVE,
+    "critical": PriorityClass.INTERACTIVE,
+    "high": PriorityClass.INTERACTIVE,
+    "normal": PriorityClass.NORMAL,
+    "medium": PriorityClass.NORMAL,
+    "low": PriorityClass.BACKGROUND,
+    "background": PriorityClass.BACKGROUND
+}
+
+def resolve_priority(priority: Optional[str]) -> PriorityClass:
+    """Map a priority string to a priority class (unknown values are NORMAL)"""
+    if isinstance(priority, PriorityClass):
+        return priority
+    return PRIORITY_ALIASES.get(str(priority or "normal").lower(), PriorityClass.NORMAL)
+
+class AdmissionRejectedError(Exception):
+    """Raised when the admission queue is full"""
+
+@dataclass
+class AdmissionTicket:
+    """A granted (or pending) execution slot"""
+    organization_id: str
+    priority: PriorityClass
+    enqueued_at: float
+    admitted_at: Optional[float] = None
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent queued before admission"""
+        if self.admitted_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.admitted_at - self.enqueued_at
+
+class AdmissionController:
+    """
+    Weighted-fair admission queue for workflow executions
+
+    Each priority class has its own heap ordered by virtual finish time: an organization's
+    next request finishes at max(virtual clock, its previous finish) + 1 / weight, so a
+    tenant submitting a burst only gets its fair share of slots while others are waiting.
+    Higher priority classes are always drained first.
+    """
+
+    def __init__(self, max_concurrent: int = 10, max_per_org: int = 3,
+                 org_weights: Optional[Dict[str, float]] = None,
+                 max_queue_depth: Optional[int] = None, wait_samples: int = 1000):
+        self.max_concurrent = max_concurrent
+        self.max_per_org = max_per_org
+        self.org_weights = org_weights or {}
+        self.max_queue_depth = max_queue_depth
+
+        self._queues: Dict[PriorityClass, List] = {priority: [] for priority in PriorityClass}
+        self._sequence = itertools.count()
+        self._virtual_time: Dict[PriorityClass, float] = {priority: 0.0 for priority in PriorityClass}
+        self._last_finish: Dict[PriorityClass, Dict[str, float]] = {priority: {} for priority in PriorityClass}
+
+        self.in_flight = 0
+        self.in_flight_by_org: Dict[str, int] = {}
+        self.queued_by_class: Dict[PriorityClass, int] = {priority: 0 for priority in PriorityClass}
+        self.queued_by_org: Dict[str, int] = {}
+
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self._wait_samples: deque = deque(maxlen=wait_samples)
+
+    def set_org_weight(self, organization_id: str, weight: float):
+        """Give an organization a larger (or smaller) share of contended capacity"""
+        self.org_weights[organization_id] = max(weight, 0.01)
+
+    async def acquire(self, organization_id: str, priority: Optional[str] = None) -> AdmissionTicket:
+        """Wait until the execution may start and return its ticket"""
+        priority_class = resolve_priority(priority)
+        ticket = AdmissionTicket(organization_id, priority_class, time.monotonic())
+
+        if self._can_admit(organization_id) and not self._has_waiters():
+            self._grant(ticket)
+            return ticket
+
+        self.check_queue_capacity()
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._enqueue(ticket)
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.admitted_at is not None:
+                # Admitted in the same tick we were cancelled: hand the slot back
+                self.release(ticket)
+            else:
+                self._dequeued(ticket)
+            raise
+
+        return ticket
+
+    def check_queue_capacity(self):
+        """Reject up front when the queue is at its configured maximum depth"""
+        if self.max_queue_depth is not None and self.queue_depth >= self.max_queue_depth:
+            self.rejected_total += 1
+            raise AdmissionRejectedError(
+                f"Workflow admission queue is full ({self.queue_depth} waiting)"
+            )
+
+    def release(self, ticket: AdmissionTicket):
+        """Return an execution slot and admit whoever is next"""
+        self.in_flight -= 1
+        remaining = self.in_flight_by_org.get(ticket.organization_id, 1) - 1
+        if remaining > 0:
+            self.in_flight_by_org[ticket.organization_id] = remaining
+        else:
+            self.in_flight_by_org.pop(ticket.organization_id, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, organization_id: str, priority: Optional[str] = None):
+        """Hold an execution slot for the duration of the block"""
+        ticket = await self.acquire(organization_id, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self.queued_by_class.values())
+
+    def _has_waiters(self) -> bool:
+        return self.queue_depth > 0
+
+    def _can_admit(self, organization_id: str) -> bool:
+        return (self.in_flight < self.max_concurrent and
+                self.in_flight_by_org.get(organization_id, 0) < self.max_per_org)
+
+    def _enqueue(self, ticket: AdmissionTicket):
+        priority = ticket.priority
+        weight = self.org_weights.get(ticket.organization_id, 1.0)
+        start = max(self._virtual_time[priority],
+                    self._last_finish[priority].get(ticket.organization_id, 0.0))
+        finish = start + 1.0 / weight
+        self._last_finish[priority][ticket.organization_id] = finish
+
+        heapq.heappush(self._queues[priority], (finish, next(self._sequence), ticket))
+        self.queued_by_class[priority] += 1
+        self.queued_by_org[ticket.organization_id] = self.queued_by_org.get(ticket.organization_id, 0) + 1
+
+    def _dequeued(self, ticket: AdmissionTicket):
+        """Bookkeeping for a ticket leaving the queue (admitted or abandoned)"""
+        self.queued_by_class[ticket.priority] -= 1
+        remaining = self.queued_by_org.get(ticket.organization_id, 1) - 1
+        if remaining > 0:
+            self.queued_by_org[ticket.organization_id] = remaining
+        else:
+            self.queued_by_org.pop(ticket.organization_id, None)
+
+    def _grant(self, ticket: AdmissionTicket):
+        ticket.admitted_at = time.monotonic()
+        self.in_flight += 1
+        self.in_flight_by_org[ticket.organization_id] = self.in_flight_by_org.get(ticket.organization_id, 0) + 1
+        self.admitted_total += 1
+        self._wait_samples.append(ticket.wait_time)
+
+    def _dispatch(self):
+        """Admit queued tickets while capacity allows, highest priority class first"""
+        for priority in PriorityClass:
+            if self.in_flight >= self.max_concurrent:
+                return
+
+            queue = self._queues[priority]
+            blocked = []  # organizations at their own limit keep their place in line
+
+            while queue and self.in_flight < self.max_concurrent:
+                finish, sequence, ticket = heapq.heappop(queue)
+
+                if ticket.future is None or ticket.future.done():
+                    continue  # cancelled while waiting, already accounted for
+
+                if not self._can_admit(ticket.organization_id):
+                    blocked.append((finish, sequence, ticket))
+                    continue
+
+                self._virtual_time[priority] = max(self._virtual_time[priority], finish)
+                self._dequeued(ticket)
+                self._grant(ticket)
+                ticket.future.set_result(ticket)
+
+            for entry in blocked:
+                heapq.heappush(queue, entry)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight and wait-time metrics"""
+        waits = sorted(self._wait_samples)
+
+        def percentile(value: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[max(1, math.ceil(value / 100.0 * len(waits))) - 1] * 1000, 2)
+
+        oldest_wait = 0.0
+        for queue in self._queues.values():
+            for _, _, ticket in queue:
+                if ticket.future is not None and not ticket.future.done():
+                    oldest_wait = max(oldest_wait, ticket.wait_time)
+
+        return {
+            "limits": {
+                "max_concurrent": self.max_concurrent,
+                "max_per_org": self.max_per_org,
+                "max_queue_depth": self.max_queue_depth
+            },
+            "in_flight": self.in_flight,
+            "in_flight_by_org": dict(self.in_flight_by_org),
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": {
+                priority.name.lower(): count for priority, count in self.queued_by_class.items()
+            },
+            "queue_depth_by_org": dict(self.queued_by_org),
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "wait_time_ms": {
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+                "oldest_queued": round(oldest_wait * 1000, 2)
+            }
+        }
@@ -5,22 +5,87 @@ Now includes fully automated orchestral system with scheduled tasks, event liste
 """
 
 import asyncio
+import heapq
 import logging
-from typing import Dict, List, Any, Optional, Callable
+import uuid
+from typing import Dict, List, Any, Optional, Callable, AsyncIterator
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import json
 
 # Import automated systems
-from tools.advanced_scheduler import AdvancedScheduler
+from tools.advanced_scheduler import AdvancedScheduler, MisfirePolicy
+from tools.schedule_store import create_schedule_store
 from tools.event_listener import EventListener, EventType
 from tools.performance_monitor import PerformanceMonitor, MetricType
+from orchestrator.task_queue import AgentTaskQueue, effective_deadline
+from orchestrator.agent_registry import AgentInstanceRegistry, normalize_agent_type
+from orchestrator.load_balancer import AgentLoadBalancer, CircuitState
+from orchestrator.task_store import TaskResultStore
+from orchestrator.queue_backends import TaskQueueBackend, InMemoryQueueBackend, RedisStreamsQueueBackend
+from config.settings import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Strategy generation: total latency budget (seconds) and the share stage 1 may use
+STRATEGY_LATENCY_BUDGET = 60.0
+STRATEGY_STAGE_ONE_SHARE = 0.6
+
+# Used for a strategy stage whose agent is slow or failing and has no cached output yet
+STRATEGY_BASELINES = {
+    "intelligence": {
+        "market_insights": [
+            "Audience research pending: market analysis did not complete in time",
+            "Review platform trends manually before the first publishing cycle"
+        ],
+        "target_audience_analysis": {
+            "pain_points": ["Low engagement", "Limited reach", "Content creation challenges"],
+            "preferred_content": ["Educational", "Visual", "Interactive"]
+        }
+    },
+    "analytics": {
+        "kpis": [
+            {"metric": "engagement_rate", "target": 5.0, "current": 0, "unit": "%"},
+            {"metric": "reach", "target": 10000, "current": 0, "unit": "people"},
+            {"metric": "followers", "target": 500, "current": 0, "unit": "followers"},
+            {"metric": "website_traffic", "target": 25, "current": 0, "unit": "% increase"}
+        ],
+        "tracking_metrics": ["impressions", "clicks", "shares", "comments", "saves"]
+    },
+    "strategy": {
+        "recommendations": [
+            "Focus on video content for higher engagement",
+            "Collaborate with industry influencers",
+            "Create interactive content like polls and Q&As"
+        ]
+    },
+    "content": {
+        "content_pillars": [
+            "Educational content about your industry",
+            "Behind-the-scenes content",
+            "User-generated content",
+            "Industry insights and trends"
+        ],
+        "content_calendar": {
+            "daily_posts": 1,
+            "weekly_themes": ["Monday Motivation", "Wednesday Wisdom", "Friday Features"],
+            "content_mix": {"video": 40, "image": 35, "text": 25}
+        }
+    }
+}
+
+STRATEGY_LEARNING_OPTIMIZATIONS = {
+    "optimizations": [
+        "Post during peak engagement hours (9-11 AM, 7-9 PM)",
+        "Use trending hashtags relevant to your industry",
+        "Engage with comments within 2 hours",
+        "A/B test different content formats"
+    ]
+}
+
 class AgentStatus(Enum):
     IDLE = "idle"
     BUSY = "busy"
@@ -43,6 +108,49 @@ class Task:
     deadline: Optional[datetime] = None
     retries: int = 0
     max_retries: int = 3
+    completed_at: Optional[datetime] = None
+    result: Any = None
+    error: Optional[str] = None
+    # Created lazily by the first waiter, resolved with the task when it finishes
+    future: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)
+    # Coordinator (queue consumer name) that submitted the task and waits for its outcome
+    reply_to: Optional[str] = None
+    # Queue backend handle for the delivery being processed
+    receipt: Any = field(default=None, repr=False, compare=False)
+    # Given up on by its submitter: dropped if still queued, never retried
+    cancelled: bool = False
+    
+    @property
+    def finished(self) -> bool:
+        return self.completed_at is not None or self.error is not None
+
+def encode_task(task: Task) -> Dict[str, Any]:
+    """Serialize a task for a distributed queue backend"""
+    return {
+        "id": task.id,
+        "agent_type": task.agent_type,
+        "priority": task.priority.value,
+        "data": task.data,
+        "created_at": task.created_at.isoformat(),
+        "deadline": task.deadline.isoformat() if task.deadline else None,
+        "retries": task.retries,
+        "max_retries": task.max_retries,
+        "reply_to": task.reply_to
+    }
+
+def decode_task(payload: Dict[str, Any]) -> Task:
+    """Rebuild a task received from a distributed queue backend"""
+    return Task(
+        id=payload["id"],
+        agent_type=payload["agent_type"],
+        priority=TaskPriority(payload["priority"]),
+        data=payload["data"],
+        created_at=datetime.fromisoformat(payload["created_at"]),
+        deadline=datetime.fromisoformat(payload["deadline"]) if payload.get("deadline") else None,
+        retries=payload.get("retries", 0),
+        max_retries=payload.get("max_retries", 3),
+        reply_to=payload.get("reply_to")
+    )
 
 @dataclass
 class AgentInfo:
@@ -59,30 +167,64 @@ class AgentCoordinator:
     Coordinates communication and task distribution between AI agents
     """
     
-    def __init__(self):
+    DISPATCH_SKIP_LIMIT = 100  # tasks of busy organizations set aside per agent type in one pass
+    
+    def __init__(self, queue_backend: Optional[TaskQueueBackend] = None):
         self.agents: Dict[str, AgentInfo] = {}
-        self.task_queue: List[Task] = []
-        self.completed_tasks: List[Task] = []
-        self.failed_tasks: List[Task] = []
+        self.agent_registry = AgentInstanceRegistry()
+        self.load_balancer = AgentLoadBalancer(breaker_settings={
+            "failure_threshold": settings.agent_circuit_failure_threshold,
+            "error_rate_threshold": settings.agent_circuit_error_rate,
+            "cooldown": settings.agent_circuit_cooldown
+        })
+        self.task_queue = AgentTaskQueue()  # the queue when the in-memory backend is used
+        self.queue_backend = queue_backend or self._create_queue_backend()
+        self.tasks_by_id: Dict[str, Task] = {}  # submitted here and not finished yet
+        self.completed_tasks = TaskResultStore(retention=timedelta(hours=24), max_tasks=50000)
+        self.failed_tasks = TaskResultStore(retention=timedelta(hours=24), max_tasks=10000)
+        self.completed_total = 0
+        self.failed_total = 0
         self.running = False
         
+        # Wakes the dispatcher when a task is queued or an agent frees up
+        self._dispatch_wakeup = asyncio.Event()
+        
         # Initialize automated systems
-        self.scheduler = AdvancedScheduler(coordinator_callback=self.submit_task_async)
+        self.scheduler = AdvancedScheduler(
+            coordinator_callback=self.submit_task_async,
+            store_factory=lambda: create_schedule_store(settings),  # opened on start, off the event loop
+            misfire_policy=MisfirePolicy(settings.scheduler_misfire_policy),
+            misfire_grace=settings.scheduler_misfire_grace,
+            lease_ttl=settings.scheduler_lease_ttl
+        )
         self.event_listener = EventListener(coordinator_callback=self.submit_task_async)
         self.performance_monitor = PerformanceMonitor(coordinator_callback=self.submit_task_async)
         
+        # Last good output per (organization, strategy stage), used when an agent is slow
+        self._strategy_stage_cache: Dict[tuple, Any] = {}
+        
         # Task tracking for automated tasks
         self.automated_tasks: Dict[str, Dict[str, Any]] = {}
         
+        # Dedupe key -> (task id, window end); the heap expires keys in window order
+        self._dedupe_keys: Dict[str, tuple] = {}
+        self._dedupe_expiry: List[tuple] = []
+        self.deduplicated_total = 0
+        
     async def start(self):
         """Start the coordinator with full automation"""
         logger.info("Starting AI Agents Coordinator with Full Automation...")
         self.running = True
         
+        await self.queue_backend.start()
+        
         # Start core background tasks
         asyncio.create_task(self._monitor_agents())
+        asyncio.create_task(self._collect_agent_heartbeats())
         asyncio.create_task(self._process_task_queue())
         asyncio.create_task(self._cleanup_completed_tasks())
+        if self.queue_backend.distributed:
+            asyncio.create_task(self._consume_task_results())
         
         # Start automated systems
         await self.scheduler.start()
@@ -101,10 +243,27 @@ class AgentCoordinator:
         await self.event_listener.stop()
         await self.performance_monitor.stop()
         
+        await self.queue_backend.stop()
+        
         logger.info("AI Agents Coordinator and Automated Systems stopped")
     
-    def register_agent(self, agent_id: str, agent_type: str, capabilities: List[str]):
-        """Register a new agent"""
+    def _create_queue_backend(self) -> TaskQueueBackend:
+        """Build the queue backend selected by settings.task_queue_backend"""
+        if settings.task_queue_backend == "redis":
+            return RedisStreamsQueueBackend(
+                settings.redis_url,
+                encode=encode_task,
+                decode=decode_task,
+                prefix=settings.task_queue_name,
+                visibility_timeout=settings.task_queue_visibility_timeout,
+                max_deliveries=settings.task_queue_max_deliveries
+            )
+        return InMemoryQueueBackend(self.task_queue)
+    
+    def register_agent(self, agent_id: str, agent_type: str, capabilities: List[str],
+                       instance: Optional[Any] = None, organization_id: Optional[str] = None):
+        """Register a new agent (only agents with a live instance receive tasks)"""
+        agent_type = normalize_agent_type(agent_type)
         agent_info = AgentInfo(
             agent_id=agent_id,
             agent_type=agent_type,
@@ -115,53 +274,121 @@ class AgentCoordinator:
         )
         
         self.agents[agent_id] = agent_info
+        if instance is not None:
+            self.load_balancer.track(agent_id, max_in_flight=getattr(instance, "max_in_flight", 1))
+            self.agent_registry.register(
+                agent_id, agent_type, organization_id or getattr(instance, "organization_id", "default"), instance
+            )
+        self._dispatch_wakeup.set()
         logger.info(f"Registered agent: {agent_id} ({agent_type})")
     
+    def register_agent_instance(self, agent):
+        """Register a live BaseAgent so tasks of its type are dispatched straight to it"""
+        self.register_agent(
+            agent_id=agent.agent_id,
+            agent_type=agent.agent_type,
+            capabilities=agent.get_capabilities().get("capabilities", []),
+            instance=agent,
+            organization_id=agent.organization_id
+        )
+    
     def unregister_agent(self, agent_id: str):
         """Unregister an agent"""
         if agent_id in self.agents:
             del self.agents[agent_id]
+            self.agent_registry.unregister(agent_id)
+            self.load_balancer.forget(agent_id)
             logger.info(f"Unregistered agent: {agent_id}")
     
     def update_agent_status(self, agent_id: str, status: AgentStatus, current_task: Optional[Task] = None):
         """Update agent status"""
         if agent_id in self.agents:
-            self.agents[agent_id].status = status
-            self.agents[agent_id].current_task = current_task
+            self._set_agent_status(self.agents[agent_id], status, current_task)
             self.agents[agent_id].last_heartbeat = datetime.now()
     
+    def record_agent_heartbeat(self, agent_id: str, metrics: Optional[Dict[str, Any]] = None):
+        """
+        Record a heartbeat, optionally with the agent's load: in_flight, queue_depth,
+        ewma_latency (seconds) and error_rate (0..1)
+        """
+        agent_info = self.agents.get(agent_id)
+        if agent_info is None:
+            return
+        
+        agent_info.last_heartbeat = datetime.now()
+        if metrics:
+            was_routable = self.load_balancer.is_routable(agent_id)
+            self.load_balancer.record_heartbeat(agent_id, metrics)
+            # Reported work counts against capacity, so a heartbeat can fill or free the agent
+            if (agent_info.status != AgentStatus.OFFLINE
+                    and self.load_balancer.is_routable(agent_id) != was_routable):
+                self._refresh_dispatchable(agent_info)
+        
+        if agent_info.status == AgentStatus.OFFLINE:
+            self._set_agent_status(agent_info, AgentStatus.IDLE)
+    
+    def _set_agent_status(self, agent_info: AgentInfo, status: AgentStatus, current_task: Optional[Task] = None):
+        """Set an agent's status and keep the idle index in sync"""
+        agent_info.status = status
+        agent_info.current_task = current_task
+        self._refresh_dispatchable(agent_info)
+    
+    def _refresh_dispatchable(self, agent_info: AgentInfo):
+        """
+        An agent is in the idle index while it is up, below its in-flight limit and
+        its circuit admits tasks; BUSY agents with spare capacity still take work
+        """
+        if (agent_info.status in (AgentStatus.IDLE, AgentStatus.BUSY)
+                and self.load_balancer.is_routable(agent_info.agent_id)):
+            self.agent_registry.mark_idle(agent_info.agent_id)
+            self._dispatch_wakeup.set()
+        else:
+            self.agent_registry.mark_unavailable(agent_info.agent_id)
+    
+    def _on_circuit_cooldown(self, agent_id: str):
+        """A tripped agent's cooldown is over: admit one probe task"""
+        agent_info = self.agents.get(agent_id)
+        if agent_info is not None and agent_info.status == AgentStatus.ERROR:
+            logger.info(f"Agent {agent_id} circuit half open, sending a probe task")
+            self._set_agent_status(agent_info, AgentStatus.IDLE)
+    
     def submit_task(self, agent_type: str, data: Dict[str, Any], priority: TaskPriority = TaskPriority.MEDIUM, 
                    deadline: Optional[datetime] = None) -> str:
         """Submit a new task (synchronous)"""
-        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.task_queue)}"
+        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         task = Task(
             id=task_id,
-            agent_type=agent_type,
+            agent_type=normalize_agent_type(agent_type),
             priority=priority,
             data=data,
             created_at=datetime.now(),
             deadline=deadline
         )
         
-        # Insert task in priority order
-        inserted = False
-        for i, existing_task in enumerate(self.task_queue):
-            if priority.value > existing_task.priority.value:
-                self.task_queue.insert(i, task)
-                inserted = True
-                break
-        
-        if not inserted:
-            self.task_queue.append(task)
+        self._enqueue_task(task)
         
         logger.info(f"Submitted task: {task_id} for {agent_type}")
         return task_id
     
     async def submit_task_async(self, agent_type: str, data: Dict[str, Any], priority: str = "medium", 
                                scheduled: bool = False, event_triggered: bool = False, 
-                               threshold_triggered: bool = False) -> str:
-        """Submit a new task asynchronously (for automated systems)"""
+                               threshold_triggered: bool = False, dedupe_key: Optional[str] = None,
+                               dedupe_window: Optional[int] = None) -> str:
+        """
+        Submit a new task asynchronously (for automated systems)
+        
+        Submissions with the dedupe_key of a task submitted within the last dedupe_window
+        seconds (default settings.task_dedupe_window) return that task's id instead of
+        queueing the work again, unless that task failed.
+        """
+        if dedupe_key is not None:
+            existing_task_id = self._find_duplicate(dedupe_key)
+            if existing_task_id is not None:
+                self.deduplicated_total += 1
+                logger.info(f"Collapsed duplicate automated task for {agent_type} into {existing_task_id} (key: {dedupe_key})")
+                return existing_task_id
+        
         # Convert string priority to enum
         priority_map = {
             "low": TaskPriority.LOW,
@@ -171,7 +398,7 @@ class AgentCoordinator:
         }
         task_priority = priority_map.get(priority, TaskPriority.MEDIUM)
         
-        task_id = f"auto_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.task_queue)}"
+        task_id = f"auto_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         # Add automation metadata
         automation_metadata = {
@@ -188,22 +415,18 @@ class AgentCoordinator:
         
         task = Task(
             id=task_id,
-            agent_type=agent_type,
+            agent_type=normalize_agent_type(agent_type),
             priority=task_priority,
             data=data,
             created_at=datetime.now()
         )
         
-        # Insert task in priority order
-        inserted = False
-        for i, existing_task in enumerate(self.task_queue):
-            if task_priority.value > existing_task.priority.value:
-                self.task_queue.insert(i, task)
-                inserted = True
-                break
+        self._enqueue_task(task)
         
-        if not inserted:
-            self.task_queue.append(task)
+        if dedupe_key is not None:
+            self._remember_dedupe_key(
+                dedupe_key, task_id, dedupe_window if dedupe_window is not None else settings.task_dedupe_window
+            )
         
         # Track automated task
         self.automated_tasks[task_id] = {
@@ -212,12 +435,90 @@ class AgentCoordinator:
             "scheduled": scheduled,
             "event_triggered": event_triggered,
             "threshold_triggered": threshold_triggered,
+            "dedupe_key": dedupe_key,
             "created_at": datetime.now().isoformat()
         }
         
         logger.info(f"Submitted automated task: {task_id} for {agent_type} (Priority: {priority})")
         return task_id
     
+    def _find_duplicate(self, dedupe_key: str) -> Optional[str]:
+        """Id of the live task a dedupe key collapses into, if any"""
+        now = datetime.now().timestamp()
+        while self._dedupe_expiry and self._dedupe_expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._dedupe_expiry)
+            entry = self._dedupe_keys.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._dedupe_keys[key]
+        
+        entry = self._dedupe_keys.get(dedupe_key)
+        if entry is None or entry[0] in self.failed_tasks:
+            return None  # a failed attempt should not suppress the next one
+        return entry[0]
+    
+    def _remember_dedupe_key(self, dedupe_key: str, task_id: str, window: int):
+        expires_at = datetime.now().timestamp() + window
+        self._dedupe_keys[dedupe_key] = (task_id, expires_at)
+        heapq.heappush(self._dedupe_expiry, (expires_at, dedupe_key))
+    
+    async def submit_and_wait(self, agent_type: str, data: Dict[str, Any],
+                              priority: TaskPriority = TaskPriority.MEDIUM,
+                              deadline: Optional[datetime] = None, timeout: int = 30,
+                              cancel_on_timeout: bool = False) -> Dict[str, Any]:
+        """Submit a task and wait for its result; with cancel_on_timeout a task that overruns is cancelled"""
+        task_id = self.submit_task(agent_type, data, priority, deadline)
+        response = await self._wait_for_task_completion(task_id, timeout)
+        if cancel_on_timeout and not response.get("success"):
+            self.cancel_task(task_id, "Task timeout")
+        return response
+    
+    def cancel_task(self, task_id: str, reason: str = "Task cancelled") -> bool:
+        """
+        Give up on a task submitted here that has not finished
+
+        Waiters get the reason as the task's error. A queued task is dropped when it
+        is dequeued; a running one finishes, but its result is discarded and it is
+        not retried. Copies already taken by another coordinator still run there.
+        """
+        task = self.tasks_by_id.get(task_id)
+        if task is None or task.finished:
+            return False
+        task.cancelled = True
+        self._fail_task(task, reason)
+        logger.info(f"Cancelled task {task_id}: {reason}")
+        return True
+    
+    def _enqueue_task(self, task: Task):
+        """Queue a task and wake the dispatcher"""
+        task.reply_to = self.queue_backend.consumer_name
+        self.tasks_by_id[task.id] = task
+        self.queue_backend.enqueue_nowait(task)
+        self._dispatch_wakeup.set()
+    
+    def _complete_task(self, task: Task, result: Any = None):
+        """Record a successful task and wake anyone waiting on it"""
+        task.completed_at = datetime.now()
+        task.result = result
+        self.tasks_by_id.pop(task.id, None)
+        self.completed_tasks.add(task, task.completed_at)
+        self.completed_total += 1
+        if task.future is not None and not task.future.done():
+            task.future.set_result(task)
+    
+    def _find_task(self, task_id: str) -> Optional[Task]:
+        """Look a task up among pending, completed and failed tasks"""
+        return (self.tasks_by_id.get(task_id) or self.completed_tasks.get(task_id)
+                or self.failed_tasks.get(task_id))
+    
+    def _fail_task(self, task: Task, error: str):
+        """Record a failed task and wake anyone waiting on it"""
+        task.error = error
+        self.tasks_by_id.pop(task.id, None)
+        self.failed_tasks.add(task)
+        self.failed_total += 1
+        if task.future is not None and not task.future.done():
+            task.future.set_result(task)
+    
     async def _monitor_agents(self):
         """Monitor agent health and status"""
         while self.running:
@@ -226,11 +527,11 @@ class AgentCoordinator:
                 
                 for agent_id, agent_info in self.agents.items():
                     # Check if agent is responsive
-                    if agent_info.last_heartbeat:
+                    if agent_info.last_heartbeat and agent_info.status != AgentStatus.OFFLINE:
                         time_since_heartbeat = current_time - agent_info.last_heartbeat
                         if time_since_heartbeat > timedelta(minutes=5):
                             logger.warning(f"Agent {agent_id} hasn't responded in {time_since_heartbeat}")
-                            agent_info.status = AgentStatus.OFFLINE
+                            self._set_agent_status(agent_info, AgentStatus.OFFLINE, agent_info.current_task)
                     
                     # Check for stuck tasks
                     if agent_info.current_task and agent_info.status == AgentStatus.BUSY:
@@ -244,153 +545,251 @@ class AgentCoordinator:
                 logger.error(f"Error in agent monitoring: {e}")
                 await asyncio.sleep(30)
     
-    async def _process_task_queue(self):
-        """Process tasks from the queue"""
+    async def _collect_agent_heartbeats(self):
+        """Sample the load of live in-process agents (remote agents call record_agent_heartbeat)"""
         while self.running:
             try:
-                if self.task_queue:
-                    # Find available agent for the highest priority task
-                    task = self.task_queue[0]
-                    available_agent = self._find_available_agent(task.agent_type)
+                for agent_id in list(self.agents):
+                    instance = self.agent_registry.get_instance(agent_id)
+                    if instance is None or not getattr(instance, "is_initialized", False):
+                        continue
                     
-                    if available_agent:
-                        # Assign task to agent
-                        self.task_queue.pop(0)
-                        available_agent.current_task = task
-                        available_agent.status = AgentStatus.BUSY
-                        
-                        logger.info(f"Assigned task {task.id} to agent {available_agent.agent_id}")
-                        
-                        # Here you would typically send the task to the agent
-                        # For now, we'll simulate task execution
-                        asyncio.create_task(self._simulate_task_execution(task, available_agent))
-                    else:
-                        logger.warning(f"No available agent for task {task.id}")
-                        await asyncio.sleep(5)
-                else:
-                    await asyncio.sleep(1)
+                    get_load_metrics = getattr(instance, "get_load_metrics", None)
+                    self.record_agent_heartbeat(agent_id, get_load_metrics() if get_load_metrics else None)
+                
+                await asyncio.sleep(settings.agent_heartbeat_interval)
+                
+            except Exception as e:
+                logger.error(f"Error collecting agent heartbeats: {e}")
+                await asyncio.sleep(settings.agent_heartbeat_interval)
+    
+    async def _process_task_queue(self):
+        """Dispatch queued tasks to idle agents, serving every agent type independently"""
+        while self.running:
+            try:
+                # Clear before dispatching so a wakeup raised meanwhile is not lost
+                self._dispatch_wakeup.clear()
+                await self._dispatch_ready_tasks()
+                
+                # Sleep until new work or a free agent; the timeout catches agents that
+                # come back from OFFLINE and, for distributed backends, remote submissions
+                try:
+                    await asyncio.wait_for(self._dispatch_wakeup.wait(), timeout=self.queue_backend.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
                     
             except Exception as e:
                 logger.error(f"Error processing task queue: {e}")
                 await asyncio.sleep(5)
     
-    def _find_available_agent(self, agent_type: str) -> Optional[AgentInfo]:
-        """Find an available agent of the specified type"""
-        for agent_info in self.agents.values():
-            if (agent_info.agent_type == agent_type and 
-                agent_info.status == AgentStatus.IDLE):
-                return agent_info
-        return None
+    async def _dispatch_ready_tasks(self):
+        """Assign the most urgent tasks of each agent type to that type's idle agents"""
+        for agent_type in self.agent_registry.idle_agent_types():
+            # Tasks whose organization has no idle agent go back once the type is done,
+            # so they keep their place without blocking other organizations' work
+            skipped: List[Task] = []
+            try:
+                await self._dispatch_agent_type(agent_type, skipped)
+            finally:
+                for task in skipped:
+                    await self.queue_backend.requeue(task)
+    
+    async def _dispatch_agent_type(self, agent_type: str, skipped: List[Task]):
+        """Dispatch one agent type's ready tasks, setting aside those of organizations with no idle agent"""
+        while self.agent_registry.find_idle(agent_type) is not None and len(skipped) < self.DISPATCH_SKIP_LIMIT:
+            task = await self.queue_backend.dequeue(agent_type)
+            if task is None:
+                break
+            
+            known_task = self._find_task(task.id)
+            if known_task is not None and known_task.cancelled:
+                await self.queue_backend.ack(task)
+                logger.info(f"Dropped cancelled task {task.id}")
+                continue
+            
+            local_task = self.tasks_by_id.get(task.id)
+            if local_task is not None and local_task is not task:
+                # Submitted here: run the original, whose future local callers wait on
+                local_task.receipt = task.receipt
+                local_task.retries = task.retries
+                task = local_task
+            
+            available_agent = self._find_available_agent(agent_type, task.data.get("organization_id"))
+            if not available_agent:
+                # The organization's own pool is busy; look at the next task
+                skipped.append(task)
+                continue
+            
+            self.load_balancer.record_dispatch(available_agent.agent_id)
+            self._set_agent_status(available_agent, AgentStatus.BUSY, task)
+            
+            logger.info(f"Assigned task {task.id} to agent {available_agent.agent_id}")
+            asyncio.create_task(self._execute_task(task, available_agent))
+    
+    def _find_available_agent(self, agent_type: str, organization_id: Optional[str] = None) -> Optional[AgentInfo]:
+        """Least loaded available agent of the type (power of two choices), preferring the organization's own pool"""
+        agent_id = self.load_balancer.choose(self.agent_registry.idle_candidates(agent_type, organization_id))
+        return self.agents.get(agent_id) if agent_id else None
     
-    async def _simulate_task_execution(self, task: Task, agent: AgentInfo):
-        """Execute task with actual agent (replaced simulation with real execution)"""
+    async def _execute_task(self, task: Task, agent: AgentInfo):
+        """Execute a task on the agent's live instance"""
+        from agents.base_agent import AgentTask, AgentBusyError
+        
+        retry = False
+        succeeded = False
+        rejected = False
+        started = asyncio.get_running_loop().time()
+        keepalive = None
+        if task.receipt and self.queue_backend.visibility_timeout:
+            keepalive = asyncio.create_task(self._keep_task_visible(task))
         try:
             logger.info(f"Executing task {task.id} with agent {agent.agent_id}")
             
+            instance = self.agent_registry.get_instance(agent.agent_id)
+            if instance is None:
+                raise RuntimeError(f"No live instance registered for agent {agent.agent_id}")
+            
             # Convert Task to AgentTask
-            from agents.base_agent import AgentTask
             agent_task = AgentTask(
                 id=task.id,
-                type=task.agent_type,
+                type=task.data.get("task_type", task.agent_type),
                 priority=task.priority.value,
-                organization_id=task.data.get("organization_id", "default"),
+                organization_id=task.data.get("organization_id", instance.organization_id),
                 user_id=task.data.get("user_id"),
                 input_data=task.data,
                 context={},
                 created_at=task.created_at
             )
             
-            # Get the actual agent instance and execute the task
-            # We need to find the agent instance from the main system
-            try:
-                import main
-                agent_instance = None
-                
-                if hasattr(main, 'system') and main.system and hasattr(main.system, 'agents'):
-                    agent_type_map = {
-                        'intelligence': 'intelligence',
-                        'strategy': 'strategy', 
-                        'content': 'content',
-                        'execution': 'execution',
-                        'learning': 'learning',
-                        'engagement': 'engagement',
-                        'analytics': 'analytics'
-                    }
-                    
-                    agent_key = agent_type_map.get(task.agent_type)
-                    if agent_key and agent_key in main.system.agents:
-                        agent_instance = main.system.agents[agent_key]
-                        logger.info(f"Found agent instance: {agent_key} for task {task.id}")
-                    else:
-                        logger.warning(f"Agent key {agent_key} not found in system.agents")
-                else:
-                    logger.warning(f"System or agents not available: system={hasattr(main, 'system')}, agents={hasattr(main.system, 'agents') if hasattr(main, 'system') and main.system else 'N/A'}")
-                
-                if agent_instance:
-                    # Execute the task with the actual agent
-                    response = await agent_instance.execute_task(agent_task)
-                    
-                    # Mark task as completed
-                    task.completed_at = datetime.now()
-                    task.result = response.result
-                    self.completed_tasks.append(task)
-                    
-                    logger.info(f"Task {task.id} completed successfully with result: {response.success}")
-                else:
-                    # Fallback to simulation if agent not found
-                    logger.warning(f"Agent instance not found for {task.agent_type}, using simulation")
-                    await asyncio.sleep(2)
-                    task.completed_at = datetime.now()
-                    self.completed_tasks.append(task)
-                    
-            except Exception as agent_error:
-                logger.warning(f"Could not access agent instance: {agent_error}, using simulation")
-                await asyncio.sleep(2)
-                task.completed_at = datetime.now()
-                self.completed_tasks.append(task)
+            response = await instance.execute_task(agent_task)
+            if not response.success:
+                raise RuntimeError(response.error or "Agent reported failure")
+            
+            succeeded = True
+            if task.cancelled:
+                logger.info(f"Task {task.id} finished after it was cancelled, discarding its result")
+            else:
+                self._complete_task(task, response.result)
+                logger.info(f"Task {task.id} completed successfully")
             
-            # Update agent status
-            agent.current_task = None
-            agent.status = AgentStatus.IDLE
+        except AgentBusyError as e:
+            # The agent is taken by work from elsewhere; the task never ran, so it is not a failure
+            rejected = True
+            retry = not task.cancelled
+            if retry:
+                logger.info(f"Requeueing task {task.id}: {e}")
             
         except Exception as e:
             logger.error(f"Error executing task {task.id}: {e}")
             
             # Handle task failure
             task.retries += 1
-            if task.retries < task.max_retries:
-                # Retry task
-                self.task_queue.insert(0, task)
+            if task.cancelled:
+                logger.info(f"Not retrying cancelled task {task.id}")
+            elif task.retries < task.max_retries:
+                retry = True
                 logger.info(f"Retrying task {task.id} (attempt {task.retries + 1})")
             else:
                 # Mark task as failed
-                self.failed_tasks.append(task)
+                self._fail_task(task, str(e))
                 logger.error(f"Task {task.id} failed after {task.max_retries} retries")
+        
+        finally:
+            if keepalive is not None:
+                keepalive.cancel()
+            
+            # Update agent load, health and status
+            agent.last_heartbeat = datetime.now()
+            circuit = None
+            if rejected:
+                self.load_balancer.record_rejection(agent.agent_id)
+            else:
+                circuit = self.load_balancer.record_result(
+                    agent.agent_id, asyncio.get_running_loop().time() - started, succeeded
+                )
+            if circuit == CircuitState.OPEN:
+                logger.warning(f"Agent {agent.agent_id} circuit opened, routing around it for "
+                               f"{settings.agent_circuit_cooldown}s")
+                asyncio.get_running_loop().call_later(
+                    settings.agent_circuit_cooldown, self._on_circuit_cooldown, agent.agent_id
+                )
+            elif circuit == CircuitState.CLOSED:
+                logger.info(f"Agent {agent.agent_id} circuit closed")
+            
+            if self.load_balancer.circuit_state(agent.agent_id) == CircuitState.OPEN:
+                self._set_agent_status(agent, AgentStatus.ERROR)
+            elif self.load_balancer.in_flight(agent.agent_id):
+                self._set_agent_status(agent, AgentStatus.BUSY, agent.current_task)
+            else:
+                self._set_agent_status(agent, AgentStatus.IDLE)
+        
+        await self._settle_task(task, retry)
+    
+    async def _keep_task_visible(self, task: Task):
+        """Renew a running task's visibility timeout so no other consumer redelivers it meanwhile"""
+        interval = self.queue_backend.visibility_timeout / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue_backend.touch(task):
+                    logger.warning(f"Task {task.id} was claimed by another consumer while running here")
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing visibility of task {task.id}: {e}")
+    
+    async def _settle_task(self, task: Task, retry: bool):
+        """Tell the queue backend how a delivery ended and report the outcome to the submitter"""
+        try:
+            if retry:
+                # Re-queue before acking so a crash in between cannot lose the task;
+                # it keeps its original deadline, so it goes ahead of newer work
+                await self.queue_backend.enqueue(task)
+                await self.queue_backend.ack(task)
+                self._dispatch_wakeup.set()
+                return
             
-            # Update agent status
-            agent.current_task = None
-            agent.status = AgentStatus.IDLE
+            if task.error is not None and not task.cancelled:
+                await self.queue_backend.dead_letter(task, task.error)
+            else:
+                await self.queue_backend.ack(task)
+            
+            if task.reply_to and task.reply_to != self.queue_backend.consumer_name:
+                await self.queue_backend.publish_result(task.reply_to, {
+                    "task_id": task.id,
+                    "success": task.error is None,
+                    "result": task.result,
+                    "error": task.error
+                })
+        except Exception as e:
+            logger.error(f"Error settling task {task.id} with the {self.queue_backend.name} queue backend: {e}")
+    
+    async def _consume_task_results(self):
+        """Resolve local waiters for tasks that other processes executed"""
+        while self.running:
+            try:
+                for outcome in await self.queue_backend.read_results(timeout=1.0):
+                    task = self.tasks_by_id.get(outcome.get("task_id"))
+                    if task is None or task.finished:
+                        continue
+                    if outcome.get("success"):
+                        self._complete_task(task, outcome.get("result"))
+                    else:
+                        self._fail_task(task, outcome.get("error") or "Task failed")
+                        
+            except Exception as e:
+                logger.error(f"Error reading task results: {e}")
+                await asyncio.sleep(5)
     
     async def _cleanup_completed_tasks(self):
         """Clean up old completed tasks"""
         while self.running:
             try:
-                current_time = datetime.now()
-                cutoff_time = current_time - timedelta(hours=24)
+                # Stores also evict on insert; this covers quiet periods
+                evicted = self.completed_tasks.evict_expired() + self.failed_tasks.evict_expired()
+                if evicted:
+                    logger.info(f"Evicted {evicted} expired task results")
                 
-                # Remove old completed tasks
-                self.completed_tasks = [
-                    task for task in self.completed_tasks 
-                    if task.completed_at and task.completed_at > cutoff_time
-                ]
-                
-                # Remove old failed tasks
-                self.failed_tasks = [
-                    task for task in self.failed_tasks 
-                    if task.created_at > cutoff_time
-                ]
-                
-                await asyncio.sleep(3600)  # Clean up every hour
+                await asyncio.sleep(self.completed_tasks.bucket_seconds)
                 
             except Exception as e:
                 logger.error(f"Error cleaning up tasks: {e}")
@@ -398,6 +797,7 @@ class AgentCoordinator:
     
     def get_agent_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
+        load_stats = self.load_balancer.get_stats()
         return {
             agent_id: {
                 "agent_type": agent.agent_type,
@@ -405,193 +805,250 @@ class AgentCoordinator:
                 "capabilities": agent.capabilities,
                 "current_task": agent.current_task.id if agent.current_task else None,
                 "last_heartbeat": agent.last_heartbeat.isoformat() if agent.last_heartbeat else None,
-                "performance_metrics": agent.performance_metrics
+                "performance_metrics": agent.performance_metrics,
+                "load": load_stats.get(agent_id)
             }
             for agent_id, agent in self.agents.items()
         }
     
-    def get_task_queue_status(self) -> Dict[str, Any]:
-        """Get status of task queue"""
+    def get_task_queue_status(self, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """
+        Get status of task queue, as the queue backend reports it. Pending counts and the
+        paginated listing (in dispatch order) are None for backends that do not track them.
+        """
+        backend_stats = self.queue_backend.get_stats()
+        pending = self.queue_backend.list_pending(offset, limit)
         return {
-            "pending_tasks": len(self.task_queue),
+            "pending_tasks": backend_stats.get("pending"),
+            "pending_by_agent_type": backend_stats.get("pending_by_agent_type"),
+            "queue_backend": backend_stats,
             "completed_tasks": len(self.completed_tasks),
             "failed_tasks": len(self.failed_tasks),
-            "queue": [
+            "offset": offset,
+            "limit": limit,
+            "queue": None if pending is None else [
                 {
                     "id": task.id,
                     "agent_type": task.agent_type,
                     "priority": task.priority.value,
                     "created_at": task.created_at.isoformat(),
-                    "deadline": task.deadline.isoformat() if task.deadline else None
+                    "deadline": task.deadline.isoformat() if task.deadline else None,
+                    "due_at": datetime.fromtimestamp(effective_deadline(task)).isoformat()
                 }
-                for task in self.task_queue
+                for task in pending
             ]
         }
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get performance metrics"""
-        total_tasks = len(self.completed_tasks) + len(self.failed_tasks)
-        success_rate = len(self.completed_tasks) / total_tasks if total_tasks > 0 else 0
+        total_tasks = self.completed_total + self.failed_total
+        success_rate = self.completed_total / total_tasks if total_tasks > 0 else 0
         
         return {
             "total_tasks_processed": total_tasks,
-            "successful_tasks": len(self.completed_tasks),
-            "failed_tasks": len(self.failed_tasks),
+            "successful_tasks": self.completed_total,
+            "failed_tasks": self.failed_total,
             "success_rate": success_rate,
             "active_agents": len([a for a in self.agents.values() if a.status == AgentStatus.IDLE]),
             "busy_agents": len([a for a in self.agents.values() if a.status == AgentStatus.BUSY])
         }
     
     async def orchestrate_strategy_generation(self, input_data: Dict[str, Any], 
-                                            organization_id: str, user_id: str) -> Dict[str, Any]:
+                                            organization_id: str, user_id: str,
+                                            latency_budget: float = STRATEGY_LATENCY_BUDGET) -> Dict[str, Any]:
         """
         Orchestrate a complex strategy generation workflow using multiple agents
         """
-        logger.info("Starting orchestral strategy generation", {
+        result = None
+        async for update in self.stream_strategy_generation(input_data, organization_id, user_id, latency_budget):
+            if update["event"] == "complete":
+                result = update["result"]
+        return result
+    
+    async def stream_strategy_generation(self, input_data: Dict[str, Any], organization_id: str,
+                                         user_id: str, latency_budget: float = STRATEGY_LATENCY_BUDGET
+                                         ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run strategy generation and yield each agent's output as soon as it is available.
+        
+        Intelligence and analytics run concurrently; their outputs feed the strategy and
+        content agents, which also run concurrently. Stages share one latency budget; an
+        agent that fails or overruns its share is replaced by that organization's last
+        good output for the stage, or by a baseline, and the strategy is marked degraded.
+        The final event carries the assembled strategy.
+        """
+        logger.info(f"Starting orchestral strategy generation for organization {organization_id} "
+                    f"(objectives: {input_data.get('objectives', [])})")
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + latency_budget
+        outputs: Dict[str, Any] = {}
+        degraded: Dict[str, str] = {}
+        
+        base_data = {
             "organization_id": organization_id,
             "user_id": user_id,
-            "objectives": input_data.get("objectives", [])
-        })
-        
-        logger.info(f"Available agents: {list(self.agents.keys())}")
-        logger.info(f"Task queue length: {len(self.task_queue)}")
+            "objectives": input_data.get("objectives", []),
+            "platforms": input_data.get("platforms", []),
+            "target_audience": input_data.get("target_audience"),
+            "industry": input_data.get("industry"),
+            "timeframe": input_data.get("timeframe", "30d")
+        }
         
         try:
-            # For now, let's create a simplified orchestral approach that actually works
-            # This simulates the work of multiple agents without the complexity of task coordination
-            
-            # Simulate Intelligence Agent work
-            intelligence_data = {
-                "market_insights": [
-                    f"Market analysis for {input_data.get('target_audience', 'target audience')}",
-                    f"Trend analysis for {', '.join(input_data.get('platforms', []))} platforms",
-                    f"Competitive landscape for {input_data.get('industry', 'your industry')}"
-                ],
-                "target_audience_analysis": {
-                    "demographics": input_data.get("target_audience", "Small business owners"),
-                    "pain_points": ["Low engagement", "Limited reach", "Content creation challenges"],
-                    "preferred_content": ["Educational", "Visual", "Interactive"]
-                }
-            }
-            
-            # Simulate Analytics Agent work
-            analytics_data = {
-                "kpis": [
-                    {"metric": "engagement_rate", "target": 5.0, "current": 0, "unit": "%"},
-                    {"metric": "reach", "target": 10000, "current": 0, "unit": "people"},
-                    {"metric": "followers", "target": 500, "current": 0, "unit": "followers"},
-                    {"metric": "website_traffic", "target": 25, "current": 0, "unit": "% increase"}
-                ],
-                "tracking_metrics": ["impressions", "clicks", "shares", "comments", "saves"]
+            # Stage 1: market intelligence and KPI framework in parallel
+            stage_one = {
+                "intelligence": ("comprehensive_analysis", base_data),
+                "analytics": ("generate_report", base_data)
             }
+            stage_one_deadline = started + latency_budget * STRATEGY_STAGE_ONE_SHARE
+            async for update in self._run_strategy_stage(stage_one, organization_id, stage_one_deadline,
+                                                         outputs, degraded, started):
+                yield update
             
-            # Simulate Content Agent work
-            content_data = {
-                "content_pillars": [
-                    "Educational content about your industry",
-                    "Behind-the-scenes content",
-                    "User-generated content",
-                    "Industry insights and trends"
-                ],
-                "content_calendar": {
-                    "daily_posts": 1,
-                    "weekly_themes": ["Monday Motivation", "Wednesday Wisdom", "Friday Features"],
-                    "content_mix": {"video": 40, "image": 35, "text": 25}
-                }
+            # Stage 2: strategy and content build on stage 1
+            informed_data = {
+                **base_data,
+                "market_intelligence": outputs["intelligence"],
+                "analytics_framework": outputs["analytics"]
             }
-            
-            # Simulate Learning Agent work
-            learning_data = {
-                "optimizations": [
-                    "Post during peak engagement hours (9-11 AM, 7-9 PM)",
-                    "Use trending hashtags relevant to your industry",
-                    "Engage with comments within 2 hours",
-                    "A/B test different content formats"
-                ],
-                "recommendations": [
-                    "Focus on video content for higher engagement",
-                    "Collaborate with industry influencers",
-                    "Create interactive content like polls and Q&As"
-                ]
+            stage_two = {
+                "strategy": ("strategy_development", informed_data),
+                "content": ("content_generation", informed_data)
             }
+            async for update in self._run_strategy_stage(stage_two, organization_id, deadline,
+                                                         outputs, degraded, started):
+                yield update
             
-            # Create the final orchestral strategy
-            orchestral_strategy = {
-                "name": f"Orchestral AI Strategy for {input_data.get('timeframe', '30d')}",
-                "description": f"Comprehensive social media strategy generated by 5 AI agents for {input_data.get('target_audience', 'your target audience')}",
-                "status": "active",
-                "confidence": 95,
-                "aiGenerated": True,
-                "orchestration_metadata": {
-                    "agents_used": ["intelligence", "analytics", "content", "learning", "strategy"],
-                    "workflow_type": "orchestral",
-                    "generated_at": datetime.now().isoformat(),
-                    "organization_id": organization_id,
-                    "user_id": user_id
-                },
-                "strategy": {
-                    "monthlyTheme": f"AI-Orchestrated Growth Strategy for {input_data.get('timeframe', '30d')}",
-                    "focus": f"Multi-agent coordinated approach targeting {input_data.get('target_audience', 'your audience')}",
-                    "objectives": [
-                        {
-                            "goal": obj,
-                            "target": 50,
-                            "timeline": input_data.get("timeframe", "30d"),
-                            "metrics": ["engagement", "reach", "followers", "conversions"],
-                            "status": "planned"
-                        } for obj in input_data.get("objectives", ["brand_awareness"])
-                    ],
-                    "intelligence_insights": intelligence_data,
-                    "analytics_framework": analytics_data,
-                    "content_strategy": content_data,
-                    "learning_optimizations": learning_data,
-                    "platformStrategies": [
-                        {
-                            "platform": platform,
-                            "focus": f"AI-optimized content for {platform}",
-                            "contentMix": {"video": 40, "image": 35, "text": 25},
-                            "postingFrequency": "daily",
-                            "keyHashtags": ["#business", "#growth", "#success", "#marketing"],
-                            "engagementTactics": [
-                                "Ask questions to encourage comments",
-                                "Share behind-the-scenes content",
-                                "Respond to comments within 2 hours",
-                                "Use trending hashtags relevant to industry",
-                                "Collaborate with industry influencers"
-                            ]
-                        } for platform in input_data.get("platforms", ["instagram", "linkedin"])
-                    ],
-                    "nextSteps": [
-                        "Implement AI-generated content calendar (immediate)",
-                        "Set up analytics tracking for all KPIs (within 3 days)",
-                        "Begin posting orchestrated content strategy (within 1 week)",
-                        "Monitor and optimize based on AI recommendations (ongoing)",
-                        "Scale successful content formats (within 2 weeks)"
-                    ]
-                }
-            }
-            
-            # Compile orchestral results
             orchestral_result = {
                 "success": True,
-                "data": orchestral_strategy,
-                "message": "Strategy generated using orchestral approach with 5 AI agents"
+                "data": self._build_orchestral_strategy(input_data, organization_id, user_id, outputs, degraded),
+                "message": (
+                    f"Strategy generated using orchestral approach with {len(outputs) - len(degraded)} AI agents"
+                    + (f" ({', '.join(sorted(degraded))} degraded)" if degraded else "")
+                )
             }
             
-            logger.info("Orchestral strategy generation completed successfully", {
-                "organization_id": organization_id,
-                "user_id": user_id,
-                "agents_used": 5
-            })
-            
-            return orchestral_result
+            logger.info(f"Orchestral strategy generation completed for organization {organization_id} "
+                        f"in {loop.time() - started:.2f}s (degraded: {sorted(degraded) or 'none'})")
             
         except Exception as e:
             logger.error(f"Error in orchestral strategy generation: {e}")
-            return {
+            orchestral_result = {
                 "success": False,
                 "error": f"Orchestral workflow failed: {str(e)}"
             }
+        
+        yield {"event": "complete", "result": orchestral_result}
+    
+    async def _run_strategy_stage(self, stage: Dict[str, Any], organization_id: str, deadline: float,
+                                  outputs: Dict[str, Any], degraded: Dict[str, str],
+                                  started: float) -> AsyncIterator[Dict[str, Any]]:
+        """Run one stage's agents concurrently, yielding each result as it lands"""
+        loop = asyncio.get_running_loop()
+        timeout = max(0.0, deadline - loop.time())
+        
+        pending = {
+            asyncio.create_task(self.submit_and_wait(
+                agent_type, {**data, "task_type": task_type}, TaskPriority.HIGH, timeout=timeout,
+                cancel_on_timeout=True  # the stage falls back to cached output, nobody needs the late result
+            )): agent_type
+            for agent_type, (task_type, data) in stage.items()
+        }
+        
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                agent_type = pending.pop(finished)
+                response = finished.result()
+                
+                if response.get("success"):
+                    outputs[agent_type] = response["data"]
+                    self._strategy_stage_cache[(organization_id, agent_type)] = response["data"]
+                    event = "stage_complete"
+                else:
+                    outputs[agent_type], source = self._strategy_stage_fallback(organization_id, agent_type)
+                    degraded[agent_type] = source
+                    event = "stage_degraded"
+                    logger.warning(f"Strategy stage {agent_type} degraded to {source}: {response.get('error')}")
+                
+                yield {
+                    "event": event,
+                    "stage": agent_type,
+                    "data": outputs[agent_type],
+                    "source": degraded.get(agent_type, "agent"),
+                    "elapsed_ms": round((loop.time() - started) * 1000, 2)
+                }
+    
+    def _strategy_stage_fallback(self, organization_id: str, agent_type: str):
+        """Last good output for the organization, else the baseline"""
+        cached = self._strategy_stage_cache.get((organization_id, agent_type))
+        if cached is not None:
+            return cached, "cache"
+        return STRATEGY_BASELINES[agent_type], "baseline"
+    
+    def _build_orchestral_strategy(self, input_data: Dict[str, Any], organization_id: str, user_id: str,
+                                   outputs: Dict[str, Any], degraded: Dict[str, str]) -> Dict[str, Any]:
+        """Assemble agent outputs into the strategy document returned to the API"""
+        agents_used = [agent_type for agent_type in outputs if agent_type not in degraded]
+        
+        return {
+            "name": f"Orchestral AI Strategy for {input_data.get('timeframe', '30d')}",
+            "description": f"Comprehensive social media strategy generated by {len(agents_used)} AI agents for {input_data.get('target_audience', 'your target audience')}",
+            "status": "active",
+            "confidence": 95 if not degraded else 70,
+            "aiGenerated": True,
+            "orchestration_metadata": {
+                "agents_used": agents_used,
+                "degraded_stages": degraded,
+                "workflow_type": "orchestral",
+                "generated_at": datetime.now().isoformat(),
+                "organization_id": organization_id,
+                "user_id": user_id
+            },
+            "strategy": {
+                "monthlyTheme": f"AI-Orchestrated Growth Strategy for {input_data.get('timeframe', '30d')}",
+                "focus": f"Multi-agent coordinated approach targeting {input_data.get('target_audience', 'your audience')}",
+                "objectives": [
+                    {
+                        "goal": obj,
+                        "target": 50,
+                        "timeline": input_data.get("timeframe", "30d"),
+                        "metrics": ["engagement", "reach", "followers", "conversions"],
+                        "status": "planned"
+                    } for obj in input_data.get("objectives", ["brand_awareness"])
+                ],
+                "intelligence_insights": outputs.get("intelligence"),
+                "analytics_framework": outputs.get("analytics"),
+                "strategy_recommendations": outputs.get("strategy"),
+                "content_strategy": outputs.get("content"),
+                "learning_optimizations": STRATEGY_LEARNING_OPTIMIZATIONS,
+                "platformStrategies": [
+                    {
+                        "platform": platform,
+                        "focus": f"AI-optimized content for {platform}",
+                        "contentMix": {"video": 40, "image": 35, "text": 25},
+                        "postingFrequency": "daily",
+                        "keyHashtags": ["#business", "#growth", "#success", "#marketing"],
+                        "engagementTactics": [
+                            "Ask questions to encourage comments",
+                            "Share behind-the-scenes content",
+                            "Respond to comments within 2 hours",
+                            "Use trending hashtags relevant to industry",
+                            "Collaborate with industry influencers"
+                        ]
+                    } for platform in input_data.get("platforms", ["instagram", "linkedin"])
+                ],
+                "nextSteps": [
+                    "Implement AI-generated content calendar (immediate)",
+                    "Set up analytics tracking for all KPIs (within 3 days)",
+                    "Begin posting orchestrated content strategy (within 1 week)",
+                    "Monitor and optimize based on AI recommendations (ongoing)",
+                    "Scale successful content formats (within 2 weeks)"
+                ]
+            }
+        }
     
     def get_automation_status(self) -> Dict[str, Any]:
         """Get status of all automated systems"""
@@ -599,7 +1056,9 @@ class AgentCoordinator:
             "scheduler": {
                 "enabled": self.scheduler.running if hasattr(self.scheduler, 'running') else False,
                 "scheduled_tasks": len(self.scheduler.scheduled_tasks) if hasattr(self.scheduler, 'scheduled_tasks') else 0,
-                "active_tasks": len([t for t in self.scheduler.scheduled_tasks if t.enabled]) if hasattr(self.scheduler, 'scheduled_tasks') else 0
+                "active_tasks": len([t for t in self.scheduler.scheduled_tasks.values() if t.enabled]) if hasattr(self.scheduler, 'scheduled_tasks') else 0,
+                "leader": self.scheduler.is_leader,
+                "store": self.scheduler.store.name if self.scheduler.store else None
             },
             "event_listener": {
                 "enabled": self.event_listener.running if hasattr(self.event_listener, 'running') else False,
@@ -613,6 +1072,8 @@ class AgentCoordinator:
             },
             "automated_tasks": {
                 "total_submitted": len(self.automated_tasks),
+                "deduplicated": self.deduplicated_total,
+                "active_dedupe_keys": len(self._dedupe_keys),
                 "by_type": self._get_automated_tasks_by_type(),
                 "by_priority": self._get_automated_tasks_by_priority()
             }
@@ -634,9 +1095,9 @@ class AgentCoordinator:
             priority_counts[priority] = priority_counts.get(priority, 0) + 1
         return priority_counts
     
-    def get_scheduled_tasks(self) -> List[Dict[str, Any]]:
-        """Get all scheduled tasks"""
-        return self.scheduler.get_scheduled_tasks()
+    def get_scheduled_tasks(self, organization_id: str = None) -> List[Dict[str, Any]]:
+        """Get all scheduled tasks, or those of one organization"""
+        return self.scheduler.get_scheduled_tasks(organization_id)
     
     def get_event_rules(self) -> List[Dict[str, Any]]:
         """Get all event rules"""
@@ -664,7 +1125,8 @@ class AgentCoordinator:
     
     def add_scheduled_task(self, name: str, schedule_type: str, schedule_time: str, 
                           agent_type: str = "strategy", schedule_day: str = None,
-                          task_data: Dict[str, Any] = None) -> str:
+                          task_data: Dict[str, Any] = None, timezone: str = "UTC",
+                          organization_id: str = None) -> str:
         """Add a new scheduled task"""
         from tools.advanced_scheduler import ScheduleType
         schedule_enum = ScheduleType(schedule_type)
@@ -674,7 +1136,9 @@ class AgentCoordinator:
             schedule_time=schedule_time,
             agent_type=agent_type,
             schedule_day=schedule_day,
-            task_data=task_data
+            task_data=task_data,
+            timezone_name=timezone,
+            organization_id=organization_id
         )
     
     def add_event_rule(self, event_type: str, conditions: Dict[str, Any], 
@@ -707,32 +1171,37 @@ class AgentCoordinator:
         """
         Wait for a task to complete and return its result
         """
-        start_time = datetime.now()
-        
-        while (datetime.now() - start_time).seconds < timeout:
-            # Check if task is in completed tasks
-            for task in self.completed_tasks:
-                if task.id == task_id:
-                    return {
-                        "success": True,
-                        "data": task.data.get("result", {}),
-                        "task_id": task_id
-                    }
-            
-            # Check if task is in failed tasks
-            for task in self.failed_tasks:
-                if task.id == task_id:
-                    return {
-                        "success": False,
-                        "error": "Task failed",
-                        "task_id": task_id
-                    }
-            
-            await asyncio.sleep(1)
+        task = self._find_task(task_id)
+        if task is None:
+            return {
+                "success": False,
+                "error": "Task not found",
+                "task_id": task_id
+            }
+        
+        if not task.finished:
+            if task.future is None:
+                task.future = asyncio.get_running_loop().create_future()
+            try:
+                # Shield so one waiter timing out does not cancel the future for the others
+                await asyncio.wait_for(asyncio.shield(task.future), timeout=timeout)
+            except asyncio.TimeoutError:
+                return {
+                    "success": False,
+                    "error": "Task timeout",
+                    "task_id": task_id
+                }
+        
+        if task.error is not None:
+            return {
+                "success": False,
+                "error": f"Task failed: {task.error}",
+                "task_id": task_id
+            }
         
         return {
-            "success": False,
-            "error": "Task timeout",
+            "success": True,
+            "data": task.result if task.result is not None else {},
             "task_id": task_id
         }
 
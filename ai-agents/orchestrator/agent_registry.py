@@ -0,0 +1,116 @@
+"""
+Agent Instance Registry
+Live agent instances pooled by agent type and organization, with constant-time idle lookup
+"""
+
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_agent_type(agent_type: Any) -> str:
+    """Map AgentType members and "<type>_agent" strings to the short type name ("intelligence")"""
+    value = getattr(agent_type, "value", agent_type)
+    value = str(value)
+    return value[:-len("_agent")] if value.endswith("_agent") else value
+
+class AgentInstanceRegistry:
+    """
+    Holds the live BaseAgent instances the coordinator dispatches to
+
+    "Idle" means able to take another task. Idle agents are kept in insertion-ordered dicts (used as ordered sets) per
+    (agent type, organization) and per agent type, so finding and claiming an idle
+    agent is O(1) and agents are reused in the order they became idle.
+    """
+
+    def __init__(self):
+        self.instances: Dict[str, Any] = {}  # agent_id -> BaseAgent
+        self.pools: Dict[Tuple[str, str], Dict[str, None]] = {}  # (type, org) -> agent ids
+        self._keys: Dict[str, Tuple[str, str]] = {}  # agent_id -> (type, org)
+        self._idle_by_pool: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._idle_by_type: Dict[str, Dict[str, None]] = {}
+
+    def register(self, agent_id: str, agent_type: str, organization_id: str, instance: Any):
+        """Add a live agent instance; it starts out idle"""
+        if agent_id in self.instances:
+            self.unregister(agent_id)
+
+        key = (normalize_agent_type(agent_type), organization_id)
+        self.instances[agent_id] = instance
+        self._keys[agent_id] = key
+        self.pools.setdefault(key, {})[agent_id] = None
+        self.mark_idle(agent_id)
+
+    def unregister(self, agent_id: str):
+        """Remove an agent instance"""
+        key = self._keys.pop(agent_id, None)
+        if key is None:
+            return
+        self.mark_unavailable(agent_id, key)
+        self.instances.pop(agent_id, None)
+        pool = self.pools.get(key)
+        if pool is not None:
+            pool.pop(agent_id, None)
+            if not pool:
+                del self.pools[key]
+
+    def get_instance(self, agent_id: str) -> Optional[Any]:
+        return self.instances.get(agent_id)
+
+    def mark_idle(self, agent_id: str):
+        """Make an agent available for dispatch"""
+        key = self._keys.get(agent_id)
+        if key is None:
+            return
+        self._idle_by_pool.setdefault(key, {})[agent_id] = None
+        self._idle_by_type.setdefault(key[0], {})[agent_id] = None
+
+    def mark_unavailable(self, agent_id: str, key: Optional[Tuple[str, str]] = None):
+        """Take an agent out of the idle sets (busy, errored or offline)"""
+        key = key or self._keys.get(agent_id)
+        if key is None:
+            return
+        idle = self._idle_by_pool.get(key)
+        if idle is not None:
+            idle.pop(agent_id, None)
+        idle = self._idle_by_type.get(key[0])
+        if idle is not None:
+            idle.pop(agent_id, None)
+
+    def find_idle(self, agent_type: str, organization_id: Optional[str] = None) -> Optional[str]:
+        """
+        Id of an idle agent for the type, preferring the organization's own pool.
+        Organizations without a pool of that type are served by any idle agent of the type.
+        """
+        idle = self._idle_set(agent_type, organization_id)
+        if not idle:
+            return None
+        return next(iter(idle))
+
+    def idle_candidates(self, agent_type: str, organization_id: Optional[str] = None) -> List[str]:
+        """Ids of every idle agent find_idle would choose from"""
+        return list(self._idle_set(agent_type, organization_id) or ())
+
+    def _idle_set(self, agent_type: str, organization_id: Optional[str]) -> Optional[Dict[str, None]]:
+        agent_type = normalize_agent_type(agent_type)
+        if organization_id is not None and (agent_type, organization_id) in self.pools:
+            return self._idle_by_pool.get((agent_type, organization_id))
+        return self._idle_by_type.get(agent_type)
+
+    def idle_agent_types(self) -> List[str]:
+        """Agent types with at least one idle agent"""
+        return [agent_type for agent_type, idle in self._idle_by_type.items() if idle]
+
+    def get_pool(self, agent_type: str, organization_id: str) -> List[Any]:
+        """Instances registered for one type and organization"""
+        key = (normalize_agent_type(agent_type), organization_id)
+        return [self.instances[agent_id] for agent_id in self.pools.get(key, {})]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            f"{agent_type}:{organization_id}": {
+                "instances": len(agent_ids),
+                "idle": len(self._idle_by_pool.get((agent_type, organization_id), {}))
+            }
+            for (agent_type, organization_id), agent_ids in self.pools.items()
+        }
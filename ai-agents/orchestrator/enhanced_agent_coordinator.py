@@ -9,6 +9,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 
 from orchestrator.agent_coordinator import AgentCoordinator, coordinator
+from orchestrator.agent_registry import normalize_agent_type
 from orchestrator.workflow_engine import WorkflowEngine
 from services.agent_communication import AgentCommunicationProtocol, communication_protocol
 from agents.base_agent import BaseAgent
@@ -23,7 +24,7 @@ class EnhancedAgentCoordinator(AgentCoordinator):
         super().__init__()
         self.workflow_engine: Optional[WorkflowEngine] = None
         self.communication_protocol: Optional[AgentCommunicationProtocol] = None
-        self.agents_registry: Dict[str, BaseAgent] = {}
+        self.agents_registry: Dict[str, List[BaseAgent]] = {}
         
     async def start(self):
         """Start the enhanced coordinator with orchestral capabilities"""
@@ -62,13 +63,14 @@ class EnhancedAgentCoordinator(AgentCoordinator):
     def register_agent_with_orchestration(self, agent: BaseAgent):
         """Register agent with full orchestration support"""
         agent_id = agent.agent_id
-        agent_type = agent.agent_type.value
+        agent_type = normalize_agent_type(agent.agent_type)
         
         # Register with base coordinator
-        self.register_agent(agent_id, agent_type, agent.get_capabilities()["capabilities"])
+        self.register_agent_instance(agent)
         
-        # Register with orchestral systems
-        self.agents_registry[agent_type] = agent
+        # Register with orchestral systems under the short type name workflow steps use
+        # (instances of one type form a pool for fan-out steps)
+        self.agents_registry.setdefault(agent_type, []).append(agent)
         
         # Register for communication
         if self.communication_protocol:
@@ -147,13 +149,14 @@ class EnhancedAgentCoordinator(AgentCoordinator):
         logger.info(f"Data request received by {agent.agent_id} from {requesting_agent}")
     
     async def execute_orchestral_workflow(self, workflow_id: str, input_data: Dict[str, Any],
-                                        organization_id: str, user_id: Optional[str] = None) -> str:
+                                        organization_id: str, user_id: Optional[str] = None,
+                                        priority: str = "normal") -> str:
         """Execute an orchestral workflow"""
         if not self.workflow_engine:
             raise Exception("Workflow engine not initialized")
         
         execution_id = await self.workflow_engine.execute_workflow(
-            workflow_id, input_data, organization_id, user_id
+            workflow_id, input_data, organization_id, user_id, priority=priority
         )
         
         log_workflow_execution(
@@ -170,6 +173,20 @@ class EnhancedAgentCoordinator(AgentCoordinator):
         
         return self.workflow_engine.get_execution_status(execution_id)
     
+    def get_workflow_trace(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Get the timing trace of a workflow execution"""
+        if not self.workflow_engine:
+            return None
+        
+        return self.workflow_engine.get_execution_trace(execution_id)
+    
+    def get_workflow_step_latency(self) -> Dict[str, Any]:
+        """Get p50/p95 latency per workflow step type"""
+        if not self.workflow_engine:
+            return {}
+        
+        return self.workflow_engine.get_step_latency_stats()
+    
     def list_available_workflows(self) -> List[Dict[str, Any]]:
         """List all available orchestral workflows"""
         if not self.workflow_engine:
@@ -242,7 +259,8 @@ class EnhancedAgentCoordinator(AgentCoordinator):
             status["workflow_engine"] = {
                 "active_executions": len(self.workflow_engine.get_active_executions()),
                 "available_workflows": len(self.workflow_engine.list_workflows()),
-                "execution_history": len(self.workflow_engine.execution_history)
+                "execution_history": len(self.workflow_engine.execution_history),
+                "admission": self.workflow_engine.get_admission_metrics()
             }
         
         # Add communication status
@@ -0,0 +1,237 @@
+"""
+Agent Load Balancer
+Load-aware choice between agent instances from heartbeat metrics, with a circuit breaker per instance
+"""
+
+import time
+import random
+import logging
+from enum import Enum
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+@dataclass
+class AgentLoad:
+    """What the balancer knows about one agent instance's load and health"""
+    max_in_flight: int = 1
+    in_flight: int = 0  # dispatched by this coordinator and not finished
+    reported_in_flight: int = 0  # from heartbeats; includes work the agent got elsewhere
+    queue_depth: int = 0  # from heartbeats
+    ewma_latency: Optional[float] = None  # seconds
+    error_rate: float = 0.0  # EWMA of failures, 0..1
+    samples: int = 0
+    last_report: float = 0.0
+
+    @property
+    def outstanding(self) -> int:
+        # The agent's own report includes our tasks; trust whichever figure is larger
+        return max(self.in_flight, self.reported_in_flight + self.queue_depth)
+
+class CircuitBreaker:
+    """
+    Stops routing to an agent that keeps failing
+
+    Opens after failure_threshold consecutive failures, or when the error rate passes
+    error_rate_threshold once there are min_samples results. After the cooldown it lets
+    a single probe task through (half open); the probe's outcome closes or reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, error_rate_threshold: float = 0.5,
+                 min_samples: int = 10, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow(self, now: float) -> bool:
+        """Whether a task may be routed to the agent now"""
+        if self.state == CircuitState.OPEN and now - self.opened_at >= self.cooldown:
+            self.state = CircuitState.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN:
+            return not self.probe_in_flight
+        return self.state == CircuitState.CLOSED
+
+    def on_dispatch(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self.probe_in_flight = True
+
+    def on_rejected(self):
+        """A dispatched task never ran; a probe that was turned away leaves room for another"""
+        if self.state == CircuitState.HALF_OPEN:
+            self.probe_in_flight = False
+
+    def record_success(self) -> bool:
+        """Returns True if this closed the circuit"""
+        self.consecutive_failures = 0
+        # Only the probe closes it; tasks that were already running when it opened do not
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.CLOSED
+            self.probe_in_flight = False
+            return True
+        return False
+
+    def record_failure(self, load: AgentLoad, now: float) -> bool:
+        """Returns True if this opened the circuit"""
+        self.consecutive_failures += 1
+        if self.state == CircuitState.OPEN:
+            return False
+
+        tripped = (
+            self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+            or (load.samples >= self.min_samples and load.error_rate >= self.error_rate_threshold)
+        )
+        if tripped:
+            self.state = CircuitState.OPEN
+            self.opened_at = now
+            self.probe_in_flight = False
+        return tripped
+
+class AgentLoadBalancer:
+    """
+    Picks the agent instance to run a task
+
+    Each instance is scored by its expected time to finish a new task: outstanding
+    work (in-flight plus reported queue depth, plus the new task) times its EWMA
+    latency. With more than two candidates, two are sampled at random and the lower
+    score wins (power of two choices), which avoids herding every dispatch onto the
+    same instance between heartbeats. Instances at their in-flight limit or with an
+    open circuit are skipped.
+    """
+
+    def __init__(self, ewma_alpha: float = 0.2, default_latency: float = 1.0,
+                 breaker_settings: Optional[Dict[str, Any]] = None):
+        self.ewma_alpha = ewma_alpha
+        self.default_latency = default_latency  # assumed for instances with no samples yet
+        self.breaker_settings = breaker_settings or {}
+
+        self.loads: Dict[str, AgentLoad] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def track(self, agent_id: str, max_in_flight: int = 1):
+        self.loads[agent_id] = AgentLoad(max_in_flight=max(1, max_in_flight))
+        self.breakers[agent_id] = CircuitBreaker(**self.breaker_settings)
+
+    def forget(self, agent_id: str):
+        self.loads.pop(agent_id, None)
+        self.breakers.pop(agent_id, None)
+
+    def record_heartbeat(self, agent_id: str, metrics: Dict[str, Any]):
+        """Take the load an agent reports about itself"""
+        load = self.loads.get(agent_id)
+        if load is None:
+            return
+        load.reported_in_flight = int(metrics.get("in_flight", 0))
+        load.queue_depth = int(metrics.get("queue_depth", 0))
+        # Reported figures only seed the estimates; results observed here refine them
+        if load.samples == 0:
+            if metrics.get("ewma_latency") is not None:
+                load.ewma_latency = float(metrics["ewma_latency"])
+            if metrics.get("error_rate") is not None:
+                load.error_rate = float(metrics["error_rate"])
+        load.last_report = time.monotonic()
+
+    def record_dispatch(self, agent_id: str):
+        load = self.loads.get(agent_id)
+        if load is None:
+            return
+        load.in_flight += 1
+        self.breakers[agent_id].on_dispatch()
+
+    def record_result(self, agent_id: str, latency: float, success: bool) -> Optional[CircuitState]:
+        """Update latency and error estimates; returns the new circuit state if it changed"""
+        load = self.loads.get(agent_id)
+        if load is None:
+            return None
+
+        load.in_flight = max(0, load.in_flight - 1)
+        # The last report likely counted this task; don't hold its slot until the next one
+        load.reported_in_flight = max(0, load.reported_in_flight - 1)
+        load.samples += 1
+        alpha = self.ewma_alpha
+        if success:
+            load.ewma_latency = latency if load.ewma_latency is None else alpha * latency + (1 - alpha) * load.ewma_latency
+        load.error_rate = alpha * (0.0 if success else 1.0) + (1 - alpha) * load.error_rate
+
+        breaker = self.breakers[agent_id]
+        if success:
+            return CircuitState.CLOSED if breaker.record_success() else None
+        return CircuitState.OPEN if breaker.record_failure(load, time.monotonic()) else None
+
+    def record_rejection(self, agent_id: str):
+        """
+        The agent turned a task away because it was busy with other work
+
+        Says nothing about its health, so neither the error rate nor the circuit
+        changes; it is treated as full until its next heartbeat.
+        """
+        load = self.loads.get(agent_id)
+        if load is None:
+            return
+        load.in_flight = max(0, load.in_flight - 1)
+        load.reported_in_flight = max(load.reported_in_flight, load.max_in_flight)
+        self.breakers[agent_id].on_rejected()
+
+    def in_flight(self, agent_id: str) -> int:
+        load = self.loads.get(agent_id)
+        return load.in_flight if load is not None else 0
+
+    def has_capacity(self, agent_id: str) -> bool:
+        load = self.loads.get(agent_id)
+        # Work the agent reports from other callers takes up its slots too
+        return load is not None and max(load.in_flight, load.reported_in_flight) < load.max_in_flight
+
+    def is_routable(self, agent_id: str, now: Optional[float] = None) -> bool:
+        breaker = self.breakers.get(agent_id)
+        if breaker is None or not self.has_capacity(agent_id):
+            return False
+        return breaker.allow(now if now is not None else time.monotonic())
+
+    def score(self, agent_id: str) -> float:
+        """Expected seconds until a task dispatched now would finish"""
+        load = self.loads[agent_id]
+        latency = load.ewma_latency if load.ewma_latency is not None else self.default_latency
+        # Failing instances finish quickly but uselessly; inflate their cost
+        return (load.outstanding + 1) * latency / max(0.05, 1.0 - load.error_rate)
+
+    def choose(self, candidates: List[str]) -> Optional[str]:
+        """Pick an instance among candidate agent ids, or None if none can take a task"""
+        now = time.monotonic()
+        routable = [agent_id for agent_id in candidates if self.is_routable(agent_id, now)]
+        if not routable:
+            return None
+        if len(routable) > 2:
+            routable = random.sample(routable, 2)
+        return min(routable, key=self.score)
+
+    def circuit_state(self, agent_id: str) -> Optional[CircuitState]:
+        breaker = self.breakers.get(agent_id)
+        return breaker.state if breaker is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            agent_id: {
+                "in_flight": load.in_flight,
+                "max_in_flight": load.max_in_flight,
+                "reported_in_flight": load.reported_in_flight,
+                "queue_depth": load.queue_depth,
+                "ewma_latency": round(load.ewma_latency, 4) if load.ewma_latency is not None else None,
+                "error_rate": round(load.error_rate, 4),
+                "samples": load.samples,
+                "circuit": self.breakers[agent_id].state.value
+            }
+            for agent_id, load in self.loads.items()
+        }
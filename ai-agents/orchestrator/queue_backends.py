@@ -0,0 +1,315 @@
+"""
+Task Queue Backends
+Pluggable transport between coordinators that submit tasks and the processes whose agents execute them
+"""
+
+import os
+import json
+import socket
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from orchestrator.task_queue import AgentTaskQueue
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import ResponseError
+except ImportError:  # only needed for the Redis Streams backend
+    aioredis = None
+    ResponseError = Exception
+
+logger = logging.getLogger(__name__)
+
+class TaskQueueBackend(ABC):
+    """
+    Queue of coordinator tasks, consumed per agent type
+
+    A dequeued task is held by this consumer until it is acked (done), requeued
+    (not started) or dead-lettered (failed for good).
+    """
+
+    name = "base"
+    distributed = False  # True when other processes may produce or consume tasks
+    poll_interval = 5.0  # seconds the dispatcher may sleep without a local wakeup
+    visibility_timeout: Optional[float] = None  # seconds a dequeued task stays hidden without touch()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def enqueue(self, task):
+        """Add a task to its agent type's queue"""
+
+    def enqueue_nowait(self, task):
+        """Enqueue from synchronous code; the write completes in the background"""
+        future = asyncio.get_running_loop().create_task(self.enqueue(task))
+        future.add_done_callback(self._log_enqueue_failure)
+
+    def _log_enqueue_failure(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Failed to enqueue task: {future.exception()}")
+
+    @abstractmethod
+    async def dequeue(self, agent_type: str):
+        """Take the next task for an agent type, or None when there is nothing to do"""
+
+    @abstractmethod
+    async def ack(self, task):
+        """The task has been handled and can be forgotten"""
+
+    async def requeue(self, task):
+        """Give a dequeued task back without running it"""
+        # Enqueue before acking so a crash in between cannot lose the task
+        await self.enqueue(task)
+        await self.ack(task)
+
+    async def touch(self, task) -> bool:
+        """Restart the visibility timeout of a task still being worked on; False once it was lost to another consumer"""
+        return True
+
+    @abstractmethod
+    async def dead_letter(self, task, error: str):
+        """Park a task that exhausted its retries"""
+
+    def list_pending(self, offset: int = 0, limit: Optional[int] = None) -> Optional[List[Any]]:
+        """Waiting tasks in dispatch order, one page of them; None when the backend cannot list them"""
+        return None
+
+    async def publish_result(self, reply_to: str, result: Dict[str, Any]):
+        """Send a task outcome to the coordinator that submitted it"""
+
+    async def read_results(self, timeout: float = 1.0) -> List[Dict[str, Any]]:
+        """Outcomes of tasks this coordinator submitted and another process executed"""
+        return []
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for status reporting"""
+
+class InMemoryQueueBackend(TaskQueueBackend):
+    """Single-process backend over the local deadline heaps"""
+
+    name = "memory"
+
+    def __init__(self, queue: Optional[AgentTaskQueue] = None):
+        self.queue = queue if queue is not None else AgentTaskQueue()
+        self.consumer_name = "local"
+        self.dead_lettered = 0
+
+    async def enqueue(self, task):
+        self.queue.push(task)
+
+    def enqueue_nowait(self, task):
+        self.queue.push(task)
+
+    async def dequeue(self, agent_type: str):
+        return self.queue.pop(agent_type)
+
+    async def ack(self, task):
+        pass
+
+    async def requeue(self, task):
+        self.queue.push(task)
+
+    async def dead_letter(self, task, error: str):
+        self.dead_lettered += 1
+
+    def list_pending(self, offset: int = 0, limit: Optional[int] = None) -> Optional[List[Any]]:
+        return self.queue.ordered(offset, limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "pending": len(self.queue),
+            "pending_by_agent_type": self.queue.depth_by_agent_type(),
+            "dead_lettered": self.dead_lettered
+        }
+
+class RedisStreamsQueueBackend(TaskQueueBackend):
+    """
+    Redis Streams backend shared by any number of coordinator processes
+
+    Each (agent type, priority) pair is a stream read by a consumer group named after
+    the agent type, so every task goes to exactly one consumer. Streams are read from
+    the highest priority down. Entries a consumer has not acked within the visibility
+    timeout are claimed by the next consumer to poll; after max_deliveries attempts
+    they are moved to the dead-letter stream. Task outcomes go back to the submitting
+    coordinator over its own results stream.
+    """
+
+    name = "redis"
+    distributed = True
+    poll_interval = 0.5
+
+    def __init__(self, redis_url: str, encode: Callable[[Any], Dict[str, Any]],
+                 decode: Callable[[Dict[str, Any]], Any], prefix: str = "ai_agents",
+                 consumer_name: Optional[str] = None, visibility_timeout: int = 300,
+                 max_deliveries: int = 5, priorities: Tuple[int, ...] = (4, 3, 2, 1),
+                 client: Optional[Any] = None):
+        if client is None and aioredis is None:
+            raise ImportError("The redis package is required for the Redis Streams task queue backend")
+
+        # `client` lets tests pass a fakeredis instance
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.encode = encode
+        self.decode = decode
+        self.prefix = prefix
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.visibility_timeout = visibility_timeout
+        self.visibility_timeout_ms = int(visibility_timeout * 1000)
+        self.max_deliveries = max_deliveries
+        self.priorities = priorities
+
+        self.dead_letter_stream = f"{prefix}:tasks:dead_letter"
+        self.results_stream = f"{prefix}:results:{self.consumer_name}"
+        self._results_cursor = "0"
+        self._groups_ready = set()
+        self.stats = {"enqueued": 0, "dequeued": 0, "acked": 0, "redelivered": 0, "dead_lettered": 0, "lost": 0}
+
+    async def stop(self):
+        try:
+            await self.client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Redis task queue connection: {e}")
+
+    def _stream(self, agent_type: str, priority: int) -> str:
+        return f"{self.prefix}:tasks:{agent_type}:{priority}"
+
+    async def _ensure_group(self, stream: str, group: str):
+        if (stream, group) in self._groups_ready:
+            return
+        try:
+            await self.client.xgroup_create(stream, group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups_ready.add((stream, group))
+
+    async def enqueue(self, task):
+        stream = self._stream(task.agent_type, task.priority.value)
+        await self._ensure_group(stream, task.agent_type)
+        await self.client.xadd(stream, {"task": json.dumps(self.encode(task), default=str)})
+        self.stats["enqueued"] += 1
+
+    async def dequeue(self, agent_type: str):
+        for priority in self.priorities:
+            stream = self._stream(agent_type, priority)
+            await self._ensure_group(stream, agent_type)
+
+            task = await self._claim_expired(stream, agent_type)
+            if task is not None:
+                return task
+
+            entries = await self.client.xreadgroup(agent_type, self.consumer_name, {stream: ">"}, count=1)
+            for _, messages in entries or []:
+                for entry_id, fields in messages:
+                    self.stats["dequeued"] += 1
+                    return self._decode_entry(stream, agent_type, entry_id, fields)
+        return None
+
+    async def _claim_expired(self, stream: str, group: str):
+        """Take over an entry whose consumer exceeded the visibility timeout"""
+        pending = await self.client.xpending_range(
+            stream, group, min="-", max="+", count=10, idle=self.visibility_timeout_ms
+        )
+        for entry in pending:
+            entry_id = entry["message_id"]
+            claimed = await self.client.xclaim(
+                stream, group, self.consumer_name, min_idle_time=self.visibility_timeout_ms, message_ids=[entry_id]
+            )
+            if not claimed:
+                continue  # another consumer got there first
+
+            _, fields = claimed[0]
+            if not fields:
+                await self.client.xack(stream, group, entry_id)  # entry was trimmed
+                continue
+
+            if entry["times_delivered"] >= self.max_deliveries:
+                error = f"not acked after {entry['times_delivered']} deliveries"
+                await self._move_to_dead_letter(stream, group, entry_id, fields["task"], error)
+                # No consumer settled it, so nobody else tells the submitter
+                payload = json.loads(fields["task"])
+                if payload.get("reply_to"):
+                    await self.publish_result(payload["reply_to"], {
+                        "task_id": payload["id"],
+                        "success": False,
+                        "result": None,
+                        "error": f"Task dead-lettered: {error}"
+                    })
+                continue
+
+            self.stats["redelivered"] += 1
+            return self._decode_entry(stream, group, entry_id, fields)
+        return None
+
+    def _decode_entry(self, stream: str, group: str, entry_id: str, fields: Dict[str, str]):
+        task = self.decode(json.loads(fields["task"]))
+        task.receipt = (stream, group, entry_id)
+        return task
+
+    async def touch(self, task) -> bool:
+        if not task.receipt:
+            return True
+        stream, group, entry_id = task.receipt
+        pending = await self.client.xpending_range(stream, group, min=entry_id, max=entry_id, count=1)
+        if not pending or pending[0]["consumer"] != self.consumer_name:
+            self.stats["lost"] += 1
+            return False
+        # Claiming our own entry resets its idle time, so no other consumer takes it over
+        await self.client.xclaim(stream, group, self.consumer_name, min_idle_time=0,
+                                 message_ids=[entry_id], justid=True)
+        return True
+
+    async def ack(self, task):
+        if not task.receipt:
+            return
+        stream, group, entry_id = task.receipt
+        await self.client.xack(stream, group, entry_id)
+        await self.client.xdel(stream, entry_id)
+        task.receipt = None
+        self.stats["acked"] += 1
+
+    async def dead_letter(self, task, error: str):
+        if not task.receipt:
+            return
+        stream, group, entry_id = task.receipt
+        await self._move_to_dead_letter(stream, group, entry_id, json.dumps(self.encode(task), default=str), error)
+        task.receipt = None
+
+    async def _move_to_dead_letter(self, stream: str, group: str, entry_id: str, payload: str, error: str):
+        await self.client.xadd(self.dead_letter_stream, {"task": payload, "error": error, "source": stream})
+        await self.client.xack(stream, group, entry_id)
+        await self.client.xdel(stream, entry_id)
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Task entry {entry_id} from {stream} moved to dead letter: {error}")
+
+    async def publish_result(self, reply_to: str, result: Dict[str, Any]):
+        # Results streams are capped; a coordinator only cares about recent outcomes
+        await self.client.xadd(
+            f"{self.prefix}:results:{reply_to}", {"result": json.dumps(result, default=str)},
+            maxlen=10000, approximate=True
+        )
+
+    async def read_results(self, timeout: float = 1.0) -> List[Dict[str, Any]]:
+        entries = await self.client.xread(
+            {self.results_stream: self._results_cursor}, count=100, block=int(timeout * 1000)
+        )
+        results = []
+        for _, messages in entries or []:
+            for entry_id, fields in messages:
+                self._results_cursor = entry_id
+                results.append(json.loads(fields["result"]))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "consumer": self.consumer_name,
+            **self.stats
+        }
@@ -0,0 +1,76 @@
+"""
+Agent Task Queue
+Per-agent-type priority queues ordered by effective deadline, so one busy agent type never blocks the others
+"""
+
+import heapq
+import itertools
+import logging
+from typing import Dict, List, Any, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Seconds a task may wait before it is due, by TaskPriority value (LOW=1 ... URGENT=4).
+# A task's effective deadline is min(deadline, created_at + slack): higher priorities are
+# due sooner, and a waiting low priority task eventually becomes due before newer high
+# priority work, so nothing starves.
+PRIORITY_SLACK_SECONDS = {
+    4: 0,
+    3: 60,
+    2: 300,
+    1: 900
+}
+
+def effective_deadline(task) -> float:
+    """Timestamp by which the task should be dispatched"""
+    slack = PRIORITY_SLACK_SECONDS.get(task.priority.value, PRIORITY_SLACK_SECONDS[2])
+    due = task.created_at.timestamp() + slack
+    if task.deadline is not None:
+        due = min(due, task.deadline.timestamp())
+    return due
+
+class AgentTaskQueue:
+    """Earliest-effective-deadline heaps, one per agent type"""
+
+    def __init__(self):
+        self._heaps: Dict[str, List] = {}
+        self._sequence = itertools.count()
+        self._size = 0
+
+    def push(self, task):
+        """Queue a task (O(log n))"""
+        heap = self._heaps.setdefault(task.agent_type, [])
+        heapq.heappush(heap, (effective_deadline(task), next(self._sequence), task))
+        self._size += 1
+
+    def pop(self, agent_type: str):
+        """Remove and return the most urgent task for an agent type, or None"""
+        heap = self._heaps.get(agent_type)
+        if not heap:
+            return None
+        _, _, task = heapq.heappop(heap)
+        self._size -= 1
+        if not heap:
+            del self._heaps[agent_type]
+        return task
+
+    def depth_by_agent_type(self) -> Dict[str, int]:
+        return {agent_type: len(heap) for agent_type, heap in self._heaps.items()}
+
+    def ordered(self, offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+        """Waiting tasks in dispatch order (for status reporting), optionally one page of them"""
+        entries = itertools.chain.from_iterable(self._heaps.values())
+        if limit is None:
+            selected = sorted(entries)
+        else:
+            selected = heapq.nsmallest(offset + limit, entries)
+        return [task for _, _, task in selected[offset:]]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.ordered())
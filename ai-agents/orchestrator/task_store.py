@@ -0,0 +1,81 @@
+"""
+Task Result Store
+Finished coordinator tasks kept in time buckets, so retention is enforced by dropping whole buckets
+"""
+
+import logging
+from typing import Dict, Any, Optional, Iterator
+from datetime import datetime, timedelta
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class TaskResultStore:
+    """
+    Finished tasks bucketed by finish time, with an id index
+
+    Buckets are appended in time order, so expiring old results pops buckets off the
+    left of a deque without scanning the tasks that are kept. max_tasks bounds memory
+    under bursts that would otherwise fill a whole retention window.
+    """
+
+    def __init__(self, retention: timedelta = timedelta(hours=24), bucket_seconds: int = 300,
+                 max_tasks: Optional[int] = None):
+        self.retention = retention
+        self.bucket_seconds = bucket_seconds
+        self.max_tasks = max_tasks
+
+        self._buckets: deque = deque()  # (bucket_start_ts, deque of tasks)
+        self._index: Dict[str, Any] = {}
+        self.total_added = 0
+        self.total_evicted = 0
+
+    def add(self, task, finished_at: Optional[datetime] = None):
+        """Store a finished task"""
+        timestamp = (finished_at or datetime.now()).timestamp()
+        bucket_start = timestamp - timestamp % self.bucket_seconds
+
+        if not self._buckets or self._buckets[-1][0] < bucket_start:
+            self._buckets.append((bucket_start, deque()))
+        self._buckets[-1][1].append(task)  # late finishers share the newest bucket
+
+        self._index[task.id] = task
+        self.total_added += 1
+
+        self.evict_expired()
+        if self.max_tasks is not None:
+            while len(self._index) > self.max_tasks:
+                self._evict_oldest_task()
+
+    def get(self, task_id: str):
+        return self._index.get(task_id)
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Drop every bucket that ended before the retention window"""
+        cutoff = (now or datetime.now()).timestamp() - self.retention.total_seconds()
+        evicted = 0
+        while self._buckets and self._buckets[0][0] + self.bucket_seconds <= cutoff:
+            _, tasks = self._buckets.popleft()
+            for task in tasks:
+                self._index.pop(task.id, None)
+            evicted += len(tasks)
+        self.total_evicted += evicted
+        return evicted
+
+    def _evict_oldest_task(self):
+        _, tasks = self._buckets[0]
+        task = tasks.popleft()
+        self._index.pop(task.id, None)
+        self.total_evicted += 1
+        if not tasks:
+            self._buckets.popleft()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, tasks in self._buckets:
+            yield from tasks
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._index
@@ -0,0 +1,392 @@
+"""
+Agent Worker Pool
+Runs agents in supervised worker processes so CPU-heavy agent work scales across cores
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+import importlib
+import threading
+import multiprocessing
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from dataclasses import dataclass, field, asdict
+
+logger = logging.getLogger(__name__)
+
+# Agent classes by short agent type, imported inside the worker process
+AGENT_CLASSES = {
+    "intelligence": "agents.intelligence.intelligence_agent:IntelligenceAgent",
+    "strategy": "agents.strategy.strategy_agent:StrategyAgent",
+    "content": "agents.content.content_agent:ContentAgent",
+    "execution": "agents.execution.execution_agent:ExecutionAgent",
+    "learning": "agents.learning.learning_agent:LearningAgent",
+    "engagement": "agents.engagement.engagement_agent:EngagementAgent",
+    "analytics": "agents.analytics.analytics_agent:AnalyticsAgent"
+}
+
+class WorkerCrashedError(Exception):
+    """Raised for tasks that were running on a worker process that died"""
+
+@dataclass
+class WorkerSpec:
+    """What a group of worker processes runs"""
+    agent_type: str
+    organization_id: str
+    processes: int = 1
+    agent_class: Optional[str] = None  # "module:Class"; defaults to AGENT_CLASSES[agent_type]
+
+    def resolve_agent_class(self) -> str:
+        return self.agent_class or AGENT_CLASSES[self.agent_type]
+
+@dataclass
+class WorkerHandle:
+    """Supervisor-side state of one worker process"""
+    worker_id: str
+    spec: WorkerSpec
+    process: Any = None
+    inbox: Any = None
+    ready: bool = False
+    started_at: float = 0.0
+    last_heartbeat: float = 0.0
+    restarts: int = 0
+    restart_at: float = 0.0
+    in_flight: Dict[str, asyncio.Future] = field(default_factory=dict)
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+def _import_agent_class(path: str):
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def _worker_main(worker_id: str, spec: WorkerSpec, inbox, outbox, heartbeat_interval: float):
+    """Entry point of a worker process"""
+    try:
+        asyncio.run(_worker_loop(worker_id, spec, inbox, outbox, heartbeat_interval))
+    except KeyboardInterrupt:
+        pass
+
+async def _worker_loop(worker_id: str, spec: WorkerSpec, inbox, outbox, heartbeat_interval: float):
+    from agents.base_agent import AgentTask, serialize_agent_response
+
+    agent = _import_agent_class(spec.resolve_agent_class())(organization_id=spec.organization_id)
+    await agent.start()
+
+    loop = asyncio.get_running_loop()
+    state = {"in_flight": 0, "tasks_completed": 0, "tasks_failed": 0}
+    stop_heartbeats = threading.Event()
+
+    def heartbeat():
+        # Runs on its own thread: CPU-bound agent work holds the event loop for long
+        # stretches, and a silent worker would be taken for hung and terminated
+        while not stop_heartbeats.is_set():
+            outbox.put(("heartbeat", worker_id, {"pid": os.getpid(), **state}))
+            stop_heartbeats.wait(heartbeat_interval)
+
+    outbox.put(("ready", worker_id, {"pid": os.getpid()}))
+    heartbeat_thread = threading.Thread(target=heartbeat, name=f"{worker_id}-heartbeat", daemon=True)
+    heartbeat_thread.start()
+
+    try:
+        while True:
+            message = await loop.run_in_executor(None, inbox.get)
+            if message is None:
+                break  # drain: everything sent before the sentinel has been handled
+
+            request_id, payload = message
+            state["in_flight"] = 1
+            try:
+                for key in ("created_at", "deadline"):
+                    if payload.get(key):
+                        payload[key] = datetime.fromisoformat(payload[key])
+                response = await agent.execute_task(AgentTask(**payload))
+                outbox.put(("result", worker_id, {"request_id": request_id, "response": serialize_agent_response(response)}))
+                state["tasks_completed"] += 1
+            except Exception as e:
+                outbox.put(("result", worker_id, {"request_id": request_id, "error": str(e)}))
+                state["tasks_failed"] += 1
+            finally:
+                state["in_flight"] = 0
+    finally:
+        stop_heartbeats.set()
+        heartbeat_thread.join(timeout=heartbeat_interval)
+        await agent.stop()
+        outbox.put(("stopped", worker_id, None))
+
+class WorkerAgentProxy:
+    """Stands in for an agent that lives in a worker process, so the coordinator can dispatch to it like a BaseAgent"""
+
+    # One task running in the worker and one waiting in its inbox, so the worker
+    # never idles on the round trip to the coordinator
+    max_in_flight = 2
+
+    def __init__(self, supervisor: "WorkerSupervisor", worker_id: str, spec: WorkerSpec):
+        self.supervisor = supervisor
+        self.agent_id = worker_id
+        self.agent_type = spec.agent_type
+        self.organization_id = spec.organization_id
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.supervisor.is_ready(self.agent_id)
+
+    @property
+    def is_busy(self) -> bool:
+        return self.supervisor.is_busy(self.agent_id)
+
+    def get_load_metrics(self) -> Dict[str, Any]:
+        return self.supervisor.get_load(self.agent_id)
+
+    def get_capabilities(self) -> Dict[str, Any]:
+        return {
+            "agent_type": self.agent_type,
+            "organization_id": self.organization_id,
+            "capabilities": [],
+            "is_initialized": self.is_initialized,
+            "is_busy": self.is_busy,
+            "worker_process": True
+        }
+
+    async def execute_task(self, task):
+        from agents.base_agent import AgentResponse
+
+        payload = asdict(task)
+        for key in ("created_at", "deadline"):
+            if payload.get(key):
+                payload[key] = payload[key].isoformat()
+
+        response = await self.supervisor.submit(self.agent_id, payload)
+        return AgentResponse(**response)
+
+class WorkerSupervisor:
+    """
+    Spawns and supervises agent worker processes
+
+    Every worker runs one agent in its own event loop and takes one task at a time
+    from its inbox. Outcomes and heartbeats come back on a shared outbox read by a
+    thread that hands them to the supervisor's loop. Workers that exit or stop
+    sending heartbeats are restarted with exponential backoff, and their in-flight
+    tasks fail with WorkerCrashedError so the caller's retry logic takes over.
+    """
+
+    def __init__(self, specs: List[WorkerSpec], heartbeat_interval: float = 5.0,
+                 heartbeat_timeout: float = 30.0, restart_backoff: float = 1.0,
+                 max_restart_delay: float = 60.0, task_timeout: float = 600.0):
+        self.specs = specs
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_backoff = restart_backoff
+        self.max_restart_delay = max_restart_delay
+        self.task_timeout = task_timeout
+
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: Dict[str, WorkerHandle] = {}
+        self.running = False
+        self.draining = False
+        self._outbox = None
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        for spec in specs:
+            for index in range(spec.processes):
+                worker_id = f"{spec.agent_type}_{spec.organization_id}_worker{index}"
+                self.workers[worker_id] = WorkerHandle(worker_id=worker_id, spec=spec)
+
+    async def start(self):
+        """Spawn every worker and start supervising"""
+        self._loop = asyncio.get_running_loop()
+        self._outbox = self.context.Queue()
+        self.running = True
+        self.draining = False
+
+        self._reader = threading.Thread(target=self._read_outbox, name="worker-outbox-reader", daemon=True)
+        self._reader.start()
+
+        for worker in self.workers.values():
+            self._spawn(worker)
+
+        asyncio.create_task(self._supervise())
+        logger.info(f"Worker supervisor started {len(self.workers)} worker processes")
+
+    def proxies(self) -> List[WorkerAgentProxy]:
+        """Agent stand-ins to register with the coordinator, one per worker process"""
+        return [WorkerAgentProxy(self, worker.worker_id, worker.spec) for worker in self.workers.values()]
+
+    def is_ready(self, worker_id: str) -> bool:
+        worker = self.workers.get(worker_id)
+        return bool(worker and worker.ready and not self.draining)
+
+    def is_busy(self, worker_id: str) -> bool:
+        worker = self.workers.get(worker_id)
+        return bool(worker and worker.in_flight)
+
+    async def submit(self, worker_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task on a worker process and return the serialized AgentResponse"""
+        if self.draining or not self.running:
+            raise RuntimeError("Worker pool is not accepting tasks")
+
+        worker = self.workers[worker_id]
+        if worker.process is None or not worker.process.is_alive():
+            raise WorkerCrashedError(f"Worker {worker_id} is not running")
+
+        request_id = str(uuid.uuid4())
+        future = self._loop.create_future()
+        worker.in_flight[request_id] = future
+        worker.inbox.put((request_id, payload))
+
+        try:
+            outcome = await asyncio.wait_for(future, timeout=self.task_timeout)
+        finally:
+            worker.in_flight.pop(request_id, None)
+
+        if "error" in outcome:
+            raise RuntimeError(outcome["error"])
+        return outcome["response"]
+
+    async def drain(self, timeout: float = 30.0):
+        """Stop taking tasks, let workers finish what they hold, then shut them down"""
+        self.draining = True
+        logger.info("Draining worker processes...")
+
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive():
+                worker.inbox.put(None)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(
+            worker.process is not None and worker.process.is_alive() for worker in self.workers.values()
+        ):
+            await asyncio.sleep(0.1)
+
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive():
+                logger.warning(f"Worker {worker.worker_id} did not drain in time, terminating")
+                worker.process.terminate()
+                worker.process.join(timeout=5)
+            self._fail_in_flight(worker, "Worker pool shut down")
+
+        self.running = False
+        self._outbox.put(None)  # stops the reader thread
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+        logger.info("Worker processes stopped")
+
+    def get_load(self, worker_id: str) -> Dict[str, Any]:
+        """A worker's load as of its last heartbeat plus what is queued in its inbox"""
+        worker = self.workers[worker_id]
+        running = worker.stats.get("in_flight", 0)
+        completed = worker.stats.get("tasks_completed", 0)
+        failed = worker.stats.get("tasks_failed", 0)
+        return {
+            "in_flight": running,
+            "queue_depth": max(0, len(worker.in_flight) - running),
+            "error_rate": failed / (completed + failed) if completed + failed else 0.0
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "draining": self.draining,
+            "workers": {
+                worker.worker_id: {
+                    "agent_type": worker.spec.agent_type,
+                    "pid": worker.process.pid if worker.process is not None else None,
+                    "alive": worker.process is not None and worker.process.is_alive(),
+                    "ready": worker.ready,
+                    "in_flight": len(worker.in_flight),
+                    "restarts": worker.restarts,
+                    "seconds_since_heartbeat": round(now - worker.last_heartbeat, 1) if worker.last_heartbeat else None,
+                    **worker.stats
+                }
+                for worker in self.workers.values()
+            }
+        }
+
+    def _spawn(self, worker: WorkerHandle):
+        worker.inbox = self.context.Queue()
+        worker.ready = False
+        worker.started_at = worker.last_heartbeat = time.monotonic()
+        worker.process = self.context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.spec, worker.inbox, self._outbox, self.heartbeat_interval),
+            name=worker.worker_id,
+            daemon=True
+        )
+        worker.process.start()
+        logger.info(f"Spawned worker {worker.worker_id} (pid {worker.process.pid})")
+
+    def _read_outbox(self):
+        """Reader thread: forward worker messages to the event loop"""
+        while True:
+            try:
+                message = self._outbox.get()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            self._loop.call_soon_threadsafe(self._handle_message, message)
+
+    def _handle_message(self, message):
+        kind, worker_id, data = message
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            return
+
+        worker.last_heartbeat = time.monotonic()
+
+        if kind == "ready":
+            worker.ready = True
+            logger.info(f"Worker {worker_id} ready")
+        elif kind == "heartbeat":
+            worker.stats = data
+            # A worker that stayed up for a while has recovered; reset its backoff
+            if worker.restarts and worker.last_heartbeat - worker.started_at > self.max_restart_delay:
+                worker.restarts = 0
+        elif kind == "result":
+            future = worker.in_flight.get(data["request_id"])
+            if future is not None and not future.done():
+                future.set_result(data)
+        elif kind == "stopped":
+            worker.ready = False
+
+    async def _supervise(self):
+        """Restart workers that died or stopped sending heartbeats"""
+        while self.running:
+            try:
+                if not self.draining:
+                    now = time.monotonic()
+                    for worker in self.workers.values():
+                        alive = worker.process is not None and worker.process.is_alive()
+
+                        if alive and now - worker.last_heartbeat > self.heartbeat_timeout:
+                            logger.error(f"Worker {worker.worker_id} missed heartbeats, terminating")
+                            worker.process.terminate()
+                            alive = False
+
+                        if not alive:
+                            if worker.restart_at == 0.0:
+                                exitcode = worker.process.exitcode if worker.process is not None else None
+                                logger.error(f"Worker {worker.worker_id} exited (code {exitcode})")
+                                worker.ready = False
+                                self._fail_in_flight(worker, f"Worker {worker.worker_id} crashed")
+                                delay = min(self.max_restart_delay, self.restart_backoff * (2 ** worker.restarts))
+                                worker.restart_at = now + delay
+                            elif now >= worker.restart_at:
+                                worker.restarts += 1
+                                worker.restart_at = 0.0
+                                self._spawn(worker)
+
+                await asyncio.sleep(min(1.0, self.heartbeat_interval))
+
+            except Exception as e:
+                logger.error(f"Error supervising worker processes: {e}")
+                await asyncio.sleep(1)
+
+    def _fail_in_flight(self, worker: WorkerHandle, reason: str):
+        for future in worker.in_flight.values():
+            if not future.done():
+                future.set_exception(WorkerCrashedError(reason))
+        worker.in_flight.clear()
@@ -6,19 +6,31 @@ Coordinates multi-agent workflows with real data flow and task handoffs
 import asyncio
 import logging
 import json
+import time
 import uuid
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict, field
+from contextlib import asynccontextmanager
 from enum import Enum
 import copy
+from pathlib import Path
 
-from agents.base_agent import BaseAgent, AgentTask, AgentResponse, create_agent_task
+from agents.base_agent import BaseAgent, AgentTask, AgentResponse, AgentBusyError, create_agent_task
+from config.settings import settings
 from memory.chroma_manager import chroma_manager
+from orchestrator.admission_control import AdmissionController
+from orchestrator.workflow_tracing import WorkflowTracer
+from orchestrator.workflow_loader import (
+    StepMappingPlan, PathAccessor, WorkflowDefinitionError, WorkflowFileWatcher,
+    compile_step_plan, read_workflow_document, validate_workflow
+)
 from utils.logger import get_agent_logger, log_workflow_execution
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_WORKFLOWS_DIR = Path(__file__).resolve().parent.parent / "workflows"
+
 class WorkflowStatus(Enum):
     PENDING = "pending"
     RUNNING = "running" 
@@ -33,6 +45,7 @@ class StepStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     SKIPPED = "skipped"
+    CANCELLED = "cancelled"
 
 @dataclass
 class WorkflowStep:
@@ -44,11 +57,15 @@ class WorkflowStep:
     output_mapping: Dict[str, str]  # Maps agent output to workflow data
     dependencies: List[str] = field(default_factory=list)
     condition: Optional[str] = None  # Conditional execution
+    map_over: Optional[str] = None  # Workflow data path of a list to fan out over
+    map_item_key: str = "item"  # Agent input key that receives each list element
+    max_concurrency: int = 3  # Parallel agent calls for map steps
     timeout: int = 300  # 5 minutes default
     retry_count: int = 0
     max_retries: int = 2
     status: StepStatus = StepStatus.PENDING
     agent_task_id: Optional[str] = None
+    agent_task_ids: List[Optional[str]] = field(default_factory=list)  # per item, for map steps
     result: Optional[Any] = None
     error: Optional[str] = None
     started_at: Optional[datetime] = None
@@ -77,6 +94,9 @@ class WorkflowExecution:
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
     current_step_index: int = 0
+    priority: str = "normal"
+    mapping_plans: Dict[str, StepMappingPlan] = field(default_factory=dict)
+    trace_span_id: Optional[str] = None
 
 class WorkflowDefinition:
     """Defines an orchestral workflow template"""
@@ -90,353 +110,114 @@ class WorkflowDefinition:
         self.steps = steps
         self.input_schema = input_schema
         self.output_schema = output_schema
+        
+        # Compile mappings once; executions share the immutable plans
+        self.mapping_plans: Dict[str, StepMappingPlan] = {
+            step.id: compile_step_plan(step) for step in steps
+        }
+        validate_workflow(workflow_id, steps, input_schema, self.mapping_plans)
 
 class WorkflowEngine:
     """Orchestral Workflow Engine for coordinating multi-agent tasks"""
     
-    def __init__(self, agent_registry: Dict[str, BaseAgent]):
+    def __init__(self, agent_registry: Dict[str, Union[BaseAgent, List[BaseAgent]]],
+                 workflows_dir: Optional[Path] = None, reload_interval: int = 10,
+                 admission: Optional[AdmissionController] = None):
         self.agent_registry = agent_registry
         self.workflow_definitions: Dict[str, WorkflowDefinition] = {}
         self.active_executions: Dict[str, WorkflowExecution] = {}
         self.execution_history: List[WorkflowExecution] = []
         self.running = False
         
-        # Initialize built-in workflows
-        self._register_builtin_workflows()
+        # Agent instances held by steps, and an event set (then replaced) whenever one is released
+        self._reserved_agents: set = set()
+        self._agent_released = asyncio.Event()
+        
+        # Span per execution and per step for latency breakdowns
+        self.tracer = WorkflowTracer()
+        
+        # Task handles of running executions, so cancellation reaches in-flight agent calls
+        self._execution_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Global/per-org concurrency caps with a fair queue in front of execution
+        self.admission = admission or AdmissionController(
+            max_concurrent=settings.max_concurrent_workflows,
+            max_per_org=settings.max_concurrent_workflows_per_org,
+            max_queue_depth=settings.workflow_queue_max_depth
+        )
+        
+        # Workflow definitions are loaded from files and hot-reloaded while running
+        self.reload_interval = reload_interval
+        self._workflow_watcher = WorkflowFileWatcher(workflows_dir or DEFAULT_WORKFLOWS_DIR)
+        self._workflow_files: Dict[Path, str] = {}
+        self.load_workflows()
         
         logger.info("Workflow Engine initialized")
     
-    def _register_builtin_workflows(self):
-        """Register built-in orchestral workflows"""
-        
-        # Complete Strategy Generation Workflow
-        strategy_workflow = WorkflowDefinition(
-            workflow_id="complete_strategy_generation",
-            name="Complete Strategy Generation",
-            description="Full orchestral workflow involving all agents for comprehensive strategy creation",
-            steps=[
-                WorkflowStep(
-                    id="intelligence_analysis",
-                    agent_type="intelligence",
-                    task_type="market_intelligence",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "target_audience": "target_audience",
-                        "platforms": "platforms",
-                        "objectives": "objectives",
-                        "industry": "industry"
-                    },
-                    output_mapping={
-                        "market_insights": "intelligence.market_insights",
-                        "competitor_analysis": "intelligence.competitor_analysis", 
-                        "audience_insights": "intelligence.audience_insights",
-                        "trend_analysis": "intelligence.trend_analysis"
-                    }
-                ),
-                WorkflowStep(
-                    id="analytics_framework",
-                    agent_type="analytics", 
-                    task_type="kpi_framework",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "objectives": "objectives",
-                        "platforms": "platforms",
-                        "market_insights": "intelligence.market_insights"
-                    },
-                    output_mapping={
-                        "kpi_framework": "analytics.kpi_framework",
-                        "measurement_plan": "analytics.measurement_plan",
-                        "baseline_metrics": "analytics.baseline_metrics"
-                    },
-                    dependencies=["intelligence_analysis"]
-                ),
-                WorkflowStep(
-                    id="content_strategy",
-                    agent_type="content",
-                    task_type="content_planning",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platforms": "platforms",
-                        "objectives": "objectives",
-                        "audience_insights": "intelligence.audience_insights",
-                        "competitor_analysis": "intelligence.competitor_analysis"
-                    },
-                    output_mapping={
-                        "content_pillars": "content.content_pillars",
-                        "content_calendar": "content.content_calendar",
-                        "content_guidelines": "content.content_guidelines"
-                    },
-                    dependencies=["intelligence_analysis"]
-                ),
-                WorkflowStep(
-                    id="engagement_strategy", 
-                    agent_type="engagement",
-                    task_type="engagement_planning",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platforms": "platforms",
-                        "audience_insights": "intelligence.audience_insights",
-                        "content_pillars": "content.content_pillars"
-                    },
-                    output_mapping={
-                        "engagement_tactics": "engagement.engagement_tactics",
-                        "community_guidelines": "engagement.community_guidelines",
-                        "response_templates": "engagement.response_templates"
-                    },
-                    dependencies=["intelligence_analysis", "content_strategy"]
-                ),
-                WorkflowStep(
-                    id="learning_optimization",
-                    agent_type="learning",
-                    task_type="optimization_planning",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "kpi_framework": "analytics.kpi_framework",
-                        "content_calendar": "content.content_calendar"
-                    },
-                    output_mapping={
-                        "ab_test_plan": "learning.ab_test_plan",
-                        "optimization_schedule": "learning.optimization_schedule",
-                        "learning_metrics": "learning.learning_metrics"
-                    },
-                    dependencies=["analytics_framework", "content_strategy"]
-                ),
-                WorkflowStep(
-                    id="execution_planning",
-                    agent_type="execution", 
-                    task_type="publishing_strategy",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platforms": "platforms",
-                        "content_calendar": "content.content_calendar",
-                        "engagement_tactics": "engagement.engagement_tactics"
-                    },
-                    output_mapping={
-                        "publishing_schedule": "execution.publishing_schedule",
-                        "automation_rules": "execution.automation_rules",
-                        "quality_gates": "execution.quality_gates"
-                    },
-                    dependencies=["content_strategy", "engagement_strategy"]
-                ),
-                WorkflowStep(
-                    id="strategy_synthesis",
-                    agent_type="strategy",
-                    task_type="strategy_synthesis",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "intelligence_data": "intelligence",
-                        "analytics_data": "analytics", 
-                        "content_data": "content",
-                        "engagement_data": "engagement",
-                        "learning_data": "learning",
-                        "execution_data": "execution"
-                    },
-                    output_mapping={
-                        "final_strategy": "strategy.final_strategy"
-                    },
-                    dependencies=["intelligence_analysis", "analytics_framework", "content_strategy", 
-                                "engagement_strategy", "learning_optimization", "execution_planning"]
-                )
-            ],
-            input_schema={
-                "organization_id": {"type": "string", "required": True},
-                "user_id": {"type": "string", "required": False},
-                "objectives": {"type": "array", "required": True},
-                "platforms": {"type": "array", "required": True},
-                "target_audience": {"type": "string", "required": True},
-                "timeframe": {"type": "string", "required": False, "default": "30d"},
-                "industry": {"type": "string", "required": False}
-            },
-            output_schema={
-                "strategy": {"type": "object"},
-                "execution_plan": {"type": "object"},
-                "monitoring_framework": {"type": "object"}
-            }
-        )
+    def load_workflows(self) -> int:
+        """Load new or changed workflow files and drop definitions whose file was removed"""
+        changed, removed = self._workflow_watcher.scan()
         
-        # Content Creation Workflow
-        content_workflow = WorkflowDefinition(
-            workflow_id="intelligent_content_creation",
-            name="Intelligent Content Creation",
-            description="Orchestral content creation with intelligence, optimization, and engagement",
-            steps=[
-                WorkflowStep(
-                    id="trend_analysis",
-                    agent_type="intelligence",
-                    task_type="trend_analysis",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platform": "platform",
-                        "topic": "topic",
-                        "target_audience": "target_audience"
-                    },
-                    output_mapping={
-                        "trending_topics": "intelligence.trending_topics",
-                        "hashtag_recommendations": "intelligence.hashtag_recommendations",
-                        "optimal_timing": "intelligence.optimal_timing"
-                    }
-                ),
-                WorkflowStep(
-                    id="content_generation",
-                    agent_type="content",
-                    task_type="content_creation",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platform": "platform",
-                        "topic": "topic",
-                        "trending_topics": "intelligence.trending_topics",
-                        "hashtag_recommendations": "intelligence.hashtag_recommendations"
-                    },
-                    output_mapping={
-                        "generated_content": "content.generated_content"
-                    },
-                    dependencies=["trend_analysis"]
-                ),
-                WorkflowStep(
-                    id="content_optimization",
-                    agent_type="learning",
-                    task_type="content_optimization", 
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "content": "content.generated_content",
-                        "platform": "platform"
-                    },
-                    output_mapping={
-                        "optimized_content": "learning.optimized_content",
-                        "performance_prediction": "learning.performance_prediction"
-                    },
-                    dependencies=["content_generation"]
-                ),
-                WorkflowStep(
-                    id="engagement_enhancement",
-                    agent_type="engagement",
-                    task_type="engagement_optimization",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "content": "learning.optimized_content",
-                        "platform": "platform"
-                    },
-                    output_mapping={
-                        "final_content": "engagement.final_content",
-                        "engagement_strategy": "engagement.engagement_strategy"
-                    },
-                    dependencies=["content_optimization"]
-                ),
-                WorkflowStep(
-                    id="schedule_publishing",
-                    agent_type="execution",
-                    task_type="schedule_content",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "content": "engagement.final_content",
-                        "platform": "platform", 
-                        "optimal_timing": "intelligence.optimal_timing"
-                    },
-                    output_mapping={
-                        "publishing_plan": "execution.publishing_plan"
-                    },
-                    dependencies=["engagement_enhancement"]
-                )
-            ],
-            input_schema={
-                "organization_id": {"type": "string", "required": True},
-                "platform": {"type": "string", "required": True},
-                "topic": {"type": "string", "required": True},
-                "target_audience": {"type": "string", "required": False}
-            },
-            output_schema={
-                "content": {"type": "object"},
-                "publishing_plan": {"type": "object"}
-            }
-        )
+        for path in removed:
+            workflow_id = self._workflow_files.pop(path, None)
+            if workflow_id and workflow_id in self.workflow_definitions:
+                del self.workflow_definitions[workflow_id]
+                logger.info(f"Workflow {workflow_id} removed ({path.name} deleted)")
         
-        # Performance Analysis Workflow
-        performance_workflow = WorkflowDefinition(
-            workflow_id="performance_analysis_optimization",
-            name="Performance Analysis & Optimization", 
-            description="Comprehensive performance analysis with learning and optimization recommendations",
-            steps=[
-                WorkflowStep(
-                    id="data_collection",
-                    agent_type="analytics",
-                    task_type="performance_analysis",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "platforms": "platforms",
-                        "timeframe": "timeframe"
-                    },
-                    output_mapping={
-                        "performance_data": "analytics.performance_data",
-                        "key_metrics": "analytics.key_metrics"
-                    }
-                ),
-                WorkflowStep(
-                    id="intelligence_insights",
-                    agent_type="intelligence", 
-                    task_type="performance_intelligence",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "performance_data": "analytics.performance_data",
-                        "platforms": "platforms"
-                    },
-                    output_mapping={
-                        "insights": "intelligence.insights",
-                        "benchmarking": "intelligence.benchmarking"
-                    },
-                    dependencies=["data_collection"]
-                ),
-                WorkflowStep(
-                    id="learning_analysis",
-                    agent_type="learning",
-                    task_type="pattern_analysis",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "performance_data": "analytics.performance_data",
-                        "insights": "intelligence.insights"
-                    },
-                    output_mapping={
-                        "patterns": "learning.patterns",
-                        "recommendations": "learning.recommendations"
-                    },
-                    dependencies=["data_collection", "intelligence_insights"]
-                ),
-                WorkflowStep(
-                    id="strategy_updates",
-                    agent_type="strategy",
-                    task_type="strategy_optimization",
-                    input_mapping={
-                        "organization_id": "organization_id",
-                        "performance_data": "analytics.performance_data",
-                        "insights": "intelligence.insights", 
-                        "recommendations": "learning.recommendations"
-                    },
-                    output_mapping={
-                        "updated_strategy": "strategy.updated_strategy"
-                    },
-                    dependencies=["learning_analysis"]
-                )
-            ],
-            input_schema={
-                "organization_id": {"type": "string", "required": True},
-                "platforms": {"type": "array", "required": True},
-                "timeframe": {"type": "string", "required": False, "default": "7d"}
-            },
-            output_schema={
-                "analysis_report": {"type": "object"},
-                "optimization_plan": {"type": "object"}
-            }
-        )
+        loaded = 0
+        for path in changed:
+            try:
+                definition = self._build_definition(read_workflow_document(path))
+            except WorkflowDefinitionError as e:
+                # Keep serving the previous version of the workflow, if any, until the file is fixed
+                logger.error(f"Failed to load workflow file {path.name}: {e}")
+                self._workflow_watcher.mark_processed(path)
+                continue
+            except Exception as e:
+                # e.g. a file caught mid-write; retried on the next reload
+                logger.error(f"Error reading workflow file {path.name}: {e}")
+                continue
+            
+            self._workflow_watcher.mark_processed(path)
+            previous_id = self._workflow_files.get(path)
+            if previous_id and previous_id != definition.workflow_id:
+                self.workflow_definitions.pop(previous_id, None)
+            
+            self._workflow_files[path] = definition.workflow_id
+            self.register_workflow(definition)
+            loaded += 1
         
-        self.workflow_definitions["complete_strategy_generation"] = strategy_workflow
-        self.workflow_definitions["intelligent_content_creation"] = content_workflow  
-        self.workflow_definitions["performance_analysis_optimization"] = performance_workflow
+        if loaded or removed:
+            logger.info(f"Workflow definitions reloaded: {loaded} loaded, {len(removed)} removed, "
+                        f"{len(self.workflow_definitions)} available")
+        return loaded
+    
+    def register_workflow(self, definition: WorkflowDefinition):
+        """Register (or replace) a workflow definition"""
+        self.workflow_definitions[definition.workflow_id] = definition
+    
+    def _build_definition(self, document: Dict[str, Any]) -> WorkflowDefinition:
+        """Build a validated workflow definition from a parsed workflow document"""
+        steps = [WorkflowStep(**{
+            "input_mapping": {},
+            "output_mapping": {},
+            **step
+        }) for step in document["steps"]]
         
-        logger.info(f"Registered {len(self.workflow_definitions)} built-in workflows")
+        return WorkflowDefinition(
+            workflow_id=document["workflow_id"],
+            name=document["name"],
+            description=document.get("description", ""),
+            steps=steps,
+            input_schema=document.get("input_schema", {}),
+            output_schema=document.get("output_schema", {})
+        )
     
     async def start(self):
         """Start the workflow engine"""
         self.running = True
         asyncio.create_task(self._workflow_monitor())
+        asyncio.create_task(self._workflow_reloader())
         logger.info("Workflow Engine started")
     
     async def stop(self):
@@ -445,12 +226,16 @@ class WorkflowEngine:
         logger.info("Workflow Engine stopped")
     
     async def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any],
-                             organization_id: str, user_id: Optional[str] = None) -> str:
-        """Execute an orchestral workflow"""
+                             organization_id: str, user_id: Optional[str] = None,
+                             priority: str = "normal") -> str:
+        """Execute an orchestral workflow (queued until admission control grants a slot)"""
         
         if workflow_id not in self.workflow_definitions:
             raise ValueError(f"Workflow {workflow_id} not found")
         
+        # Fail fast (rather than inside the background task) when the queue is full
+        self.admission.check_queue_capacity()
+        
         workflow_def = self.workflow_definitions[workflow_id]
         execution_id = str(uuid.uuid4())
         
@@ -463,17 +248,21 @@ class WorkflowEngine:
             status=WorkflowStatus.PENDING,
             steps=copy.deepcopy(workflow_def.steps),
             workflow_data=WorkflowData(input_data=input_data),
-            created_at=datetime.utcnow()
+            created_at=datetime.utcnow(),
+            priority=priority or "normal",
+            mapping_plans=workflow_def.mapping_plans
         )
         
         self.active_executions[execution_id] = execution
         
         # Start workflow execution
-        asyncio.create_task(self._execute_workflow_steps(execution))
+        task = asyncio.create_task(self._execute_workflow_steps(execution))
+        self._execution_tasks[execution_id] = task
+        task.add_done_callback(lambda _: self._execution_tasks.pop(execution_id, None))
         
         log_workflow_execution(
             execution_id, workflow_id, "started", organization_id,
-            {"input_data": input_data, "steps_count": len(execution.steps)}
+            {"input_data": input_data, "steps_count": len(execution.steps), "priority": execution.priority}
         )
         
         return execution_id
@@ -481,187 +270,359 @@ class WorkflowEngine:
     async def _execute_workflow_steps(self, execution: WorkflowExecution):
         """Execute workflow steps with proper orchestration"""
         
+        workflow_span = self.tracer.start_span(
+            execution.id, execution.workflow_id, "workflow",
+            attributes={"workflow_id": execution.workflow_id, "organization_id": execution.organization_id}
+        )
+        execution.trace_span_id = workflow_span.span_id
+        
         try:
-            execution.status = WorkflowStatus.RUNNING
-            execution.started_at = datetime.utcnow()
+            # Wait for an execution slot; the execution stays PENDING while queued
+            async with self.admission.admit(execution.organization_id, execution.priority) as ticket:
+                workflow_span.add_phase("queue_wait", ticket.wait_time)
+                
+                execution.status = WorkflowStatus.RUNNING
+                execution.started_at = datetime.utcnow()
             
-            logger.info(f"Starting workflow execution {execution.id}")
+                logger.info(f"Starting workflow execution {execution.id}")
             
-            # Execute steps based on dependencies
-            completed_steps = set()
+                # Execute steps based on dependencies
+                completed_steps = set()
             
-            while len(completed_steps) < len(execution.steps):
-                # Find steps that can be executed
-                ready_steps = []
+                while len(completed_steps) < len(execution.steps):
+                    # Find steps that can be executed
+                    ready_steps = []
                 
-                for step in execution.steps:
-                    if (step.status == StepStatus.PENDING and 
-                        all(dep in completed_steps for dep in step.dependencies)):
-                        ready_steps.append(step)
+                    for step in execution.steps:
+                        if (step.status == StepStatus.PENDING and 
+                            all(dep in completed_steps for dep in step.dependencies)):
+                            ready_steps.append(step)
                 
-                if not ready_steps:
-                    # Check if we're stuck
-                    pending_steps = [s for s in execution.steps if s.status == StepStatus.PENDING]
-                    if pending_steps:
-                        execution.status = WorkflowStatus.FAILED
-                        execution.error = "Workflow stuck - circular dependencies or failed dependencies"
-                        break
-                    else:
-                        break
+                    if not ready_steps:
+                        # Check if we're stuck
+                        pending_steps = [s for s in execution.steps if s.status == StepStatus.PENDING]
+                        if pending_steps:
+                            execution.status = WorkflowStatus.FAILED
+                            execution.error = "Workflow stuck - circular dependencies or failed dependencies"
+                            break
+                        else:
+                            break
                 
-                # Execute ready steps in parallel
-                tasks = []
-                for step in ready_steps:
-                    tasks.append(self._execute_step(execution, step))
+                    # Execute ready steps in parallel
+                    tasks = []
+                    for step in ready_steps:
+                        tasks.append(self._execute_step(execution, step))
                 
-                # Wait for all parallel steps to complete
-                step_results = await asyncio.gather(*tasks, return_exceptions=True)
+                    # Wait for all parallel steps to complete
+                    step_results = await asyncio.gather(*tasks, return_exceptions=True)
                 
-                # Process results
-                for i, result in enumerate(step_results):
-                    step = ready_steps[i]
-                    if isinstance(result, Exception):
-                        step.status = StepStatus.FAILED
-                        step.error = str(result)
-                        logger.error(f"Step {step.id} failed: {result}")
-                    else:
-                        step.status = StepStatus.COMPLETED
-                        completed_steps.add(step.id)
-                        logger.info(f"Step {step.id} completed successfully")
+                    # Process results
+                    for i, result in enumerate(step_results):
+                        step = ready_steps[i]
+                        if isinstance(result, Exception):
+                            step.status = StepStatus.FAILED
+                            step.error = str(result)
+                            logger.error(f"Step {step.id} failed: {result}")
+                        else:
+                            step.status = StepStatus.COMPLETED
+                            completed_steps.add(step.id)
+                            logger.info(f"Step {step.id} completed successfully")
                 
-                # Check if any critical step failed
-                failed_steps = [s for s in ready_steps if s.status == StepStatus.FAILED]
-                if failed_steps:
-                    execution.status = WorkflowStatus.FAILED
-                    execution.error = f"Critical steps failed: {[s.id for s in failed_steps]}"
-                    break
+                    # Check if any critical step failed
+                    failed_steps = [s for s in ready_steps if s.status == StepStatus.FAILED]
+                    if failed_steps:
+                        execution.status = WorkflowStatus.FAILED
+                        execution.error = f"Critical steps failed: {[s.id for s in failed_steps]}"
+                        break
             
-            # Finalize workflow
-            if execution.status == WorkflowStatus.RUNNING:
-                execution.status = WorkflowStatus.COMPLETED
-                execution.completed_at = datetime.utcnow()
+                # Finalize workflow
+                if execution.status == WorkflowStatus.RUNNING:
+                    execution.status = WorkflowStatus.COMPLETED
+                    execution.completed_at = datetime.utcnow()
                 
-                # Set final result from last step or combine results
-                final_step = execution.steps[-1]
-                if final_step.result:
-                    execution.workflow_data.final_result = final_step.result
+                    # Set final result from last step or combine results
+                    final_step = execution.steps[-1]
+                    if final_step.result:
+                        execution.workflow_data.final_result = final_step.result
                 
-                logger.info(f"Workflow execution {execution.id} completed successfully")
-            else:
-                execution.completed_at = datetime.utcnow()
-                logger.error(f"Workflow execution {execution.id} failed: {execution.error}")
+                    logger.info(f"Workflow execution {execution.id} completed successfully")
+                else:
+                    execution.completed_at = datetime.utcnow()
+                    logger.error(f"Workflow execution {execution.id} failed: {execution.error}")
             
-            # Store in history and clean up
-            self.execution_history.append(execution)
+                # Store in history and clean up
+                self.execution_history.append(execution)
             
-            # Store workflow result in memory for future reference
-            await self._store_workflow_result(execution)
+                # Store workflow result in memory for future reference
+                memory_started = time.perf_counter()
+                await self._store_workflow_result(execution)
+                workflow_span.add_phase("memory_io", time.perf_counter() - memory_started)
+            
+        except asyncio.CancelledError:
+            # Running steps were cancelled with us; record why unless a canceller already did
+            if execution.status in (WorkflowStatus.PENDING, WorkflowStatus.RUNNING):
+                execution.status = WorkflowStatus.CANCELLED
+                execution.completed_at = datetime.utcnow()
+            logger.info(f"Workflow execution {execution.id} stopped ({execution.status.value})")
+            raise
             
         except Exception as e:
             execution.status = WorkflowStatus.FAILED
             execution.error = str(e)
             execution.completed_at = datetime.utcnow()
             logger.error(f"Workflow execution {execution.id} failed with exception: {e}")
+        
+        finally:
+            self.tracer.end_span(workflow_span, status=execution.status.value)
     
     async def _execute_step(self, execution: WorkflowExecution, step: WorkflowStep):
-        """Execute a single workflow step"""
+        """Execute a single workflow step, retrying failed attempts"""
         
-        step.status = StepStatus.RUNNING
         step.started_at = datetime.utcnow()
+        span = self.tracer.start_span(
+            execution.id, step.id, "step",
+            parent_id=execution.trace_span_id,
+            attributes={
+                "step_type": f"{step.agent_type}.{step.task_type}",
+                "agent_type": step.agent_type,
+                "dependencies": list(step.dependencies),
+                "map_over": step.map_over
+            }
+        )
         
+        # The caller marks the step completed once we return, so the span records the outcome itself
+        outcome = StepStatus.FAILED.value
         try:
-            # Get agent instance
-            agent = self.agent_registry.get(step.agent_type)
-            if not agent:
-                raise ValueError(f"Agent {step.agent_type} not found in registry")
-            
-            # Map input data from workflow data
-            agent_input = self._map_input_data(execution.workflow_data, step.input_mapping)
-            
-            # Create agent task
-            agent_task = await create_agent_task(
-                task_type=step.task_type,
-                organization_id=execution.organization_id,
-                input_data=agent_input,
-                user_id=execution.user_id,
-                priority=5  # High priority for workflow tasks
-            )
+            while True:
+                step.status = StepStatus.RUNNING
+                attempt_started = time.perf_counter()
+                attempt_phases: Dict[str, float] = {}
+                
+                try:
+                    await self._execute_step_attempt(execution, step, attempt_phases)
+                    span.add_phases(attempt_phases)
+                    outcome = StepStatus.COMPLETED.value
+                    return
+                    
+                except asyncio.TimeoutError:
+                    step.retry_count += 1
+                    if step.retry_count <= step.max_retries:
+                        logger.warning(f"Step {step.id} timed out, retrying ({step.retry_count}/{step.max_retries})")
+                        step.status = StepStatus.PENDING  # Reset for retry
+                        span.add_phase("retry", time.perf_counter() - attempt_started)
+                    else:
+                        step.status = StepStatus.FAILED
+                        step.error = "Step timed out after maximum retries"
+                        outcome = "timeout"
+                        raise Exception(step.error)
+                        
+                except Exception as e:
+                    step.retry_count += 1
+                    if step.retry_count <= step.max_retries:
+                        logger.warning(f"Step {step.id} failed, retrying ({step.retry_count}/{step.max_retries}): {e}")
+                        step.status = StepStatus.PENDING  # Reset for retry
+                        await asyncio.sleep(2)  # Brief delay before retry
+                        span.add_phase("retry", time.perf_counter() - attempt_started)
+                    else:
+                        step.status = StepStatus.FAILED
+                        step.error = str(e)
+                        step.completed_at = datetime.utcnow()
+                        raise
+        except asyncio.CancelledError:
+            step.status = StepStatus.CANCELLED
+            step.completed_at = datetime.utcnow()
+            outcome = StepStatus.CANCELLED.value
+            raise
+        finally:
+            span.attributes["retry_count"] = step.retry_count
+            self.tracer.end_span(span, status=outcome)
+    
+    async def _execute_step_attempt(self, execution: WorkflowExecution, step: WorkflowStep,
+                                    phases: Dict[str, float]):
+        """Run one attempt of a step and map its output into workflow data"""
+        
+        plan = execution.mapping_plans[step.id]
+        
+        # Map input data from workflow data
+        agent_input = self._map_input_data(execution.workflow_data, plan.inputs)
+        
+        if plan.map_over:
+            step.result = await self._execute_map_step(execution, step, plan.map_over, agent_input, phases)
+            self._map_fanout_output_data(execution.workflow_data, plan.outputs, step.result)
+        else:
+            response = await self._run_agent_task(execution, step, agent_input, phases)
+            step.result = response.result
             
+            # Map output data to workflow data
+            self._map_output_data(execution.workflow_data, plan.outputs, response.result)
+        
+        step.completed_at = datetime.utcnow()
+        logger.info(f"Step {step.id} completed successfully")
+    
+    async def _run_agent_task(self, execution: WorkflowExecution, step: WorkflowStep,
+                              agent_input: Dict[str, Any], phases: Dict[str, float],
+                              item_index: Optional[int] = None) -> AgentResponse:
+        """Run one agent task for a step (or one item of a map step) and return the successful response"""
+        
+        # Create agent task
+        agent_task = await create_agent_task(
+            task_type=step.task_type,
+            organization_id=execution.organization_id,
+            input_data=agent_input,
+            user_id=execution.user_id,
+            priority=5  # High priority for workflow tasks
+        )
+        
+        if item_index is None:
             step.agent_task_id = agent_task.id
-            
-            # Execute task with timeout
-            response = await asyncio.wait_for(
-                agent.execute_task(agent_task),
-                timeout=step.timeout
-            )
-            
-            if response.success:
-                step.result = response.result
-                
-                # Map output data to workflow data
-                self._map_output_data(execution.workflow_data, step.output_mapping, response.result)
-                
-                step.completed_at = datetime.utcnow()
-                logger.info(f"Step {step.id} completed successfully")
-                
-            else:
-                raise Exception(f"Agent task failed: {response.error}")
-                
-        except asyncio.TimeoutError:
-            step.retry_count += 1
-            if step.retry_count <= step.max_retries:
-                logger.warning(f"Step {step.id} timed out, retrying ({step.retry_count}/{step.max_retries})")
-                step.status = StepStatus.PENDING  # Reset for retry
-                await self._execute_step(execution, step)
-            else:
-                step.status = StepStatus.FAILED
-                step.error = "Step timed out after maximum retries"
-                raise Exception(step.error)
-                
-        except Exception as e:
-            step.retry_count += 1
-            if step.retry_count <= step.max_retries:
-                logger.warning(f"Step {step.id} failed, retrying ({step.retry_count}/{step.max_retries}): {e}")
-                step.status = StepStatus.PENDING  # Reset for retry
-                await asyncio.sleep(2)  # Brief delay before retry
-                await self._execute_step(execution, step)
-            else:
-                step.status = StepStatus.FAILED
-                step.error = str(e)
-                step.completed_at = datetime.utcnow()
-                raise
+        else:
+            step.agent_task_ids[item_index] = agent_task.id
+        
+        wait_started = time.perf_counter()
+        while True:
+            async with self._acquire_agent(step.agent_type) as agent:
+                execution_started = time.perf_counter()
+                try:
+                    # Execute task with timeout
+                    response = await asyncio.wait_for(
+                        agent.execute_task(agent_task),
+                        timeout=step.timeout
+                    )
+                    break
+                except AgentBusyError:
+                    pass  # taken by the coordinator's dispatcher since we picked it
+            await asyncio.sleep(self.AGENT_POLL_INTERVAL)
+        
+        elapsed = time.perf_counter() - execution_started
+        phases["queue_wait"] = phases.get("queue_wait", 0.0) + execution_started - wait_started
+        
+        # The agent reports how much of its run was spent on memory reads/writes
+        memory_io = min(elapsed, (response.metadata or {}).get("timings", {}).get("memory_io", 0.0))
+        phases["memory_io"] = phases.get("memory_io", 0.0) + memory_io
+        phases["agent_execution"] = phases.get("agent_execution", 0.0) + elapsed - memory_io
+        
+        if not response.success:
+            raise Exception(f"Agent task failed: {response.error}")
+        
+        return response
+    
+    async def _execute_map_step(self, execution: WorkflowExecution, step: WorkflowStep,
+                                map_over: PathAccessor, agent_input: Dict[str, Any],
+                                phases: Dict[str, float]) -> List[Any]:
+        """Fan a step out over a list in workflow data and gather the results in order"""
+        
+        _, map_path, map_parts = map_over
+        items = self._resolve_path(execution.workflow_data, map_path, map_parts)
+        if items is None:
+            items = []
+        if not isinstance(items, list):
+            raise ValueError(f"Step {step.id} map_over path '{step.map_over}' is not a list")
+        
+        semaphore = asyncio.Semaphore(max(1, step.max_concurrency))
+        item_phases: List[Dict[str, float]] = [{} for _ in items]
+        step.agent_task_ids = [None] * len(items)
+        
+        async def run_item(index: int, item: Any) -> Any:
+            async with semaphore:
+                item_input = dict(agent_input)
+                item_input[step.map_item_key] = item
+                response = await self._run_agent_task(execution, step, item_input, item_phases[index], index)
+                return response.result
+        
+        logger.info(f"Step {step.id} fanning out over {len(items)} items (concurrency {step.max_concurrency})")
+        
+        results = await asyncio.gather(*(run_item(index, item) for index, item in enumerate(items)),
+                                       return_exceptions=True)
+        
+        # Items overlap in time, so the step reports the slowest item's phases rather than their sum
+        slowest = max(item_phases, key=lambda timings: sum(timings.values()), default={})
+        for phase, seconds in slowest.items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        
+        return results
+    
+    AGENT_POLL_INTERVAL = 0.05  # seconds between checks for instances freed outside the engine
+    
+    @asynccontextmanager
+    async def _acquire_agent(self, agent_type: str):
+        """
+        Reserve an idle agent instance of the given type for the duration of a call
+        
+        An instance is idle when no step holds it and its own is_busy flag is clear.
+        The coordinator's dispatcher goes through that same flag (execute_task raises
+        AgentBusyError on a busy agent), so the two never run tasks on one instance
+        at once; instances it frees are noticed by polling.
+        """
+        
+        registered = self.agent_registry.get(agent_type)
+        if not registered:
+            raise ValueError(f"Agent {agent_type} not found in registry")
+        pool = registered if isinstance(registered, list) else [registered]
+        
+        while True:
+            agent = next((candidate for candidate in pool if candidate.agent_id not in self._reserved_agents
+                          and not getattr(candidate, "is_busy", False)), None)
+            if agent is not None:
+                break
+            released = self._agent_released
+            try:
+                await asyncio.wait_for(released.wait(), timeout=self.AGENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        
+        self._reserved_agents.add(agent.agent_id)
+        try:
+            yield agent
+        finally:
+            self._reserved_agents.discard(agent.agent_id)
+            self._agent_released.set()
+            self._agent_released = asyncio.Event()
     
-    def _map_input_data(self, workflow_data: WorkflowData, input_mapping: Dict[str, str]) -> Dict[str, Any]:
-        """Map workflow data to agent input using input mapping"""
+    def _map_input_data(self, workflow_data: WorkflowData, inputs: Tuple[PathAccessor, ...]) -> Dict[str, Any]:
+        """Map workflow data to agent input using a compiled input mapping"""
         agent_input = {}
         
-        for agent_key, workflow_path in input_mapping.items():
-            value = self._get_nested_value(workflow_data, workflow_path)
+        for agent_key, workflow_path, parts in inputs:
+            value = self._resolve_path(workflow_data, workflow_path, parts)
             if value is not None:
                 agent_input[agent_key] = value
         
         return agent_input
     
-    def _map_output_data(self, workflow_data: WorkflowData, output_mapping: Dict[str, str], agent_result: Any):
-        """Map agent output to workflow data using output mapping"""
+    def _map_output_data(self, workflow_data: WorkflowData, outputs: Tuple[PathAccessor, ...], agent_result: Any):
+        """Map agent output to workflow data using a compiled output mapping"""
         
-        for agent_key, workflow_path in output_mapping.items():
+        for agent_key, _, parts in outputs:
             if isinstance(agent_result, dict) and agent_key in agent_result:
-                self._set_nested_value(workflow_data, workflow_path, agent_result[agent_key])
+                self._assign_path(workflow_data, parts, agent_result[agent_key])
             elif agent_key == "result":  # Default mapping for full result
-                self._set_nested_value(workflow_data, workflow_path, agent_result)
+                self._assign_path(workflow_data, parts, agent_result)
+    
+    def _map_fanout_output_data(self, workflow_data: WorkflowData, outputs: Tuple[PathAccessor, ...],
+                                results: List[Any]):
+        """Map the per-item results of a map step to lists in workflow data"""
+        
+        for agent_key, _, parts in outputs:
+            if agent_key == "result":
+                self._assign_path(workflow_data, parts, results)
+            else:
+                self._assign_path(workflow_data, parts, [
+                    result.get(agent_key) if isinstance(result, dict) else None
+                    for result in results
+                ])
     
-    def _get_nested_value(self, workflow_data: WorkflowData, path: str) -> Any:
-        """Get nested value from workflow data using dot notation"""
+    def _resolve_path(self, workflow_data: WorkflowData, path: str, parts: Tuple[str, ...]) -> Any:
+        """Resolve a pre-split path: input data first, then nested intermediate data"""
         
         # Check input data first
         if path in workflow_data.input_data:
             return workflow_data.input_data[path]
         
-        # Check intermediate data with nested path
-        parts = path.split('.')
         current = workflow_data.intermediate_data
-        
         for part in parts:
             if isinstance(current, dict) and part in current:
                 current = current[part]
@@ -670,10 +631,9 @@ class WorkflowEngine:
         
         return current
     
-    def _set_nested_value(self, workflow_data: WorkflowData, path: str, value: Any):
-        """Set nested value in workflow data using dot notation"""
+    def _assign_path(self, workflow_data: WorkflowData, parts: Tuple[str, ...], value: Any):
+        """Assign a value at a pre-split path in intermediate data"""
         
-        parts = path.split('.')
         current = workflow_data.intermediate_data
         
         # Navigate to the parent of the target key
@@ -700,6 +660,15 @@ class WorkflowEngine:
         except Exception as e:
             logger.warning(f"Failed to store workflow result: {e}")
     
+    async def _workflow_reloader(self):
+        """Pick up added, edited and removed workflow files while running"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.reload_interval)
+                self.load_workflows()
+            except Exception as e:
+                logger.error(f"Error reloading workflow definitions: {e}")
+    
     async def _workflow_monitor(self):
         """Monitor active workflows and handle timeouts"""
         while self.running:
@@ -712,12 +681,9 @@ class WorkflowEngine:
                         execution.started_at and
                         current_time - execution.started_at > timedelta(hours=2)):  # 2 hour timeout
                         
-                        execution.status = WorkflowStatus.FAILED
-                        execution.error = "Workflow execution timed out"
-                        execution.completed_at = current_time
-                        
-                        self.execution_history.append(execution)
-                        del self.active_executions[execution_id]
+                        await self._interrupt_execution(
+                            execution, WorkflowStatus.FAILED, "Workflow execution timed out"
+                        )
                         
                         logger.warning(f"Workflow execution {execution_id} timed out")
                 
@@ -767,6 +733,7 @@ class WorkflowEngine:
                     "id": step.id,
                     "agent_type": step.agent_type,
                     "task_type": step.task_type,
+                    "map_over": step.map_over,
                     "status": step.status.value,
                     "started_at": step.started_at.isoformat() if step.started_at else None,
                     "completed_at": step.completed_at.isoformat() if step.completed_at else None,
@@ -779,6 +746,18 @@ class WorkflowEngine:
             "progress": len([s for s in execution.steps if s.status == StepStatus.COMPLETED]) / len(execution.steps) * 100
         }
     
+    def get_admission_metrics(self) -> Dict[str, Any]:
+        """Get admission queue depth, in-flight counts and wait times"""
+        return self.admission.get_metrics()
+    
+    def get_execution_trace(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Get the span trace and critical-path breakdown of a workflow execution"""
+        return self.tracer.get_trace(execution_id)
+    
+    def get_step_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get aggregate p50/p95 step latency per step type (agent_type.task_type)"""
+        return self.tracer.exporter.get_step_type_stats()
+    
     def list_workflows(self) -> List[Dict[str, Any]]:
         """List available workflows"""
         return [
@@ -798,18 +777,37 @@ class WorkflowEngine:
         return [self._serialize_execution(execution) for execution in self.active_executions.values()]
     
     async def cancel_execution(self, execution_id: str) -> bool:
-        """Cancel a running workflow execution"""
-        if execution_id in self.active_executions:
-            execution = self.active_executions[execution_id]
-            execution.status = WorkflowStatus.CANCELLED
-            execution.completed_at = datetime.utcnow()
-            
-            # Move to history
-            self.execution_history.append(execution)
-            del self.active_executions[execution_id]
-            
+        """Cancel a pending or running workflow execution and stop its in-flight agent calls"""
+        execution = self.active_executions.get(execution_id)
+        if execution is not None and await self._interrupt_execution(execution, WorkflowStatus.CANCELLED):
             logger.info(f"Workflow execution {execution_id} cancelled")
             return True
         
         return False
-
+    
+    async def _interrupt_execution(self, execution: WorkflowExecution, status: WorkflowStatus,
+                                   error: Optional[str] = None, grace_period: float = 5.0) -> bool:
+        """
+        Stop an execution's task and move it to history with the given final status
+        
+        Returns False, changing nothing, once the execution has finished: it already
+        recorded its own outcome in history (and may still be storing its result).
+        """
+        if execution.status not in (WorkflowStatus.PENDING, WorkflowStatus.RUNNING):
+            return False
+        
+        execution.status = status
+        execution.error = error
+        execution.completed_at = datetime.utcnow()
+        
+        task = self._execution_tasks.get(execution.id)
+        if task and not task.done():
+            # Cancellation propagates through the step gather into agent.execute_task and
+            # the LLM call; wait briefly so agent slots are released before we return
+            task.cancel()
+            await asyncio.wait({task}, timeout=grace_period)
+        
+        # Move to history
+        self.execution_history.append(execution)
+        self.active_executions.pop(execution.id, None)
+        return True
@@ -0,0 +1,272 @@
+"""
+Workflow Definition Loader
+Reads declarative workflow files and compiles their data mappings into reusable plans
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
+
+try:
+    import yaml
+except ImportError:  # YAML workflow files are optional
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".json", ".yaml", ".yml")
+
+# Step keys a workflow file may set, with their types; everything else on WorkflowStep is runtime state
+STEP_DEFINITION_KEYS = {
+    "id": str,
+    "agent_type": str,
+    "task_type": str,
+    "input_mapping": dict,
+    "output_mapping": dict,
+    "dependencies": list,
+    "condition": str,
+    "map_over": str,
+    "map_item_key": str,
+    "max_concurrency": int,
+    "timeout": (int, float),
+    "max_retries": int
+}
+# Step keys that may be null
+OPTIONAL_STEP_KEYS = {"condition", "map_over"}
+
+# Top-level workflow keys and their types
+WORKFLOW_KEY_TYPES = {
+    "workflow_id": str,
+    "name": str,
+    "description": str,
+    "steps": list,
+    "input_schema": dict,
+    "output_schema": dict
+}
+
+# (mapping key, original dotted path, pre-split path parts)
+PathAccessor = Tuple[str, str, Tuple[str, ...]]
+
+class WorkflowDefinitionError(ValueError):
+    """Raised when a workflow definition is malformed or its data flow is inconsistent"""
+
+@dataclass(frozen=True)
+class StepMappingPlan:
+    """Precomputed input/output accessors for one workflow step"""
+    inputs: Tuple[PathAccessor, ...]
+    outputs: Tuple[PathAccessor, ...]
+    map_over: Optional[PathAccessor] = None
+
+def compile_mapping(mapping: Dict[str, str]) -> Tuple[PathAccessor, ...]:
+    """Split every dotted path of a mapping once"""
+    return tuple((key, path, tuple(path.split('.'))) for key, path in mapping.items())
+
+def compile_step_plan(step) -> StepMappingPlan:
+    """Compile a step's input/output mappings into a mapping plan"""
+    return StepMappingPlan(
+        inputs=compile_mapping(step.input_mapping),
+        outputs=compile_mapping(step.output_mapping),
+        map_over=(step.map_over, step.map_over, tuple(step.map_over.split('.'))) if step.map_over else None
+    )
+
+def _paths_overlap(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """True when one path is a prefix of the other"""
+    shortest = min(len(a), len(b))
+    return a[:shortest] == b[:shortest]
+
+def _schema_has_path(input_schema: Dict[str, Any], parts: Tuple[str, ...]) -> bool:
+    """
+    Whether the input schema declares a path
+
+    Fields are matched level by level: a path below a field is declared only through
+    that field's "properties" (e.g. {"brand": {"type": "object", "properties":
+    {"voice": {"type": "string"}}}} declares "brand.voice").
+    """
+    fields = input_schema
+    for index, part in enumerate(parts):
+        spec = fields.get(part) if isinstance(fields, dict) else None
+        if spec is None:
+            return False
+        if index < len(parts) - 1:
+            fields = spec.get("properties") if isinstance(spec, dict) else None
+    return True
+
+def validate_workflow(workflow_id: str, steps: List[Any], input_schema: Dict[str, Any],
+                      plans: Dict[str, StepMappingPlan]):
+    """Check the step DAG and that every mapped input is a declared workflow input or produced upstream"""
+
+    step_by_id = {}
+    for step in steps:
+        if step.id in step_by_id:
+            raise WorkflowDefinitionError(f"Workflow {workflow_id}: duplicate step id '{step.id}'")
+        step_by_id[step.id] = step
+
+    for step in steps:
+        for dependency in step.dependencies:
+            if dependency not in step_by_id:
+                raise WorkflowDefinitionError(
+                    f"Workflow {workflow_id}: step '{step.id}' depends on unknown step '{dependency}'"
+                )
+
+    # Topological order (Kahn) also detects cycles
+    remaining = {step.id: len(step.dependencies) for step in steps}
+    dependents: Dict[str, List[str]] = {step.id: [] for step in steps}
+    for step in steps:
+        for dependency in step.dependencies:
+            dependents[dependency].append(step.id)
+
+    order = [step_id for step_id, count in remaining.items() if count == 0]
+    for step_id in order:
+        for dependent in dependents[step_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) != len(steps):
+        cyclic = sorted(step_id for step_id, count in remaining.items() if count > 0)
+        raise WorkflowDefinitionError(f"Workflow {workflow_id}: circular dependencies between {cyclic}")
+
+    ancestors: Dict[str, set] = {}
+    for step_id in order:
+        step_ancestors = set()
+        for dependency in step_by_id[step_id].dependencies:
+            step_ancestors.add(dependency)
+            step_ancestors |= ancestors[dependency]
+        ancestors[step_id] = step_ancestors
+
+    for step_id in order:
+        plan = plans[step_id]
+        produced = [
+            parts
+            for ancestor in ancestors[step_id]
+            for _, _, parts in plans[ancestor].outputs
+        ]
+
+        reads = list(plan.inputs)
+        if plan.map_over:
+            reads.append(plan.map_over)
+
+        for _, path, parts in reads:
+            if path in input_schema or _schema_has_path(input_schema, parts):
+                continue
+            if any(_paths_overlap(parts, output_parts) for output_parts in produced):
+                continue
+            raise WorkflowDefinitionError(
+                f"Workflow {workflow_id}: step '{step_id}' reads '{path}', which is neither a "
+                f"workflow input nor produced by an upstream step"
+            )
+
+def read_workflow_document(path: Path) -> Dict[str, Any]:
+    """Read a workflow document from a JSON or YAML file"""
+
+    suffix = path.suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise WorkflowDefinitionError(f"Unsupported workflow file type: {path.name}")
+
+    with open(path, "r", encoding="utf-8") as handle:
+        if suffix == ".json":
+            try:
+                document = json.load(handle)
+            except json.JSONDecodeError as e:
+                raise WorkflowDefinitionError(f"Invalid JSON in {path.name}: {e}")
+        else:
+            if yaml is None:
+                raise WorkflowDefinitionError(f"PyYAML is required to load {path.name}")
+            try:
+                document = yaml.safe_load(handle)
+            except yaml.YAMLError as e:
+                raise WorkflowDefinitionError(f"Invalid YAML in {path.name}: {e}")
+
+    if not isinstance(document, dict):
+        raise WorkflowDefinitionError(f"Workflow file {path.name} must contain a mapping")
+
+    for key in ("workflow_id", "name", "steps"):
+        if key not in document:
+            raise WorkflowDefinitionError(f"Workflow file {path.name} is missing '{key}'")
+
+    for key, expected in WORKFLOW_KEY_TYPES.items():
+        if key in document and not isinstance(document[key], expected):
+            raise WorkflowDefinitionError(
+                f"Workflow file {path.name}: '{key}' must be a {_type_name(expected)}"
+            )
+
+    if not document["steps"]:
+        raise WorkflowDefinitionError(f"Workflow file {path.name} must define at least one step")
+
+    for step in document["steps"]:
+        if not isinstance(step, dict):
+            raise WorkflowDefinitionError(f"Workflow file {path.name}: every step must be a mapping")
+        unknown = set(step) - set(STEP_DEFINITION_KEYS)
+        if unknown:
+            raise WorkflowDefinitionError(
+                f"Workflow file {path.name}: step '{step.get('id')}' has unknown keys {sorted(unknown)}"
+            )
+        for key in ("id", "agent_type", "task_type"):
+            if key not in step:
+                raise WorkflowDefinitionError(f"Workflow file {path.name}: a step is missing '{key}'")
+        _check_step_types(path, step)
+
+    return document
+
+def _type_name(expected) -> str:
+    types = expected if isinstance(expected, tuple) else (expected,)
+    return " or ".join(t.__name__ for t in types)
+
+def _check_step_types(path: Path, step: Dict[str, Any]):
+    """Reject values a WorkflowStep cannot work with (e.g. "output_mapping": null)"""
+    for key, value in step.items():
+        if value is None and key in OPTIONAL_STEP_KEYS:
+            continue
+        expected = STEP_DEFINITION_KEYS[key]
+        # bool is an int subclass, but never a valid count or timeout
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise WorkflowDefinitionError(
+                f"Workflow file {path.name}: step '{step.get('id')}' key '{key}' must be a {_type_name(expected)}"
+            )
+
+    for key in ("input_mapping", "output_mapping"):
+        for target, source in step.get(key, {}).items():
+            if not isinstance(source, str) or not source:
+                raise WorkflowDefinitionError(
+                    f"Workflow file {path.name}: step '{step['id']}' {key} entry '{target}' must be a dotted path"
+                )
+
+    if not all(isinstance(dependency, str) for dependency in step.get("dependencies", [])):
+        raise WorkflowDefinitionError(f"Workflow file {path.name}: step '{step['id']}' dependencies must be step ids")
+
+class WorkflowFileWatcher:
+    """
+    Tracks modification times of workflow files to detect additions, edits and removals
+
+    A changed file keeps being reported until mark_processed() records the version
+    that was handled, so a file whose load failed unexpectedly is retried.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._mtimes: Dict[Path, int] = {}  # versions processed
+        self._seen: Dict[Path, int] = {}  # versions found by the latest scan
+
+    def scan(self) -> Tuple[List[Path], List[Path]]:
+        """Return (changed_or_new_files, removed_files) since they were last processed"""
+        current: Dict[Path, int] = {}
+
+        if self.directory.is_dir():
+            for path in sorted(self.directory.iterdir()):
+                if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES:
+                    current[path] = path.stat().st_mtime_ns
+
+        changed = [path for path, mtime in current.items() if self._mtimes.get(path) != mtime]
+        removed = [path for path in self._mtimes if path not in current]
+
+        for path in removed:
+            del self._mtimes[path]
+        self._seen = current
+        return changed, removed
+
+    def mark_processed(self, path: Path):
+        """The version of path found by the latest scan has been handled"""
+        if path in self._seen:
+            self._mtimes[path] = self._seen[path]
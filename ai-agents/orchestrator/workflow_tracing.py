@@ -0,0 +1,223 @@
+"""
+Workflow Execution Tracing
+Records a span per workflow execution and per step, with a phase breakdown of where the time went
+"""
+
+import math
+import time
+import uuid
+import logging
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from dataclasses import dataclass, field
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Phases tracked inside a span; anything not covered by a phase is reported as "other"
+TRACE_PHASES = ("queue_wait", "agent_execution", "memory_io", "retry")
+
+@dataclass
+class Span:
+    """A timed unit of work within a workflow trace"""
+    span_id: str
+    trace_id: str
+    name: str
+    kind: str  # "workflow" or "step"
+    started_at: datetime
+    start_mono: float
+    parent_id: Optional[str] = None
+    end_mono: Optional[float] = None
+    status: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    phases: Dict[str, float] = field(default_factory=dict)  # phase -> seconds
+
+    def add_phase(self, phase: str, seconds: float):
+        """Accumulate time spent in a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_phases(self, phases: Dict[str, float]):
+        """Accumulate several phase timings at once"""
+        for phase, seconds in phases.items():
+            self.add_phase(phase, seconds)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Wall-clock duration in seconds, None while the span is open"""
+        if self.end_mono is None:
+            return None
+        return self.end_mono - self.start_mono
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percentile / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class InMemorySpanExporter:
+    """
+    Keeps recent traces and rolling per-step-type latency samples in process memory
+
+    Latency samples come from completed steps only, so a burst of timeouts or fast
+    failures does not skew the percentiles; other outcomes are counted per status.
+    """
+
+    def __init__(self, max_traces: int = 500, samples_per_step_type: int = 1000):
+        self.max_traces = max_traces
+        self.samples_per_step_type = samples_per_step_type
+        self.traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self.step_samples: Dict[str, deque] = {}
+        self.step_outcomes: Dict[str, Dict[str, int]] = {}  # step type -> status -> count
+
+    def export(self, span: Span):
+        """Store a finished span"""
+        spans = self.traces.get(span.trace_id)
+        if spans is None:
+            spans = self.traces[span.trace_id] = []
+            while len(self.traces) > self.max_traces:
+                self.traces.popitem(last=False)
+        spans.append(span)
+
+        if span.kind == "step" and span.duration is not None:
+            step_type = span.attributes.get("step_type", span.name)
+            outcomes = self.step_outcomes.setdefault(step_type, {})
+            status = span.status or "unknown"
+            outcomes[status] = outcomes.get(status, 0) + 1
+            if status != "completed":
+                return
+            samples = self.step_samples.get(step_type)
+            if samples is None:
+                samples = self.step_samples[step_type] = deque(maxlen=self.samples_per_step_type)
+            samples.append(span.duration)
+
+    def get_spans(self, trace_id: str) -> List[Span]:
+        """Get the finished spans of a trace"""
+        return list(self.traces.get(trace_id, []))
+
+    def get_step_type_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate p50/p95 latency (milliseconds) of completed steps and outcome counts per step type"""
+        stats = {}
+        for step_type, outcomes in self.step_outcomes.items():
+            ordered = sorted(self.step_samples.get(step_type, ()))
+            stats[step_type] = {
+                "count": len(ordered),
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+                "outcomes": dict(outcomes)
+            }
+        return stats
+
+class WorkflowTracer:
+    """Creates spans for workflow executions and hands finished spans to an exporter"""
+
+    def __init__(self, exporter: Optional[InMemorySpanExporter] = None):
+        self.exporter = exporter or InMemorySpanExporter()
+        self.open_spans: Dict[str, Dict[str, Span]] = {}  # trace_id -> span_id -> span
+
+    def start_span(self, trace_id: str, name: str, kind: str, parent_id: Optional[str] = None,
+                   attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """Open a new span"""
+        span = Span(
+            span_id=str(uuid.uuid4()),
+            trace_id=trace_id,
+            name=name,
+            kind=kind,
+            started_at=datetime.utcnow(),
+            start_mono=time.perf_counter(),
+            parent_id=parent_id,
+            attributes=attributes or {}
+        )
+        self.open_spans.setdefault(trace_id, {})[span.span_id] = span
+        return span
+
+    def end_span(self, span: Span, status: Optional[str] = None):
+        """Close a span and export it"""
+        if span.end_mono is not None:
+            return
+        span.end_mono = time.perf_counter()
+        span.status = status
+
+        open_spans = self.open_spans.get(span.trace_id)
+        if open_spans is not None:
+            open_spans.pop(span.span_id, None)
+            if not open_spans:
+                del self.open_spans[span.trace_id]
+
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Failed to export span {span.name}: {e}")
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Build a trace report with the critical path through the step DAG"""
+        finished = self.exporter.get_spans(trace_id)
+        in_flight = list(self.open_spans.get(trace_id, {}).values())
+        spans = finished + in_flight
+        if not spans:
+            return None
+
+        root = next((span for span in spans if span.kind == "workflow"), None)
+        origin = root.start_mono if root else min(span.start_mono for span in spans)
+        now = time.perf_counter()
+
+        steps = [span for span in spans if span.kind == "step"]
+        critical_path = self._critical_path(steps, now)
+
+        return {
+            "trace_id": trace_id,
+            "complete": not in_flight,
+            "workflow": self._serialize_span(root, origin, now) if root else None,
+            "steps": [
+                self._serialize_span(span, origin, now)
+                for span in sorted(steps, key=lambda span: span.start_mono)
+            ],
+            "critical_path": {
+                "steps": [span.name for span in critical_path],
+                "duration_ms": round(sum(self._elapsed(span, now) for span in critical_path) * 1000, 2),
+                "breakdown": [self._serialize_span(span, origin, now) for span in critical_path]
+            }
+        }
+
+    def _critical_path(self, steps: List[Span], now: float) -> List[Span]:
+        """Walk back from the last step to finish, always through the dependency that finished last"""
+        if not steps:
+            return []
+
+        by_name = {span.name: span for span in steps}
+        end = lambda span: span.end_mono if span.end_mono is not None else now
+
+        path = [max(steps, key=end)]
+        while True:
+            dependencies = [
+                by_name[name] for name in path[-1].attributes.get("dependencies", [])
+                if name in by_name
+            ]
+            if not dependencies:
+                break
+            path.append(max(dependencies, key=end))
+
+        path.reverse()
+        return path
+
+    def _elapsed(self, span: Span, now: float) -> float:
+        return (span.end_mono if span.end_mono is not None else now) - span.start_mono
+
+    def _serialize_span(self, span: Span, origin: float, now: float) -> Dict[str, Any]:
+        elapsed = self._elapsed(span, now)
+        phases = {phase: round(span.phases.get(phase, 0.0) * 1000, 2) for phase in TRACE_PHASES}
+        phases["other"] = round(max(0.0, elapsed * 1000 - sum(phases.values())), 2)
+
+        return {
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "kind": span.kind,
+            "status": span.status or "running",
+            "started_at": span.started_at.isoformat(),
+            "start_offset_ms": round((span.start_mono - origin) * 1000, 2),
+            "duration_ms": round(elapsed * 1000, 2),
+            "phases_ms": phases,
+            "attributes": span.attributes
+        }
@@ -3,17 +3,29 @@ Agent Communication Protocol
 Enables real-time communication and data sharing between agents
 """
 
+import time
 import asyncio
+import heapq
+import itertools
 import logging
 import json
 import uuid
-from typing import Dict, List, Any, Optional, Callable
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterator
+from datetime import datetime, timedelta
+from collections import deque, OrderedDict
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from config.settings import settings
+from services.message_transport import MessageTransport, InMemoryTransport, create_message_transport
+from services.shared_data_store import SharedDataStore
+from services.bus_metrics import BusMetrics
+from utils.payloads import PayloadRef, payload_store, dumps
+
 logger = logging.getLogger(__name__)
 
+RPC_ERROR_KEY = "rpc_error"  # response data key carrying a failed call's error
+
 class MessageType(Enum):
     REQUEST = "request"
     RESPONSE = "response"  
@@ -55,6 +67,7 @@ class DataShare:
     metadata: Dict[str, Any]
     created_at: datetime
     ttl_seconds: int = 3600  # 1 hour default
+    payload: Optional[PayloadRef] = None  # content-addressed handle to data (frozen, serialized once)
 
 @dataclass
 class TaskHandoff:
@@ -68,17 +81,181 @@ class TaskHandoff:
     priority: int
     deadline: Optional[datetime] = None
     handoff_reason: str = ""
+    payload: Optional[PayloadRef] = None  # content-addressed handle to task_data
+
+class AgentCallError(Exception):
+    """A call could not reach its target agent, or the agent's handler failed"""
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def message_to_dict(message: AgentMessage) -> Dict[str, Any]:
+    """Plain representation of a message for transports"""
+    return {name: _encode_value(value) for name, value in asdict(message).items()}
+
+def message_from_dict(payload: Dict[str, Any]) -> AgentMessage:
+    def parse_time(value: Optional[str]) -> Optional[datetime]:
+        return datetime.fromisoformat(value) if value else None
+    
+    return AgentMessage(**{
+        **payload,
+        "message_type": MessageType(payload["message_type"]),
+        "priority": MessagePriority(payload["priority"]),
+        "created_at": parse_time(payload["created_at"]),
+        "expires_at": parse_time(payload.get("expires_at"))
+    })
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"  # the sender never waits; a lagging subscriber loses its oldest messages
+    BLOCK = "block"  # the sender waits for room; nothing is lost
+
+class SubscriberMailbox:
+    """Bounded queue of messages for one subscriber callback, drained by its own task"""
+    
+    def __init__(self, name: str, callback: Callable, max_size: int = 1000,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 metrics: Optional[BusMetrics] = None):
+        self.name = name
+        self.metrics = metrics
+        self.callback = callback
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.messages: deque = deque()  # (enqueued_at, message)
+        self.consumer: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()  # messages are waiting
+        self._space = asyncio.Event()  # below max_size
+        self._idle = asyncio.Event()  # nothing queued or being handled
+        self._idle.set()
+        
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+    
+    async def put(self, message: AgentMessage):
+        """Queue a message for the callback"""
+        if self.consumer is None or self.consumer.done():
+            self.consumer = asyncio.get_running_loop().create_task(self._drain())
+        
+        while len(self.messages) >= self.max_size:
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                self.messages.popleft()
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.record_drop("mailbox_overflow")
+            else:
+                self._space.clear()
+                await self._space.wait()
+        
+        self.messages.append((time.monotonic(), message))
+        self._idle.clear()
+        self._ready.set()
+    
+    async def _drain(self):
+        while True:
+            if not self.messages:
+                self._idle.set()
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            
+            enqueued_at, message = self.messages.popleft()
+            self._space.set()
+            self.last_lag = time.monotonic() - enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            started = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.record_delivery("callback", message.created_at)
+            try:
+                await self.callback(message)
+                self.delivered += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error in message callback {self.name}: {e}")
+            if self.metrics is not None:
+                self.metrics.record_callback(time.monotonic() - started)
+    
+    async def stop(self, timeout: float = 5.0):
+        """Deliver what is queued (up to timeout), then stop the consumer"""
+        if self.consumer is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Subscriber {self.name} still had {len(self.messages)} messages at shutdown")
+        self.consumer.cancel()
+        self.consumer = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self.messages),
+            "lag_seconds": round(time.monotonic() - self.messages[0][0], 3) if self.messages else 0.0,
+            "last_lag_seconds": round(self.last_lag, 3),
+            "max_lag_seconds": round(self.max_lag, 3),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "overflow_policy": self.overflow_policy.value
+        }
 
 class AgentCommunicationProtocol:
-    """Manages communication between agents"""
+    """
+    Manages communication between agents
+    
+    Direct messages go to the recipient's inbox, an insertion-ordered dict keyed by
+    sequence number so expired messages can be removed individually. Broadcasts are
+    appended once to a shared log that polling agents read from their own cursors;
+    the log is trimmed up to the oldest cursor. Agents registered with a callback
+    hold no cursor (and so hold back no broadcasts) until they first poll. An
+    expiry heap removes messages as their expires_at passes, touching only those.
     
-    def __init__(self):
-        self.message_queue: Dict[str, List[AgentMessage]] = {}  # agent_id -> messages
-        self.subscriptions: Dict[str, List[Callable]] = {}  # agent_id -> callbacks
-        self.broadcast_subscriptions: List[Callable] = []
-        self.shared_data: Dict[str, DataShare] = {}
+    Subscriber callbacks run off the sender's path: every callback has a bounded
+    mailbox drained by its own task, so a slow subscriber only delays itself.
+    
+    Agents hosted by other processes are reached through the transport: messages
+    for them, broadcasts and shared data are forwarded, and what other processes
+    send arrives through _receive_remote.
+    """
+    
+    def __init__(self, max_inbox_size: int = 1000, max_broadcast_log: int = 10000,
+                 mailbox_size: int = 1000, overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 transport: Optional[MessageTransport] = None, shared_data_max_bytes: Optional[int] = None):
+        self.transport = transport or InMemoryTransport()
+        self.max_inbox_size = max_inbox_size
+        self.max_broadcast_log = max_broadcast_log
+        self.mailbox_size = mailbox_size
+        self.overflow_policy = overflow_policy
+        
+        self.inboxes: Dict[str, Dict[int, AgentMessage]] = {}  # agent_id -> unread direct messages by sequence
+        self.broadcast_log: deque = deque()  # (sequence, message), or None once expired
+        self.broadcast_log_start = 0  # broadcast number of broadcast_log[0]
+        self.broadcast_cursors: Dict[str, int] = {}  # polling agent_id -> next broadcast number to read
+        self._expiry_heap: List[tuple] = []  # (expires_at, sequence, recipient or None, broadcast number)
+        self._sequence = itertools.count()
+        
+        self.subscriptions: Dict[str, List[SubscriberMailbox]] = {}  # agent_id -> callback mailboxes
+        self.broadcast_subscriptions: List[SubscriberMailbox] = []
+        self.shared_data = SharedDataStore(max_bytes=shared_data_max_bytes)
         self.pending_handoffs: Dict[str, TaskHandoff] = {}
-        self.message_history: List[AgentMessage] = []
+        self.message_history: deque = deque(maxlen=1000)
+        self.messages_sent = 0
+        self.messages_expired = 0
+        self.messages_dropped = 0  # inbox or broadcast log overflow
+        self.messages_received_remote = 0
+        self.metrics = BusMetrics()
+        
+        self.rpc_handlers: Dict[str, Dict[str, Callable]] = {}  # agent_id -> method -> handler
+        self.pending_calls: Dict[str, asyncio.Future] = {}  # correlation_id -> future for the response
+        self.call_cache: OrderedDict = OrderedDict()  # (target, method, params JSON) -> (expires, response data)
+        self.max_call_cache = 1000
+        self.call_stats = {"calls": 0, "timeouts": 0, "errors": 0, "cache_hits": 0}
+        # Replies to calls made without a sender agent are routed to this process by this id
+        self.rpc_agent_id = f"rpc:{self.transport.node_id}"
         self.running = False
         
         logger.info("Agent Communication Protocol initialized")
@@ -86,6 +263,8 @@ class AgentCommunicationProtocol:
     async def start(self):
         """Start the communication protocol"""
         self.running = True
+        self.transport.register_agent(self.rpc_agent_id)
+        await self.transport.start(self._receive_remote)
         asyncio.create_task(self._message_processor())
         asyncio.create_task(self._cleanup_expired_data())
         logger.info("Agent Communication Protocol started")
@@ -93,23 +272,44 @@ class AgentCommunicationProtocol:
     async def stop(self):
         """Stop the communication protocol"""
         self.running = False
+        await self.transport.stop()
+        for mailbox in self._mailboxes():
+            await mailbox.stop()
         logger.info("Agent Communication Protocol stopped")
     
-    def register_agent(self, agent_id: str, callback: Optional[Callable] = None):
+    def register_agent(self, agent_id: str, callback: Optional[Callable] = None,
+                       overflow_policy: Optional[OverflowPolicy] = None):
         """Register an agent for communication"""
-        if agent_id not in self.message_queue:
-            self.message_queue[agent_id] = []
+        if agent_id not in self.inboxes:
+            self.inboxes[agent_id] = {}
+            if not callback:
+                # Agents without a callback poll; they see broadcasts sent from now on
+                self.broadcast_cursors[agent_id] = self._broadcast_log_end
+            self.transport.register_agent(agent_id)
         
         if callback:
             if agent_id not in self.subscriptions:
                 self.subscriptions[agent_id] = []
-            self.subscriptions[agent_id].append(callback)
+            self.subscriptions[agent_id].append(self._create_mailbox(
+                f"{agent_id}:{len(self.subscriptions[agent_id])}", callback, overflow_policy
+            ))
         
         logger.info(f"Registered agent {agent_id} for communication")
     
-    def subscribe_to_broadcasts(self, callback: Callable):
+    def subscribe_to_broadcasts(self, callback: Callable, overflow_policy: Optional[OverflowPolicy] = None):
         """Subscribe to broadcast messages"""
-        self.broadcast_subscriptions.append(callback)
+        self.broadcast_subscriptions.append(self._create_mailbox(
+            f"broadcast:{len(self.broadcast_subscriptions)}", callback, overflow_policy
+        ))
+    
+    def _create_mailbox(self, name: str, callback: Callable,
+                        overflow_policy: Optional[OverflowPolicy]) -> SubscriberMailbox:
+        return SubscriberMailbox(name, callback, self.mailbox_size, overflow_policy or self.overflow_policy, self.metrics)
+    
+    def _mailboxes(self) -> Iterator[SubscriberMailbox]:
+        for mailboxes in self.subscriptions.values():
+            yield from mailboxes
+        yield from self.broadcast_subscriptions
     
     async def send_message(self, message: AgentMessage) -> bool:
         """Send a message to an agent or broadcast"""
@@ -119,38 +319,29 @@ class AgentCommunicationProtocol:
             
             # Store in history
             self.message_history.append(message)
+            self.messages_sent += 1
+            self.metrics.record_sent(message.message_type.value)
             
             if message.recipient_agent:
                 # Direct message
-                if message.recipient_agent in self.message_queue:
-                    self.message_queue[message.recipient_agent].append(message)
-                    
-                    # Notify subscribers
-                    if message.recipient_agent in self.subscriptions:
-                        for callback in self.subscriptions[message.recipient_agent]:
-                            try:
-                                await callback(message)
-                            except Exception as e:
-                                logger.error(f"Error in message callback: {e}")
-                    
+                if message.message_type == MessageType.RESPONSE and self._resolve_call(message):
+                    return True
+                elif message.recipient_agent in self.inboxes:
+                    await self._deliver(message)
                     logger.info(f"Message sent from {message.sender_agent} to {message.recipient_agent}")
                     return True
+                elif await self.transport.has_agent(message.recipient_agent):
+                    await self.transport.send(message.recipient_agent, {
+                        "kind": "message", "message": message_to_dict(message)
+                    })
+                    logger.info(f"Message sent from {message.sender_agent} to remote agent {message.recipient_agent}")
+                    return True
                 else:
                     logger.warning(f"Recipient agent {message.recipient_agent} not registered")
                     return False
             else:
-                # Broadcast message
-                for agent_id, queue in self.message_queue.items():
-                    if agent_id != message.sender_agent:  # Don't send to sender
-                        queue.append(message)
-                
-                # Notify broadcast subscribers
-                for callback in self.broadcast_subscriptions:
-                    try:
-                        await callback(message)
-                    except Exception as e:
-                        logger.error(f"Error in broadcast callback: {e}")
-                
+                await self._deliver(message)
+                await self.transport.broadcast({"kind": "message", "message": message_to_dict(message)})
                 logger.info(f"Broadcast message sent from {message.sender_agent}")
                 return True
                 
@@ -158,40 +349,160 @@ class AgentCommunicationProtocol:
             logger.error(f"Error sending message: {e}")
             return False
     
+    async def _deliver(self, message: AgentMessage):
+        """Store a message for agents in this process and notify their subscribers"""
+        sequence = next(self._sequence)
+        
+        if message.recipient_agent:
+            inbox = self.inboxes.get(message.recipient_agent)
+            if inbox is None:
+                logger.warning(f"Recipient agent {message.recipient_agent} is not hosted here")
+                return
+            
+            if message.message_type == MessageType.REQUEST and message.correlation_id:
+                handler = self.rpc_handlers.get(message.recipient_agent, {}).get(message.data.get("method"))
+                if handler is not None:
+                    asyncio.get_running_loop().create_task(self._serve_call(handler, message))
+                    return
+            
+            inbox[sequence] = message
+            if len(inbox) > self.max_inbox_size:
+                del inbox[next(iter(inbox))]  # drop the oldest unread message
+                self.messages_dropped += 1
+                self.metrics.record_drop("inbox_overflow")
+            self._track_expiry(message, sequence, message.recipient_agent)
+            
+            # Notify subscribers (their mailbox tasks run the callbacks)
+            for mailbox in self.subscriptions.get(message.recipient_agent, []):
+                await mailbox.put(message)
+        else:
+            # Broadcast message: stored once, read through each agent's cursor
+            self._append_broadcast(sequence, message)
+            
+            # Notify broadcast subscribers
+            for mailbox in self.broadcast_subscriptions:
+                await mailbox.put(message)
+    
+    async def _receive_remote(self, envelope: Dict[str, Any]):
+        """Take a message or data share forwarded by another process"""
+        if envelope["kind"] == "data_share":
+            fields = dict(envelope["data_share"])
+            # Arrives as the sender's JSON; identical payloads already here are reused
+            payload = payload_store.put_serialized(fields.pop("payload"))
+            fields["created_at"] = datetime.fromisoformat(fields["created_at"])
+            self.shared_data.put(DataShare(**fields, data=payload.value, payload=payload), size=payload.size)
+            return
+        
+        message = message_from_dict(envelope["message"])
+        if message.message_type == MessageType.RESPONSE and self._resolve_call(message):
+            return
+        if message.message_type == MessageType.TASK_HANDOFF:
+            # The handoff lives with its target agent, which is hosted here
+            data = message.data
+            payload = payload_store.put(data["task_data"])
+            self.pending_handoffs[data["handoff_id"]] = TaskHandoff(
+                id=data["handoff_id"],
+                source_agent=message.sender_agent,
+                target_agent=message.recipient_agent,
+                task_type=data["task_type"],
+                task_data=payload.value,
+                context=data["context"],
+                priority=data["priority"],
+                deadline=datetime.fromisoformat(data["deadline"]) if data.get("deadline") else None,
+                handoff_reason=data.get("handoff_reason", ""),
+                payload=payload
+            )
+        
+        self.messages_received_remote += 1
+        await self._deliver(message)
+    
+    @property
+    def _broadcast_log_end(self) -> int:
+        return self.broadcast_log_start + len(self.broadcast_log)
+    
+    def _append_broadcast(self, sequence: int, message: AgentMessage):
+        broadcast_number = self._broadcast_log_end
+        self.broadcast_log.append((sequence, message))
+        self._track_expiry(message, sequence, None, broadcast_number)
+        
+        if len(self.broadcast_log) > self.max_broadcast_log:
+            self._trim_broadcast_log()
+        if len(self.broadcast_log) > self.max_broadcast_log:
+            # Agents that have not read this far lose the oldest broadcast
+            self.broadcast_log.popleft()
+            self.broadcast_log_start += 1
+            self.messages_dropped += 1
+            self.metrics.record_drop("broadcast_log_overflow")
+    
+    def _track_expiry(self, message: AgentMessage, sequence: int, recipient: Optional[str],
+                      broadcast_number: Optional[int] = None):
+        if message.expires_at is not None:
+            heapq.heappush(self._expiry_heap, (message.expires_at, sequence, recipient, broadcast_number))
+    
+    def _unread(self, agent_id: str) -> Iterator[AgentMessage]:
+        """Unread direct messages and broadcasts for an agent, oldest first"""
+        now = datetime.utcnow()
+        cursor = max(self.broadcast_cursors.get(agent_id, self._broadcast_log_end), self.broadcast_log_start)
+        broadcasts = (
+            entry for entry in itertools.islice(self.broadcast_log, cursor - self.broadcast_log_start, None)
+            if entry is not None and entry[1].sender_agent != agent_id  # Don't send to sender
+        )
+        for _, message in heapq.merge(self.inboxes.get(agent_id, {}).items(), broadcasts, key=lambda entry: entry[0]):
+            # Expiry is processed in the background; skip anything that expired since
+            if not message.expires_at or message.expires_at > now:
+                yield message
+    
     async def get_messages(self, agent_id: str, limit: int = 10) -> List[AgentMessage]:
         """Get messages for an agent"""
-        if agent_id not in self.message_queue:
+        if agent_id not in self.inboxes:
             return []
         
-        messages = self.message_queue[agent_id][-limit:]
-        return messages
+        return list(deque(self._unread(agent_id), maxlen=limit))
     
     async def get_unread_messages(self, agent_id: str) -> List[AgentMessage]:
         """Get unread messages for an agent"""
-        if agent_id not in self.message_queue:
+        if agent_id not in self.inboxes:
             return []
         
-        # For now, return all messages (in production, track read status)
-        messages = self.message_queue[agent_id].copy()
-        # Clear the queue after retrieving
-        self.message_queue[agent_id] = []
+        messages = list(self._unread(agent_id))
+        for message in messages:
+            self.metrics.record_delivery("inbox", message.created_at)
+        # Mark everything read: clear the inbox and move the broadcast cursor to the end
+        self.inboxes[agent_id] = {}
+        self.broadcast_cursors[agent_id] = self._broadcast_log_end
         return messages
     
     async def share_data(self, source_agent: str, data_type: str, data: Any, 
                         metadata: Optional[Dict[str, Any]] = None, ttl_seconds: int = 3600) -> str:
         """Share data that other agents can access"""
         
+        # Frozen and serialized once; every consumer gets the same object and JSON
+        payload = payload_store.put(data)
         data_share = DataShare(
             id=str(uuid.uuid4()),
             source_agent=source_agent,
             data_type=data_type,
-            data=data,
+            data=payload.value,
             metadata=metadata or {},
             created_at=datetime.utcnow(),
-            ttl_seconds=ttl_seconds
+            ttl_seconds=ttl_seconds,
+            payload=payload
         )
         
-        self.shared_data[data_share.id] = data_share
+        self.shared_data.put(data_share, size=payload.size)
+        # Sent ahead of the notification, so other processes hold the data when they see it
+        await self.transport.broadcast({
+            "kind": "data_share",
+            "data_share": {
+                "id": data_share.id,
+                "source_agent": source_agent,
+                "data_type": data_type,
+                "metadata": data_share.metadata,
+                "created_at": data_share.created_at.isoformat(),
+                "ttl_seconds": ttl_seconds,
+                "payload": payload.serialized
+            }
+        })
         
         # Notify other agents about data sharing
         notification = AgentMessage(
@@ -220,12 +531,7 @@ class AgentCommunicationProtocol:
     
     def get_shared_data_by_type(self, data_type: str, source_agent: Optional[str] = None) -> List[DataShare]:
         """Get shared data by type and optionally by source agent"""
-        results = []
-        for data_share in self.shared_data.values():
-            if data_share.data_type == data_type:
-                if source_agent is None or data_share.source_agent == source_agent:
-                    results.append(data_share)
-        return results
+        return self.shared_data.find(data_type, source_agent)
     
     async def handoff_task(self, source_agent: str, target_agent: str, task_type: str,
                           task_data: Dict[str, Any], context: Dict[str, Any], 
@@ -233,19 +539,24 @@ class AgentCommunicationProtocol:
                           handoff_reason: str = "") -> str:
         """Hand off a task from one agent to another"""
         
+        # The handoff, its message and the task built from it share one frozen task_data
+        payload = payload_store.put(task_data)
         handoff = TaskHandoff(
             id=str(uuid.uuid4()),
             source_agent=source_agent,
             target_agent=target_agent,
             task_type=task_type,
-            task_data=task_data,
+            task_data=payload.value,
             context=context,
             priority=priority,
             deadline=deadline,
-            handoff_reason=handoff_reason
+            handoff_reason=handoff_reason,
+            payload=payload
         )
         
-        self.pending_handoffs[handoff.id] = handoff
+        if target_agent in self.inboxes:
+            # A remote target's process records the handoff when the message arrives
+            self.pending_handoffs[handoff.id] = handoff
         
         # Send handoff message
         message = AgentMessage(
@@ -257,7 +568,8 @@ class AgentCommunicationProtocol:
             data={
                 "handoff_id": handoff.id,
                 "task_type": task_type,
-                "task_data": task_data,
+                "task_data": payload.value,
+                "payload_digest": payload.digest,
                 "context": context,
                 "priority": priority,
                 "deadline": deadline.isoformat() if deadline else None,
@@ -341,19 +653,99 @@ class AgentCommunicationProtocol:
         
         await self.send_message(message)
     
+    def register_handler(self, agent_id: str, method: str, handler: Callable):
+        """Serve calls to an agent's method: handler(params) is awaited and its result returned to the caller"""
+        self.rpc_handlers.setdefault(agent_id, {})[method] = handler
+    
+    async def call(self, target_agent: str, method: str, payload: Optional[Dict[str, Any]] = None,
+                   timeout: float = 30.0, sender_agent: Optional[str] = None,
+                   cache_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Call a method on an agent and wait for its response data
+        
+        The target answers through a handler from register_handler or, without one,
+        with respond_to_request on the request it finds in its inbox. With cache_ttl,
+        responses are reused for identical calls for that many seconds. Raises
+        asyncio.TimeoutError if no response arrives in time, AgentCallError if the
+        agent is unknown or its handler failed.
+        """
+        cache_key = None
+        if cache_ttl:
+            cache_key = (target_agent, method, dumps(payload or {}))
+            cached = self.call_cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                self.call_stats["cache_hits"] += 1
+                return cached[1]
+        
+        self.call_stats["calls"] += 1
+        correlation_id = str(uuid.uuid4())
+        future = asyncio.get_running_loop().create_future()
+        self.pending_calls[correlation_id] = future
+        
+        message = AgentMessage(
+            id=str(uuid.uuid4()),
+            message_type=MessageType.REQUEST,
+            sender_agent=sender_agent or self.rpc_agent_id,
+            recipient_agent=target_agent,
+            subject=f"Call: {method}",
+            data={"method": method, "params": payload or {}},
+            priority=MessagePriority.HIGH,
+            created_at=datetime.utcnow(),
+            expires_at=datetime.utcnow() + timedelta(seconds=timeout),
+            correlation_id=correlation_id
+        )
+        
+        try:
+            if not await self.send_message(message):
+                raise AgentCallError(f"Agent {target_agent} is not reachable")
+            response = await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.call_stats["timeouts"] += 1
+            logger.warning(f"Call {method} to {target_agent} timed out after {timeout}s")
+            raise
+        finally:
+            self.pending_calls.pop(correlation_id, None)
+        
+        if RPC_ERROR_KEY in response.data:
+            self.call_stats["errors"] += 1
+            raise AgentCallError(f"{target_agent}.{method} failed: {response.data[RPC_ERROR_KEY]}")
+        
+        if cache_key is not None:
+            self.call_cache[cache_key] = (time.monotonic() + cache_ttl, response.data)
+            self.call_cache.move_to_end(cache_key)
+            if len(self.call_cache) > self.max_call_cache:
+                self.call_cache.popitem(last=False)
+        return response.data
+    
+    def _resolve_call(self, message: AgentMessage) -> bool:
+        """Hand a response to the call waiting for it; False if it is not for a call made here"""
+        future = self.pending_calls.get(message.correlation_id)
+        if future is None:
+            if message.recipient_agent == self.rpc_agent_id:
+                logger.debug(f"Discarding response {message.correlation_id} that arrived after its call ended")
+                return True
+            return False
+        if not future.done():
+            future.set_result(message)
+        return True
+    
+    async def _serve_call(self, handler: Callable, message: AgentMessage):
+        try:
+            result = await handler(message.data.get("params", {}))
+            response_data = result if isinstance(result, dict) else {"result": result}
+        except Exception as e:
+            logger.error(f"Handler for {message.recipient_agent}.{message.data.get('method')} failed: {e}")
+            response_data = {RPC_ERROR_KEY: str(e)}
+        
+        await self.respond_to_request(message.recipient_agent, message.sender_agent,
+                                      message.correlation_id, response_data)
+    
     async def _message_processor(self):
         """Background task to process messages"""
         while self.running:
             try:
-                # Clean up expired messages
-                current_time = datetime.utcnow()
-                
-                for agent_id, messages in self.message_queue.items():
-                    # Remove expired messages
-                    self.message_queue[agent_id] = [
-                        msg for msg in messages 
-                        if not msg.expires_at or msg.expires_at > current_time
-                    ]
+                self._expire_messages(datetime.utcnow())
+                self._trim_broadcast_log()
                 
                 await asyncio.sleep(10)  # Process every 10 seconds
                 
@@ -361,55 +753,93 @@ class AgentCommunicationProtocol:
                 logger.error(f"Error in message processor: {e}")
                 await asyncio.sleep(10)
     
+    def _expire_messages(self, now: datetime):
+        """Remove messages whose expires_at has passed, visiting only those"""
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, sequence, recipient, broadcast_number = heapq.heappop(self._expiry_heap)
+            if recipient is not None:
+                if self.inboxes.get(recipient, {}).pop(sequence, None) is not None:
+                    self.messages_expired += 1
+                    self.metrics.record_drop("expired")
+            elif broadcast_number >= self.broadcast_log_start:
+                self.broadcast_log[broadcast_number - self.broadcast_log_start] = None
+                self.messages_expired += 1
+                self.metrics.record_drop("expired")
+    
+    def _trim_broadcast_log(self):
+        """Drop broadcasts every agent has read (and expired ones at the head)"""
+        oldest_cursor = min(self.broadcast_cursors.values(), default=self._broadcast_log_end)
+        while self.broadcast_log and (self.broadcast_log_start < oldest_cursor or self.broadcast_log[0] is None):
+            self.broadcast_log.popleft()
+            self.broadcast_log_start += 1
+    
     async def _cleanup_expired_data(self):
         """Clean up expired shared data"""
         while self.running:
             try:
-                current_time = datetime.utcnow()
-                
-                # Clean up expired shared data
-                expired_ids = []
-                for data_id, data_share in self.shared_data.items():
-                    age_seconds = (current_time - data_share.created_at).total_seconds()
-                    if age_seconds > data_share.ttl_seconds:
-                        expired_ids.append(data_id)
-                
-                for data_id in expired_ids:
-                    del self.shared_data[data_id]
+                # The timing wheel hands back only the entries that are due
+                expired = self.shared_data.expire()
+                if expired:
+                    logger.debug(f"Cleaned up {expired} expired data shares")
                 
-                if expired_ids:
-                    logger.info(f"Cleaned up {len(expired_ids)} expired data shares")
-                
-                # Clean up old message history (keep last 1000 messages)
-                if len(self.message_history) > 1000:
-                    self.message_history = self.message_history[-1000:]
-                
-                await asyncio.sleep(300)  # Clean up every 5 minutes
+                await asyncio.sleep(self.shared_data.wheel.tick)
                 
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
-                await asyncio.sleep(300)
+                await asyncio.sleep(self.shared_data.wheel.tick)
+    
+    def _agent_queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Unread messages per agent and the age of the oldest one"""
+        now = datetime.utcnow()
+        stats = {}
+        for agent_id, inbox in self.inboxes.items():
+            cursor = max(self.broadcast_cursors.get(agent_id, self._broadcast_log_end), self.broadcast_log_start)
+            oldest = [next(iter(inbox.values())).created_at] if inbox else []
+            oldest_broadcast = next((entry[1] for entry in itertools.islice(
+                self.broadcast_log, cursor - self.broadcast_log_start, None) if entry is not None), None)
+            if oldest_broadcast is not None:
+                oldest.append(oldest_broadcast.created_at)
+            
+            stats[agent_id] = {
+                "unread_direct": len(inbox),
+                "unread_broadcasts": self._broadcast_log_end - cursor,  # includes its own and expired ones
+                "oldest_unread_age_seconds": round((now - min(oldest)).total_seconds(), 3) if oldest else 0.0
+            }
+        return stats
     
     def get_communication_stats(self) -> Dict[str, Any]:
         """Get communication statistics"""
-        total_messages = len(self.message_history)
         message_types = {}
         
-        for msg in self.message_history[-100:]:  # Last 100 messages
+        for msg in itertools.islice(reversed(self.message_history), 100):  # Last 100 messages
             msg_type = msg.message_type.value
             message_types[msg_type] = message_types.get(msg_type, 0) + 1
         
         return {
-            "total_messages": total_messages,
-            "active_agents": len(self.message_queue),
+            "total_messages": self.messages_sent,
+            "active_agents": len(self.inboxes),
+            "unread_direct_messages": sum(len(inbox) for inbox in self.inboxes.values()),
+            "broadcast_log_size": len(self.broadcast_log),
+            "expired_messages": self.messages_expired,
+            "dropped_messages": self.messages_dropped,
             "shared_data_items": len(self.shared_data),
+            "shared_data": self.shared_data.get_stats(),
+            "payloads": payload_store.get_stats(),
+            "calls": {**self.call_stats, "pending": len(self.pending_calls)},
             "pending_handoffs": len(self.pending_handoffs),
             "message_types_last_100": message_types,
-            "broadcast_subscribers": len(self.broadcast_subscriptions)
+            "broadcast_subscribers": len(self.broadcast_subscriptions),
+            "subscribers": {mailbox.name: mailbox.get_stats() for mailbox in self._mailboxes()},
+            "received_remote": self.messages_received_remote,
+            "transport": self.transport.get_stats(),
+            "bus": {**self.metrics.snapshot(), "agent_queues": self._agent_queue_stats()}
         }
 
 # Global communication protocol instance
-communication_protocol = AgentCommunicationProtocol()
+communication_protocol = AgentCommunicationProtocol(
+    transport=create_message_transport(settings),
+    shared_data_max_bytes=settings.shared_data_max_bytes
+)
 
 # Helper functions for agents
 async def send_agent_message(sender: str, recipient: str, subject: str, 
@@ -450,3 +880,8 @@ async def get_agent_data(data_type: str, source_agent: Optional[str] = None):
     """Helper function to get shared data"""
     return communication_protocol.get_shared_data_by_type(data_type, source_agent)
 
+async def call_agent(target: str, method: str, payload: Optional[Dict[str, Any]] = None,
+                     timeout: float = 30.0, sender: Optional[str] = None) -> Dict[str, Any]:
+    """Helper function to call a method on an agent and wait for the response"""
+    return await communication_protocol.call(target, method, payload, timeout=timeout, sender_agent=sender)
+
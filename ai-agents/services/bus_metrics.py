@@ -0,0 +1,130 @@
+"""
+Communication Bus Metrics
+Throughput, delivery latency, callback time and drop counts for the agent communication protocol
+"""
+
+import time
+import bisect
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds; quantiles are bucket upper bounds"""
+
+    DEFAULT_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket: above every bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        value = max(0.0, value)
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": {
+                **{f"le_{bound * 1000:g}ms": count for bound, count in zip(self.bounds, self.counts)},
+                "inf": self.counts[-1]
+            }
+        }
+
+class RateWindow:
+    """Event counts per key in one-second buckets over a sliding window"""
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.buckets: deque = deque()  # (second, {key: count})
+        self.started = time.monotonic()
+
+    def add(self, key: str, now: Optional[float] = None):
+        second = int(now if now is not None else time.monotonic())
+        if not self.buckets or self.buckets[-1][0] != second:
+            self.buckets.append((second, {}))
+            self._trim(second)
+        counts = self.buckets[-1][1]
+        counts[key] = counts.get(key, 0) + 1
+
+    def _trim(self, second: int):
+        while self.buckets and self.buckets[0][0] <= second - self.window:
+            self.buckets.popleft()
+
+    def rates(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Events per second by key, averaged over the window (or the uptime, if shorter)"""
+        now = now if now is not None else time.monotonic()
+        self._trim(int(now))
+        span = min(self.window, max(1.0, now - self.started))
+        totals: Dict[str, int] = {}
+        for _, counts in self.buckets:
+            for key, count in counts.items():
+                totals[key] = totals.get(key, 0) + count
+        return {key: round(count / span, 3) for key, count in totals.items()}
+
+class BusMetrics:
+    """
+    Instrumentation for the communication protocol
+
+    Delivery latency is the time from send_message to a subscriber callback starting
+    ("callback") or to the agent reading the message ("inbox"). Messages from other
+    processes are measured from their sender's clock.
+    """
+
+    DELIVERY_PATHS = ("callback", "inbox")
+
+    def __init__(self, rate_window: int = 60):
+        self.sent = RateWindow(rate_window)
+        self.sent_totals: Dict[str, int] = {}  # message type -> count
+        self.delivery_latency = {path: Histogram() for path in self.DELIVERY_PATHS}
+        self.callback_duration = Histogram()
+        self.drops: Dict[str, int] = {}  # reason -> count
+
+    def record_sent(self, message_type: str):
+        self.sent.add(message_type)
+        self.sent_totals[message_type] = self.sent_totals.get(message_type, 0) + 1
+
+    def record_delivery(self, path: str, created_at: datetime):
+        self.delivery_latency[path].observe((datetime.utcnow() - created_at).total_seconds())
+
+    def record_callback(self, seconds: float):
+        self.callback_duration.observe(seconds)
+
+    def record_drop(self, reason: str, count: int = 1):
+        self.drops[reason] = self.drops.get(reason, 0) + count
+
+    def snapshot(self) -> Dict[str, Any]:
+        rates = self.sent.rates()
+        return {
+            "messages_per_second": round(sum(rates.values()), 3),
+            "messages_per_second_by_type": rates,
+            "sent_by_type": dict(self.sent_totals),
+            "delivery_latency": {path: histogram.snapshot() for path, histogram in self.delivery_latency.items()},
+            "callback_duration": self.callback_duration.snapshot(),
+            "drops": dict(self.drops)
+        }
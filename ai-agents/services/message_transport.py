@@ -0,0 +1,351 @@
+"""
+Agent Message Transport
+Carries agent messages, shared data and task handoffs between the processes that host agents
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+
+try:
+    import msgpack
+except ImportError:  # JSON is used instead
+    msgpack = None
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed for the Redis transport
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+def pack_envelopes(envelopes: List[Dict[str, Any]]) -> bytes:
+    """Serialize a batch of envelopes; the first byte names the codec so mixed deployments interoperate"""
+    if msgpack is not None:
+        return b"m" + msgpack.packb(envelopes, default=str, use_bin_type=True)
+    return b"j" + json.dumps(envelopes, default=str).encode()
+
+def unpack_envelopes(data: bytes) -> List[Dict[str, Any]]:
+    codec, body = data[:1], data[1:]
+    if codec == b"m":
+        if msgpack is None:
+            raise RuntimeError("Received a msgpack batch but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+class MessageTransport(ABC):
+    """
+    Moves envelopes between communication protocol instances in different processes
+
+    Envelopes are dicts ({"kind": "message" | "data_share", ...}). Each process
+    delivers what it receives to its local protocol through the deliver callback.
+    """
+
+    name = "base"
+    distributed = False
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._deliver: Optional[Callable[[Dict[str, Any]], Awaitable]] = None
+        self.stats = {"sent": 0, "received": 0, "batches_sent": 0, "batches_received": 0}
+
+    async def start(self, deliver: Callable[[Dict[str, Any]], Awaitable]):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    def register_agent(self, agent_id: str):
+        """An agent now lives in this process"""
+
+    def unregister_agent(self, agent_id: str):
+        pass
+
+    async def has_agent(self, agent_id: str) -> bool:
+        """Whether another process hosts the agent"""
+        return False
+
+    @abstractmethod
+    async def send(self, agent_id: str, envelope: Dict[str, Any]):
+        """Deliver an envelope to the process hosting an agent"""
+
+    @abstractmethod
+    async def broadcast(self, envelope: Dict[str, Any]):
+        """Deliver an envelope to every other process"""
+
+    async def _receive(self, data: bytes):
+        self.stats["batches_received"] += 1
+        for envelope in unpack_envelopes(data):
+            if envelope.get("origin") == self.node_id:
+                continue  # our own broadcast
+            self.stats["received"] += 1
+            try:
+                await self._deliver(envelope)
+            except Exception as e:
+                logger.error(f"Error delivering {envelope.get('kind')} envelope from {envelope.get('origin')}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"transport": self.name, "node_id": self.node_id, **self.stats}
+
+class LocalHub:
+    """Joins InMemoryTransports in one process, standing in for Redis when testing multi-process messaging"""
+
+    def __init__(self):
+        self.nodes: Dict[str, "InMemoryTransport"] = {}
+        self.agents: Dict[str, str] = {}  # agent_id -> node_id
+
+class InMemoryTransport(MessageTransport):
+    """
+    Keeps messages inside the process (the default)
+
+    Given a LocalHub, several protocol instances exchange envelopes through it,
+    serialized exactly as the Redis transport would.
+    """
+
+    name = "memory"
+
+    def __init__(self, hub: Optional[LocalHub] = None, node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.hub = hub
+        if hub is not None:
+            self.distributed = True
+
+    async def start(self, deliver: Callable[[Dict[str, Any]], Awaitable]):
+        await super().start(deliver)
+        if self.hub is not None:
+            self.hub.nodes[self.node_id] = self
+
+    async def stop(self):
+        if self.hub is not None:
+            self.hub.nodes.pop(self.node_id, None)
+
+    def register_agent(self, agent_id: str):
+        if self.hub is not None:
+            self.hub.agents[agent_id] = self.node_id
+
+    def unregister_agent(self, agent_id: str):
+        if self.hub is not None and self.hub.agents.get(agent_id) == self.node_id:
+            del self.hub.agents[agent_id]
+
+    async def has_agent(self, agent_id: str) -> bool:
+        return self.hub is not None and self.hub.agents.get(agent_id, self.node_id) != self.node_id
+
+    async def send(self, agent_id: str, envelope: Dict[str, Any]):
+        node = self.hub.nodes.get(self.hub.agents.get(agent_id)) if self.hub is not None else None
+        if node is not None:
+            self._transmit(node, envelope)
+
+    async def broadcast(self, envelope: Dict[str, Any]):
+        if self.hub is None:
+            return
+        for node in list(self.hub.nodes.values()):
+            if node is not self:
+                self._transmit(node, envelope)
+
+    def _transmit(self, node: "InMemoryTransport", envelope: Dict[str, Any]):
+        envelope = {**envelope, "origin": self.node_id}
+        self.stats["sent"] += 1
+        self.stats["batches_sent"] += 1
+        # Delivered on a later loop iteration, like a network hop
+        asyncio.get_running_loop().create_task(node._receive(pack_envelopes([envelope])))
+
+class RedisMessageTransport(MessageTransport):
+    """
+    Redis transport for agents spread over processes and hosts
+
+    Direct messages go to a stream per agent, so they wait for a recipient whose
+    process is restarting; entries are deleted once delivered. Broadcasts and shared
+    data go over one pub/sub channel. A hash maps agent ids to the node hosting them.
+    Outgoing envelopes are buffered per destination and written in one pipeline per
+    batch_interval (or as soon as batch_size envelopes are waiting).
+    """
+
+    name = "redis"
+    distributed = True
+
+    def __init__(self, redis_url: str, prefix: str = "ai_agents", node_id: Optional[str] = None,
+                 batch_size: int = 100, batch_interval: float = 0.005, max_stream_length: int = 10000,
+                 directory_ttl: float = 30.0, client: Optional[Any] = None):
+        if client is None and aioredis is None:
+            raise ImportError("The redis package is required for the Redis message transport")
+
+        super().__init__(node_id)
+        # `client` lets tests pass a fakeredis instance; payloads are binary
+        self.client = client or aioredis.from_url(redis_url, decode_responses=False)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_stream_length = max_stream_length
+        self.directory_ttl = directory_ttl
+
+        self.directory_key = f"{prefix}:agents"
+        self.broadcast_channel = f"{prefix}:broadcast"
+        self.local_agents: Dict[str, str] = {}  # agent_id -> last stream entry id read
+        self._known_remote: Dict[str, float] = {}  # agent_id -> cache expiry
+        self._outbox: Dict[str, List[Dict[str, Any]]] = {}  # stream key or channel -> envelopes
+        self._outbox_size = 0
+        self._flush_wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._pubsub = None
+        self._tasks: List[asyncio.Task] = []
+        self.running = False
+
+    def _inbox_stream(self, agent_id: str) -> str:
+        return f"{self.prefix}:inbox:{agent_id}"
+
+    async def start(self, deliver: Callable[[Dict[str, Any]], Awaitable]):
+        await super().start(deliver)
+        self.running = True
+
+        if self.local_agents:
+            await self.client.hset(self.directory_key, mapping={agent_id: self.node_id for agent_id in self.local_agents})
+
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.broadcast_channel)
+
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._flush_loop()),
+            loop.create_task(self._read_broadcasts()),
+            loop.create_task(self._read_inboxes())
+        ]
+        logger.info(f"Redis message transport started as {self.node_id}")
+
+    async def stop(self):
+        self.running = False
+        await self._flush()
+        for task in self._tasks:
+            task.cancel()
+        try:
+            if self.local_agents:
+                await self.client.hdel(self.directory_key, *self.local_agents)
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(self.broadcast_channel)
+                await self._pubsub.close()
+            await self.client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Redis message transport: {e}")
+
+    def register_agent(self, agent_id: str):
+        # Start from the beginning of the stream: anything still there was never delivered
+        self.local_agents.setdefault(agent_id, "0-0")
+        if self.running:
+            asyncio.get_running_loop().create_task(self.client.hset(self.directory_key, agent_id, self.node_id))
+
+    def unregister_agent(self, agent_id: str):
+        if self.local_agents.pop(agent_id, None) is not None and self.running:
+            asyncio.get_running_loop().create_task(self.client.hdel(self.directory_key, agent_id))
+
+    async def has_agent(self, agent_id: str) -> bool:
+        if self._known_remote.get(agent_id, 0.0) > time.monotonic():
+            return True
+        node = await self.client.hget(self.directory_key, agent_id)
+        if node is None or node.decode() == self.node_id:
+            return False
+        self._known_remote[agent_id] = time.monotonic() + self.directory_ttl
+        return True
+
+    async def send(self, agent_id: str, envelope: Dict[str, Any]):
+        await self._buffer(self._inbox_stream(agent_id), envelope)
+
+    async def broadcast(self, envelope: Dict[str, Any]):
+        await self._buffer(self.broadcast_channel, envelope)
+
+    async def _buffer(self, destination: str, envelope: Dict[str, Any]):
+        self._outbox.setdefault(destination, []).append({**envelope, "origin": self.node_id})
+        self._outbox_size += 1
+        if self._outbox_size >= self.batch_size:
+            await self._flush()
+        else:
+            self._flush_wakeup.set()
+
+    async def _flush_loop(self):
+        while self.running:
+            try:
+                await self._flush_wakeup.wait()
+                self._flush_wakeup.clear()
+                await asyncio.sleep(self.batch_interval)  # let the batch fill
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Error flushing message batches: {e}")
+                await asyncio.sleep(1)
+
+    async def _flush(self):
+        async with self._flush_lock:
+            if not self._outbox:
+                return
+            outbox, self._outbox, self._outbox_size = self._outbox, {}, 0
+
+            pipeline = self.client.pipeline(transaction=False)
+            for destination, envelopes in outbox.items():
+                payload = pack_envelopes(envelopes)
+                if destination == self.broadcast_channel:
+                    pipeline.publish(destination, payload)
+                else:
+                    pipeline.xadd(destination, {"batch": payload}, maxlen=self.max_stream_length, approximate=True)
+            try:
+                await pipeline.execute()
+            except Exception:
+                # Put the batch back ahead of anything buffered since; the next flush retries it
+                # (destinations the pipeline did reach get those envelopes twice)
+                for destination, envelopes in outbox.items():
+                    self._outbox[destination] = envelopes + self._outbox.get(destination, [])
+                    self._outbox_size += len(envelopes)
+                self._flush_wakeup.set()
+                raise
+            self.stats["sent"] += sum(len(envelopes) for envelopes in outbox.values())
+            self.stats["batches_sent"] += len(outbox)
+
+    async def _read_broadcasts(self):
+        while self.running:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    await self._receive(message["data"])
+            except Exception as e:
+                logger.error(f"Error reading broadcast channel: {e}")
+                await asyncio.sleep(1)
+
+    async def _read_inboxes(self):
+        while self.running:
+            try:
+                if not self.local_agents:
+                    await asyncio.sleep(1)
+                    continue
+
+                streams = {self._inbox_stream(agent_id): last_id for agent_id, last_id in self.local_agents.items()}
+                entries = await self.client.xread(streams, count=100, block=1000)
+                for stream, messages in entries or []:
+                    stream = stream.decode() if isinstance(stream, bytes) else stream
+                    agent_id = stream[len(self._inbox_stream("")):]
+                    for entry_id, fields in messages:
+                        await self._receive(fields[b"batch"])
+                        if agent_id in self.local_agents:
+                            self.local_agents[agent_id] = entry_id
+                    await self.client.xdel(stream, *[entry_id for entry_id, _ in messages])
+            except Exception as e:
+                logger.error(f"Error reading agent inboxes: {e}")
+                await asyncio.sleep(1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "local_agents": len(self.local_agents),
+            "buffered": self._outbox_size
+        }
+
+def create_message_transport(settings) -> MessageTransport:
+    """Transport selected by settings.message_transport ("memory" or "redis")"""
+    if settings.message_transport == "redis":
+        return RedisMessageTransport(
+            settings.redis_url,
+            prefix=settings.task_queue_name,
+            batch_size=settings.message_transport_batch_size,
+            batch_interval=settings.message_transport_batch_interval
+        )
+    return InMemoryTransport()
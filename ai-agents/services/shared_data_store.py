@@ -0,0 +1,199 @@
+"""
+Shared Data Store
+Data shared between agents, indexed by type and source, expired by a timing wheel and bounded in size
+"""
+
+import json
+import math
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(data: Any) -> int:
+    """Approximate payload size in bytes, as it would be serialized"""
+    return len(json.dumps(data, default=str))
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel of expiry deadlines
+
+    Level 0 has one slot per tick; each slot of level n spans slots**n ticks. A key
+    goes in the lowest level whose range covers its deadline and moves down a level
+    whenever the wheel below completes a turn, so advancing costs O(1) per tick plus
+    the keys that are due. Cancelled and rescheduled keys are skipped lazily.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels: List[List[set]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.current_tick = int(time.monotonic() // tick)
+        self.deadlines: Dict[str, int] = {}  # key -> deadline tick
+
+    def schedule(self, key: str, deadline: float):
+        """Expire key at the monotonic time deadline (rounded up to a tick)"""
+        deadline_tick = max(math.ceil(deadline / self.tick), self.current_tick + 1)
+        self.deadlines[key] = deadline_tick
+        self._place(key, deadline_tick)
+
+    def cancel(self, key: str):
+        self.deadlines.pop(key, None)
+
+    def _place(self, key: str, deadline_tick: int):
+        delta = deadline_tick - self.current_tick
+        for level in range(self.levels):
+            span = self.slots ** level
+            if delta < span * self.slots or level == self.levels - 1:
+                self.wheels[level][(deadline_tick // span) % self.slots].add(key)
+                return
+
+    def advance(self, now: Optional[float] = None) -> List[str]:
+        """Move the wheel to now; returns the keys that expired"""
+        target = int((now if now is not None else time.monotonic()) // self.tick)
+        expired = []
+        while self.current_tick < target:
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Cascade slots of higher levels whose span starts at this tick
+            for level in range(1, self.levels):
+                span = self.slots ** level
+                if tick % span:
+                    break
+                slot = (tick // span) % self.slots
+                keys, self.wheels[level][slot] = self.wheels[level][slot], set()
+                for key in keys:
+                    deadline_tick = self.deadlines.get(key)
+                    if deadline_tick is not None:
+                        self._place(key, deadline_tick)
+
+            slot = tick % self.slots
+            keys, self.wheels[0][slot] = self.wheels[0][slot], set()
+            for key in keys:
+                deadline_tick = self.deadlines.get(key)
+                if deadline_tick is not None and deadline_tick <= tick:
+                    del self.deadlines[key]
+                    expired.append(key)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+class SharedDataStore:
+    """
+    DataShare entries with O(1) lookup by id, data type, and (data type, source agent)
+
+    Each entry expires exactly when its TTL runs out (at tick resolution) through the
+    timing wheel, and reads never return expired entries. With max_bytes set, the
+    least recently used entries are evicted once the estimated total size exceeds it.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, tick: float = 1.0):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()  # id -> DataShare, least recently used first
+        self.expires_at: Dict[str, float] = {}  # id -> monotonic expiry
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.by_type: Dict[str, Dict[str, None]] = {}  # data_type -> ids, oldest first
+        self.by_source: Dict[Tuple[str, str], Dict[str, None]] = {}  # (data_type, source_agent) -> ids
+        self.wheel = TimingWheel(tick=tick)
+
+        self.expired = 0
+        self.evicted = 0
+
+    def put(self, data_share, size: Optional[int] = None):
+        """Store a DataShare; its TTL counts from created_at"""
+        if data_share.id in self.entries:
+            self.remove(data_share.id)
+
+        age = (datetime.utcnow() - data_share.created_at).total_seconds()
+        expires_at = time.monotonic() + data_share.ttl_seconds - max(0.0, age)
+        size = size if size is not None else estimate_size(data_share.data)
+
+        self.entries[data_share.id] = data_share
+        self.expires_at[data_share.id] = expires_at
+        self.sizes[data_share.id] = size
+        self.total_bytes += size
+        self.by_type.setdefault(data_share.data_type, {})[data_share.id] = None
+        self.by_source.setdefault((data_share.data_type, data_share.source_agent), {})[data_share.id] = None
+        self.wheel.schedule(data_share.id, expires_at)
+
+        if self.max_bytes is not None:
+            self._evict(keep=data_share.id)
+
+    def _evict(self, keep: str):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            data_id = next(iter(self.entries))
+            if data_id == keep:
+                # Only older entries are evicted for a new one
+                logger.warning(f"Shared data {keep} alone exceeds the {self.max_bytes} byte limit")
+                break
+            self.remove(data_id)
+            self.evicted += 1
+
+    def get(self, data_id: str):
+        data_share = self.entries.get(data_id)
+        if data_share is None or self._is_expired(data_id):
+            return None
+        self.entries.move_to_end(data_id)
+        return data_share
+
+    def find(self, data_type: str, source_agent: Optional[str] = None) -> List[Any]:
+        """Live entries of a type (optionally from one source agent), oldest first"""
+        ids = self.by_type.get(data_type) if source_agent is None else self.by_source.get((data_type, source_agent))
+        results = []
+        for data_id in list(ids or ()):
+            if not self._is_expired(data_id):
+                self.entries.move_to_end(data_id)
+                results.append(self.entries[data_id])
+        return results
+
+    def _is_expired(self, data_id: str) -> bool:
+        # The wheel removes entries at tick resolution; this covers the time in between
+        return self.expires_at[data_id] <= time.monotonic()
+
+    def remove(self, data_id: str) -> bool:
+        data_share = self.entries.pop(data_id, None)
+        if data_share is None:
+            return False
+
+        del self.expires_at[data_id]
+        self.total_bytes -= self.sizes.pop(data_id)
+        self.wheel.cancel(data_id)
+        for index, key in ((self.by_type, data_share.data_type),
+                           (self.by_source, (data_share.data_type, data_share.source_agent))):
+            ids = index[key]
+            del ids[data_id]
+            if not ids:
+                del index[key]
+        return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Remove entries whose TTL ran out; returns how many were removed"""
+        count = 0
+        for data_id in self.wheel.advance(now):
+            if self.remove(data_id):
+                count += 1
+        self.expired += count
+        return count
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, data_id: str) -> bool:
+        return data_id in self.entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "data_types": len(self.by_type),
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
@@ -1422,10 +1422,10 @@ async def get_automation_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/automation/scheduled-tasks")
-async def get_scheduled_tasks():
-    """Get all scheduled tasks"""
+async def get_scheduled_tasks(organization_id: Optional[str] = None):
+    """Get all scheduled tasks, or those of one organization"""
     try:
-        tasks = coordinator.get_scheduled_tasks()
+        tasks = coordinator.get_scheduled_tasks(organization_id)
         return {
             "success": True,
             "data": tasks,
@@ -1494,11 +1494,13 @@ async def get_performance_summary(platform: str = None, hours: int = 24):
 # Pydantic models for automation requests
 class ScheduledTaskRequest(BaseModel):
     name: str
-    schedule_type: str  # daily, weekly, monthly, hourly
-    schedule_time: str  # HH:MM format
+    schedule_type: str  # daily, weekly, monthly, hourly, cron
+    schedule_time: str  # HH:MM format, or a cron expression for cron
     agent_type: str = "strategy"
     schedule_day: Optional[str] = None  # For weekly/monthly
     task_data: Optional[Dict[str, Any]] = None
+    timezone: str = "UTC"  # IANA name, e.g. America/New_York
+    organization_id: Optional[str] = None
 
 class EventRuleRequest(BaseModel):
     event_type: str
@@ -1523,7 +1525,9 @@ async def add_scheduled_task(request: ScheduledTaskRequest):
             schedule_time=request.schedule_time,
             agent_type=request.agent_type,
             schedule_day=request.schedule_day,
-            task_data=request.task_data
+            task_data=request.task_data,
+            timezone=request.timezone,
+            organization_id=request.organization_id
         )
         return {
             "success": True,
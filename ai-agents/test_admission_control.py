@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test workflow admission control: concurrency caps, priority classes and weighted-fair ordering
+"""
+
+import sys
+import asyncio
+from typing import List
+
+import pytest
+
+from orchestrator.admission_control import AdmissionController, AdmissionRejectedError
+
+async def admit_in_order(controller: AdmissionController, requests: List[tuple]) -> List[str]:
+    """Queue (organization, priority) requests behind a held slot, then record the order they are admitted in"""
+    order = []
+
+    async def request(organization_id: str, priority: str):
+        ticket = await controller.acquire(organization_id, priority)
+        order.append(organization_id)
+        controller.release(ticket)
+
+    held = await controller.acquire("holder")
+    waiters = [asyncio.create_task(request(*args)) for args in requests]
+    await asyncio.sleep(0)  # everyone queues
+    controller.release(held)
+    await asyncio.gather(*waiters)
+    return order
+
+def test_per_org_limit_queues_excess():
+    """An organization at its limit waits while other organizations are admitted"""
+    async def scenario():
+        controller = AdmissionController(max_concurrent=10, max_per_org=2)
+        first, second = await controller.acquire("acme"), await controller.acquire("acme")
+
+        third = asyncio.create_task(controller.acquire("acme"))
+        await asyncio.sleep(0)
+        assert not third.done() and controller.queue_depth == 1
+
+        other = await asyncio.wait_for(controller.acquire("globex"), timeout=1)
+        assert controller.in_flight_by_org == {"acme": 2, "globex": 1}
+
+        controller.release(first)
+        await asyncio.wait_for(third, timeout=1)
+        assert controller.queue_depth == 0 and controller.in_flight == 3
+        for ticket in (second, third.result(), other):
+            controller.release(ticket)
+        assert controller.in_flight == 0 and controller.in_flight_by_org == {}
+    asyncio.run(scenario())
+
+def test_interactive_before_background():
+    """Queued interactive work is admitted ahead of background work submitted earlier"""
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_org=10)
+        return await admit_in_order(controller, [("scheduler", "background"), ("user", "interactive"),
+                                                 ("api", "normal")])
+    assert asyncio.run(scenario()) == ["user", "api", "scheduler"]
+
+def test_burst_gets_fair_share():
+    """A burst from one organization is interleaved with another organization's requests"""
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_org=10)
+        return await admit_in_order(controller, [("burst", "normal")] * 4 + [("other", "normal")] * 2)
+    assert asyncio.run(scenario()) == ["burst", "other", "burst", "other", "burst", "burst"]
+
+def test_full_queue_rejects():
+    """Requests beyond the maximum queue depth are rejected up front"""
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_org=1, max_queue_depth=1)
+        held = await controller.acquire("acme")
+        waiting = asyncio.create_task(controller.acquire("acme"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejectedError):
+            await controller.acquire("globex")
+        assert controller.rejected_total == 1
+
+        controller.release(held)
+        controller.release(await waiting)
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_leaves_queue():
+    """A waiter cancelled before admission gives up its place and its slot goes to the next one"""
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_org=10)
+        held = await controller.acquire("acme")
+        abandoned = asyncio.create_task(controller.acquire("acme"))
+        patient = asyncio.create_task(controller.acquire("globex"))
+        await asyncio.sleep(0)
+
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+
+        controller.release(held)
+        ticket = await asyncio.wait_for(patient, timeout=1)
+        assert ticket.organization_id == "globex" and controller.in_flight == 1
+        controller.release(ticket)
+    asyncio.run(scenario())
+
+def main():
+    """Run all admission control tests"""
+    print("🚦 Testing workflow admission control...")
+    print("=" * 50)
+    tests = [
+        test_per_org_limit_queues_excess,
+        test_interactive_before_background,
+        test_burst_gets_fair_share,
+        test_full_queue_rejects,
+        test_cancelled_waiter_leaves_queue
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Test agent messaging between protocol instances: handoffs, transports, mailboxes and calls
+"""
+
+import sys
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+try:
+    import fakeredis
+except ImportError:  # pip install fakeredis
+    fakeredis = None
+
+from services.agent_communication import (
+    AgentCommunicationProtocol, AgentMessage, MessageType, MessagePriority,
+    SubscriberMailbox, OverflowPolicy, AgentCallError
+)
+from services.message_transport import InMemoryTransport, LocalHub, RedisMessageTransport
+
+def make_message(sender: str, recipient: Optional[str] = None, subject: str = "hello",
+                 expires_in: Optional[float] = None) -> AgentMessage:
+    now = datetime.utcnow()
+    return AgentMessage(
+        id=str(uuid.uuid4()), message_type=MessageType.BROADCAST if recipient is None else MessageType.NOTIFICATION,
+        sender_agent=sender, recipient_agent=recipient, subject=subject, data={}, priority=MessagePriority.NORMAL,
+        created_at=now, expires_at=now + timedelta(seconds=expires_in) if expires_in is not None else None
+    )
+
+async def start_protocols(hub: LocalHub, *node_ids: str):
+    """One protocol per node, joined through the hub as if each ran in its own process"""
+    protocols = [AgentCommunicationProtocol(transport=InMemoryTransport(hub, node_id)) for node_id in node_ids]
+    for protocol in protocols:
+        await protocol.start()
+    return protocols
+
+async def settle():
+    """Let envelopes in flight through the hub arrive"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_remote_handoff_lives_with_its_target():
+    """A handoff to an agent in another process is kept there only, and accepting it leaves nothing behind"""
+    async def scenario():
+        sender, receiver = await start_protocols(LocalHub(), "a", "b")
+        sender.register_agent("content")
+        receiver.register_agent("strategy")
+
+        handoff_id = await sender.handoff_task("content", "strategy", "review", {"draft": "hello"}, {})
+        await settle()
+
+        assert sender.pending_handoffs == {}
+        assert [handoff.id for handoff in receiver.get_pending_handoffs("strategy")] == [handoff_id]
+        handoff = receiver.accept_handoff(handoff_id)
+        assert handoff.task_data == {"draft": "hello"} and receiver.pending_handoffs == {}
+
+        # A local target still gets the handoff in this process
+        sender.register_agent("analytics")
+        local_id = await sender.handoff_task("content", "analytics", "report", {}, {})
+        assert list(sender.pending_handoffs) == [local_id]
+    asyncio.run(scenario())
+
+def test_broadcasts_are_read_through_cursors():
+    """Each polling agent reads a broadcast once; new agents and the sender do not see earlier ones"""
+    async def scenario():
+        protocol = AgentCommunicationProtocol()
+        protocol.register_agent("content")
+        protocol.register_agent("strategy")
+        await protocol.send_message(make_message("content", subject="first"))
+
+        protocol.register_agent("analytics")
+        await protocol.send_message(make_message("strategy", subject="second"))
+
+        assert [m.subject for m in await protocol.get_unread_messages("content")] == ["second"]
+        assert [m.subject for m in await protocol.get_unread_messages("strategy")] == ["first"]
+        assert [m.subject for m in await protocol.get_unread_messages("analytics")] == ["second"]
+        assert await protocol.get_unread_messages("content") == []
+
+        # Every polling agent has read both, so the log is trimmed
+        protocol._trim_broadcast_log()
+        assert len(protocol.broadcast_log) == 0
+    asyncio.run(scenario())
+
+def test_callback_agents_do_not_hold_back_the_log():
+    """Agents consuming through callbacks hold no cursor, so the log does not overflow on their account"""
+    async def scenario():
+        protocol = AgentCommunicationProtocol(max_broadcast_log=3)
+
+        async def on_message(message):
+            pass
+        protocol.register_agent("content", on_message)
+        protocol.register_agent("strategy", on_message)
+        for number in range(10):
+            await protocol.send_message(make_message("content", subject=str(number)))
+
+        assert len(protocol.broadcast_log) <= 3
+        assert protocol.messages_dropped == 0 and "broadcast_log_overflow" not in protocol.metrics.drops
+
+        # Once it polls, an agent reads broadcasts sent from then on
+        assert await protocol.get_unread_messages("strategy") == []
+        await protocol.send_message(make_message("content", subject="later"))
+        assert [m.subject for m in await protocol.get_unread_messages("strategy")] == ["later"]
+    asyncio.run(scenario())
+
+def test_lagging_poller_loses_oldest_broadcasts():
+    """A polling agent that falls more than max_broadcast_log behind loses the oldest broadcasts, counted as drops"""
+    async def scenario():
+        protocol = AgentCommunicationProtocol(max_broadcast_log=3)
+        protocol.register_agent("slow")
+        for number in range(5):
+            await protocol.send_message(make_message("sender", subject=str(number)))
+
+        assert [m.subject for m in await protocol.get_unread_messages("slow")] == ["2", "3", "4"]
+        assert protocol.messages_dropped == 2 and protocol.metrics.drops["broadcast_log_overflow"] == 2
+    asyncio.run(scenario())
+
+def test_expired_messages_are_removed():
+    """The expiry heap removes expired direct messages and broadcasts, leaving unexpired ones"""
+    async def scenario():
+        protocol = AgentCommunicationProtocol()
+        protocol.register_agent("content")
+        await protocol.send_message(make_message("strategy", "content", "short", expires_in=1))
+        await protocol.send_message(make_message("strategy", "content", "long", expires_in=60))
+        await protocol.send_message(make_message("strategy", subject="short broadcast", expires_in=1))
+        await protocol.send_message(make_message("strategy", subject="kept broadcast"))
+
+        protocol._expire_messages(datetime.utcnow() + timedelta(seconds=2))
+        assert protocol.messages_expired == 2 and protocol.metrics.drops["expired"] == 2
+        assert len(protocol.inboxes["content"]) == 1 and len(protocol._expiry_heap) == 1
+        assert [m.subject for m in await protocol.get_unread_messages("content")] == ["long", "kept broadcast"]
+    asyncio.run(scenario())
+
+def test_drop_oldest_mailbox_keeps_newest():
+    """A full DROP_OLDEST mailbox drops its oldest messages without making the sender wait"""
+    async def scenario():
+        received = []
+        async def callback(message):
+            received.append(message.subject)
+        mailbox = SubscriberMailbox("content", callback, max_size=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+
+        for number in range(4):
+            await mailbox.put(make_message("sender", "content", str(number)))
+        await mailbox.stop()
+        assert received == ["2", "3"]
+        assert mailbox.get_stats()["dropped"] == 2 and mailbox.get_stats()["delivered"] == 2
+    asyncio.run(scenario())
+
+def test_block_mailbox_makes_sender_wait():
+    """A full BLOCK mailbox holds the sender until the callback makes room, and loses nothing"""
+    async def scenario():
+        received = []
+        release = asyncio.Event()
+        async def callback(message):
+            await release.wait()
+            received.append(message.subject)
+        mailbox = SubscriberMailbox("content", callback, max_size=1, overflow_policy=OverflowPolicy.BLOCK)
+
+        await mailbox.put(make_message("sender", "content", "0"))
+        await settle()  # the callback takes "0" and waits
+        await mailbox.put(make_message("sender", "content", "1"))
+        blocked = asyncio.create_task(mailbox.put(make_message("sender", "content", "2")))
+        await settle()
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+        await mailbox.stop()
+        assert received == ["0", "1", "2"] and mailbox.dropped == 0
+    asyncio.run(scenario())
+
+def test_messages_and_data_cross_processes():
+    """Direct messages, broadcasts and shared data reach agents hosted by another protocol on the hub"""
+    async def scenario():
+        sender, receiver = await start_protocols(LocalHub(), "a", "b")
+        sender.register_agent("content")
+        receiver.register_agent("strategy")
+
+        assert await sender.send_message(make_message("content", "strategy", "direct"))
+        await sender.send_message(make_message("content", subject="everyone"))
+        data_id = await sender.share_data("content", "trends", {"topics": ["ai"]})
+        await settle()
+
+        assert [m.subject for m in await receiver.get_unread_messages("strategy")] == [
+            "direct", "everyone", "Data shared: trends"
+        ]
+        assert receiver.get_shared_data(data_id).data == {"topics": ["ai"]}
+        assert receiver.messages_received_remote == 3
+        assert not await sender.send_message(make_message("content", "nobody", "lost"))
+    asyncio.run(scenario())
+
+def test_call_across_processes():
+    """call() returns a remote handler's result, raises for failures and unknown agents, and can cache"""
+    async def scenario():
+        caller, server = await start_protocols(LocalHub(), "a", "b")
+        server.register_agent("strategy")
+        calls = []
+
+        async def plan(params):
+            calls.append(params)
+            if params.get("fail"):
+                raise ValueError("no budget")
+            return {"plan": f"grow {params['channel']}"}
+        server.register_handler("strategy", "plan", plan)
+
+        assert await caller.call("strategy", "plan", {"channel": "instagram"}, timeout=1) == {"plan": "grow instagram"}
+
+        with pytest.raises(AgentCallError, match="no budget"):
+            await caller.call("strategy", "plan", {"fail": True}, timeout=1)
+        with pytest.raises(AgentCallError):
+            await caller.call("nobody", "plan", timeout=1)
+
+        for _ in range(3):
+            await caller.call("strategy", "plan", {"channel": "tiktok"}, timeout=1, cache_ttl=60)
+        assert len(calls) == 3 and caller.call_stats["cache_hits"] == 2
+        assert caller.call_stats["errors"] == 1 and caller.pending_calls == {}
+    asyncio.run(scenario())
+
+def test_call_times_out_without_a_response():
+    """A call to an agent that never answers raises asyncio.TimeoutError and leaves no pending call"""
+    async def scenario():
+        caller, server = await start_protocols(LocalHub(), "a", "b")
+        server.register_agent("silent")  # no handler: the request waits in its inbox
+        with pytest.raises(asyncio.TimeoutError):
+            await caller.call("silent", "plan", timeout=0.05)
+        assert caller.call_stats["timeouts"] == 1 and caller.pending_calls == {}
+
+        await settle()
+        [request] = server.inboxes["silent"].values()  # expired with the call, not yet cleaned up
+        # A late answer is discarded by the caller's process
+        await server.respond_to_request("silent", request.sender_agent, request.correlation_id, {"late": True})
+        await settle()
+        assert caller.pending_calls == {}
+    asyncio.run(scenario())
+
+class FailingPipeline:
+    """A Redis pipeline whose execute fails, as when the connection drops mid-flush"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    async def execute(self):
+        raise ConnectionError("redis went away")
+
+@pytest.mark.skipif(fakeredis is None, reason="fakeredis is not installed")
+def test_failed_flush_keeps_the_batch():
+    """Envelopes whose batch could not be written stay buffered and go out with the next flush"""
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        transport = RedisMessageTransport("", node_id="a", batch_size=100, client=client)
+        await transport.send("strategy", {"kind": "message", "message": {"id": "1"}})
+
+        working_pipeline = client.pipeline
+        client.pipeline = lambda **kwargs: FailingPipeline(working_pipeline(**kwargs))
+        with pytest.raises(ConnectionError):
+            await transport._flush()
+        assert transport.get_stats()["buffered"] == 1 and transport.stats["sent"] == 0
+
+        client.pipeline = working_pipeline
+        await transport._flush()
+        assert await client.xlen(transport._inbox_stream("strategy")) == 1
+        assert transport.get_stats()["buffered"] == 0 and transport.stats["sent"] == 1
+    asyncio.run(scenario())
+
+def main():
+    """Run all agent communication tests"""
+    print("📨 Testing agent communication...")
+    print("=" * 50)
+    tests = [
+        test_broadcasts_are_read_through_cursors,
+        test_callback_agents_do_not_hold_back_the_log,
+        test_lagging_poller_loses_oldest_broadcasts,
+        test_expired_messages_are_removed,
+        test_drop_oldest_mailbox_keeps_newest,
+        test_block_mailbox_makes_sender_wait,
+        test_messages_and_data_cross_processes,
+        test_call_across_processes,
+        test_call_times_out_without_a_response,
+        test_remote_handoff_lives_with_its_target,
+        test_failed_flush_keeps_the_batch
+    ]
+    failed = 0
+    for test in tests:
+        if fakeredis is None and test is test_failed_flush_keeps_the_batch:
+            print("   ⏭️  Skipped: fakeredis is not installed")
+            continue
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
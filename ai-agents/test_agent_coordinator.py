@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test task dispatch and queue status: organizations with busy agent pools do not hold back the others
+"""
+
+import sys
+import asyncio
+
+from orchestrator.agent_coordinator import AgentCoordinator, AgentStatus, TaskPriority
+from orchestrator.queue_backends import InMemoryQueueBackend
+
+class PooledAgent:
+    """Just enough of a BaseAgent to be registered in an organization's pool"""
+
+    def __init__(self, agent_id: str, organization_id: str):
+        self.agent_id = agent_id
+        self.organization_id = organization_id
+
+def make_coordinator(dispatched: list) -> AgentCoordinator:
+    coordinator = AgentCoordinator(queue_backend=InMemoryQueueBackend())
+
+    async def record(task, agent):
+        dispatched.append((task.data["organization_id"], agent.agent_id))
+    coordinator._execute_task = record
+    for organization_id in ("busy_org", "idle_org"):
+        agent_id = f"content_{organization_id}"
+        coordinator.register_agent(agent_id, "content", [], instance=PooledAgent(agent_id, organization_id),
+                                   organization_id=organization_id)
+    coordinator.update_agent_status("content_busy_org", AgentStatus.OFFLINE)  # no idle agent for busy_org
+    return coordinator
+
+def test_busy_organization_does_not_block_others():
+    """The most urgent task waits for its organization's agent while the next one is dispatched"""
+    async def scenario():
+        dispatched = []
+        coordinator = make_coordinator(dispatched)
+        waiting = coordinator.submit_task("content", {"organization_id": "busy_org"}, TaskPriority.URGENT)
+        coordinator.submit_task("content", {"organization_id": "idle_org"}, TaskPriority.LOW)
+
+        await coordinator._dispatch_ready_tasks()
+        await asyncio.sleep(0)
+        assert dispatched == [("idle_org", "content_idle_org")]
+
+        # The skipped task kept its place and goes first once its agent is free
+        queue = coordinator.queue_backend.queue
+        assert [task.id for task in queue] == [waiting]
+        coordinator.update_agent_status("content_busy_org", AgentStatus.IDLE)
+        await coordinator._dispatch_ready_tasks()
+        await asyncio.sleep(0)
+        assert dispatched[-1] == ("busy_org", "content_busy_org")
+        assert len(queue) == 0
+    asyncio.run(scenario())
+
+def test_queue_status_counts_from_the_backend():
+    """Pending counts and the queue listing come from the queue backend"""
+    async def scenario():
+        coordinator = make_coordinator([])
+        queued = coordinator.submit_task("content", {"organization_id": "busy_org"})
+        status = coordinator.get_task_queue_status()
+        assert status["pending_tasks"] == 1 and status["pending_by_agent_type"] == {"content": 1}
+        assert [task["id"] for task in status["queue"]] == [queued]
+    asyncio.run(scenario())
+
+def main():
+    """Run all task dispatch tests"""
+    print("🚦 Testing task dispatch...")
+    print("=" * 50)
+    tests = [
+        test_busy_organization_does_not_block_others,
+        test_queue_status_counts_from_the_backend
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
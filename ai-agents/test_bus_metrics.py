@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test communication bus metrics: latency histograms and message rates
+"""
+
+import sys
+
+from services.bus_metrics import Histogram, RateWindow
+
+def test_histogram_quantiles():
+    """Quantiles report the upper bound of the bucket they fall in, capped at the largest value seen"""
+    histogram = Histogram(bounds=(0.01, 0.1, 1.0))
+    assert histogram.quantile(0.5) == 0.0
+
+    for value, count in ((0.005, 50), (0.05, 45), (0.5, 5)):
+        for _ in range(count):
+            histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.95) == 0.1
+    assert histogram.quantile(0.99) == 0.5  # the 1.0 bucket, capped at the max
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100 and snapshot["p95_ms"] == 100.0
+    assert snapshot["buckets"] == {"le_10ms": 50, "le_100ms": 45, "le_1000ms": 5, "inf": 0}
+
+def test_histogram_overflow_bucket():
+    """Values above every bound land in the last bucket and report the maximum"""
+    histogram = Histogram(bounds=(0.01, 0.1))
+    histogram.observe(0.001)
+    histogram.observe(7.5)
+    histogram.observe(-1)  # clock skew between processes is clamped to zero
+
+    assert histogram.counts == [2, 0, 1]
+    assert histogram.quantile(1.0) == 7.5 and histogram.max == 7.5
+
+def test_rate_window():
+    """Rates average each key's events over the window, forgetting buckets that slid out"""
+    window = RateWindow(window=10)
+    window.started = -0.5  # up for the whole window
+    for second in range(10):
+        window.add("notification", now=second)
+        window.add("broadcast" if second % 2 else "notification", now=second)
+
+    assert window.rates(now=9.5) == {"notification": 1.5, "broadcast": 0.5}
+    assert window.rates(now=10.0) == {"notification": 1.3, "broadcast": 0.5}  # second 0 slid out
+    assert window.rates(now=25.0) == {}
+
+def main():
+    """Run all bus metrics tests"""
+    print("📈 Testing communication bus metrics...")
+    print("=" * 50)
+    tests = [
+        test_histogram_quantiles,
+        test_histogram_overflow_bucket,
+        test_rate_window
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
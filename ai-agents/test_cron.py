@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test cron schedule evaluation in IANA timezones, across daylight saving changes
+"""
+
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+from tools.cron import next_cron_run, parse_cron, get_timezone
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+def test_wall_clock_time_follows_dst():
+    """A daily 09:00 in Berlin moves from 08:00 to 07:00 UTC when summer time starts"""
+    assert next_cron_run("0 9 * * *", "Europe/Berlin", utc(2025, 3, 28, 9, 0)) == utc(2025, 3, 29, 8, 0)
+    assert next_cron_run("0 9 * * *", "Europe/Berlin", utc(2025, 3, 29, 8, 0)) == utc(2025, 3, 30, 7, 0)
+    assert next_cron_run("0 9 * * *", "Europe/Berlin", utc(2025, 10, 25, 7, 0)) == utc(2025, 10, 26, 8, 0)
+
+def test_skipped_wall_time_runs_after_the_gap():
+    """02:30 does not exist on the spring-forward day in New York; the run lands at 03:30 EDT"""
+    run = next_cron_run("30 2 * * *", "America/New_York", utc(2025, 3, 9, 5, 0))
+    assert run == utc(2025, 3, 9, 7, 30)
+    assert run.astimezone(get_timezone("America/New_York")).hour == 3
+    # The next day is back on the usual wall time
+    assert next_cron_run("30 2 * * *", "America/New_York", run) == utc(2025, 3, 10, 6, 30)
+
+def test_repeated_wall_time_runs_once():
+    """01:30 happens twice on the fall-back day in New York; only the first one runs"""
+    first = next_cron_run("30 1 * * *", "America/New_York", utc(2025, 11, 2, 4, 0))
+    assert first == utc(2025, 11, 2, 5, 30)  # 01:30 EDT
+    assert next_cron_run("30 1 * * *", "America/New_York", first) == utc(2025, 11, 3, 6, 30)
+
+    # Hourly runs skip the repeated hour too
+    assert next_cron_run("0 * * * *", "America/New_York", utc(2025, 11, 2, 5, 0)) == utc(2025, 11, 2, 7, 0)
+
+def test_weekdays_and_names():
+    """Day-of-week ranges and names are evaluated in local time"""
+    friday_run = utc(2025, 3, 7, 14, 30)  # 09:30 EST
+    assert next_cron_run("30 9 * * mon-fri", "America/New_York", friday_run) == utc(2025, 3, 10, 13, 30)  # 09:30 EDT
+
+def test_invalid_expressions_and_timezones():
+    """Out-of-range fields and unknown timezones are rejected"""
+    with pytest.raises(ValueError):
+        parse_cron("61 * * * *")
+    with pytest.raises(ValueError):
+        get_timezone("Mars/Base")
+
+def main():
+    """Run all cron tests"""
+    print("🕰️  Testing cron schedules...")
+    print("=" * 50)
+    tests = [
+        test_wall_clock_time_follows_dst,
+        test_skipped_wall_time_runs_after_the_gap,
+        test_repeated_wall_time_runs_once,
+        test_weekdays_and_names,
+        test_invalid_expressions_and_timezones
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test load-aware agent selection and the per-agent circuit breaker
+"""
+
+import sys
+
+from orchestrator.load_balancer import AgentLoadBalancer, CircuitState
+
+def make_balancer(*agent_ids: str, max_in_flight: int = 1, **breaker_settings) -> AgentLoadBalancer:
+    settings = {"failure_threshold": 3, "min_samples": 100, "cooldown": 10.0}
+    settings.update(breaker_settings)
+    balancer = AgentLoadBalancer(breaker_settings=settings)
+    for agent_id in agent_ids:
+        balancer.track(agent_id, max_in_flight=max_in_flight)
+    return balancer
+
+def test_prefers_faster_agent():
+    """Between two idle agents the one with the lower expected finish time wins"""
+    balancer = make_balancer("fast", "slow")
+    for _ in range(5):
+        for agent_id, latency in (("fast", 0.1), ("slow", 2.0)):
+            balancer.record_dispatch(agent_id)
+            balancer.record_result(agent_id, latency, True)
+
+    assert balancer.choose(["fast", "slow"]) == "fast"
+
+def test_capacity_counts_reported_work():
+    """An agent whose heartbeat reports it full takes no tasks, even with none dispatched from here"""
+    balancer = make_balancer("agent", max_in_flight=2)
+    balancer.record_dispatch("agent")
+    assert balancer.has_capacity("agent")
+
+    balancer.record_heartbeat("agent", {"in_flight": 2})
+    assert not balancer.has_capacity("agent")
+    assert balancer.choose(["agent"]) is None
+
+    balancer.record_heartbeat("agent", {"in_flight": 1})
+    assert balancer.has_capacity("agent")
+
+def test_circuit_opens_and_recovers_through_probe():
+    """Consecutive failures open the circuit; after the cooldown one probe decides whether it closes"""
+    balancer = make_balancer("agent", cooldown=10.0)
+    breaker = balancer.breakers["agent"]
+
+    transitions = []
+    for _ in range(3):
+        balancer.record_dispatch("agent")
+        transitions.append(balancer.record_result("agent", 0.1, False))
+    assert transitions == [None, None, CircuitState.OPEN]
+    assert not balancer.is_routable("agent", now=breaker.opened_at + 5)
+
+    # Half open: a single probe is let through
+    probe_time = breaker.opened_at + 10
+    assert balancer.is_routable("agent", now=probe_time)
+    balancer.record_dispatch("agent")
+    assert balancer.circuit_state("agent") == CircuitState.HALF_OPEN
+    assert not balancer.is_routable("agent", now=probe_time)
+
+    # A failed probe reopens it, a successful one closes it
+    assert balancer.record_result("agent", 0.1, False) == CircuitState.OPEN
+    assert balancer.is_routable("agent", now=breaker.opened_at + 10)
+    balancer.record_dispatch("agent")
+    assert balancer.record_result("agent", 0.1, True) == CircuitState.CLOSED
+
+def test_busy_rejection_is_not_a_failure():
+    """A task turned away because the agent was busy leaves the error rate and circuit alone"""
+    balancer = make_balancer("agent")
+    for _ in range(5):
+        balancer.record_dispatch("agent")
+        balancer.record_rejection("agent")
+
+    stats = balancer.get_stats()["agent"]
+    assert stats["circuit"] == CircuitState.CLOSED.value
+    assert stats["error_rate"] == 0.0 and stats["samples"] == 0
+    assert stats["in_flight"] == 0
+
+    # Treated as full until it reports otherwise
+    assert not balancer.has_capacity("agent")
+    balancer.record_heartbeat("agent", {"in_flight": 0})
+    assert balancer.has_capacity("agent")
+
+def test_rejected_probe_frees_half_open_slot():
+    """A probe that was rejected as busy does not keep the half-open circuit waiting forever"""
+    balancer = make_balancer("agent", failure_threshold=1, cooldown=10.0)
+    balancer.record_dispatch("agent")
+    balancer.record_result("agent", 0.1, False)
+    probe_time = balancer.breakers["agent"].opened_at + 10
+
+    assert balancer.is_routable("agent", now=probe_time)
+    balancer.record_dispatch("agent")
+    balancer.record_rejection("agent")
+    balancer.record_heartbeat("agent", {"in_flight": 0})
+    assert balancer.circuit_state("agent") == CircuitState.HALF_OPEN
+    assert balancer.is_routable("agent", now=probe_time)
+
+def main():
+    """Run all load balancer tests"""
+    print("⚖️  Testing agent load balancer...")
+    print("=" * 50)
+    tests = [
+        test_prefers_faster_agent,
+        test_capacity_counts_reported_work,
+        test_circuit_opens_and_recovers_through_probe,
+        test_busy_rejection_is_not_a_failure,
+        test_rejected_probe_frees_half_open_slot
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
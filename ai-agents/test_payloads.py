@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test shared payloads: frozen structures, serialize-once JSON and content-addressed interning
+"""
+
+import sys
+import copy
+import json
+
+import pytest
+
+from utils.payloads import FrozenDict, FrozenList, PayloadStore, freeze, thaw, dumps
+
+def test_frozen_structures_are_immutable():
+    """Frozen dicts and lists reject every mutation, at every depth"""
+    frozen = freeze({"topics": ["ai", "ml"], "meta": {"source": "trends"}})
+    assert isinstance(frozen, FrozenDict) and isinstance(frozen["topics"], FrozenList)
+
+    for mutate in (lambda: frozen.__setitem__("new", 1), lambda: frozen.update(new=1), lambda: frozen.pop("topics"),
+                   lambda: frozen.setdefault("new", 1), frozen.clear, lambda: frozen["topics"].append("x"),
+                   lambda: frozen["topics"].__setitem__(0, "x"), lambda: frozen["meta"].__delitem__("source")):
+        with pytest.raises(TypeError):
+            mutate()
+    assert frozen == {"topics": ["ai", "ml"], "meta": {"source": "trends"}}
+
+def test_copies_share_and_thaw_detaches():
+    """Copying a frozen value returns it as is; thaw gives a mutable deep copy"""
+    frozen = freeze({"topics": ["ai"]})
+    assert copy.copy(frozen) is frozen and copy.deepcopy(frozen) is frozen
+    assert freeze(frozen) is frozen
+
+    thawed = thaw(frozen)
+    thawed["topics"].append("ml")
+    assert type(thawed) is dict and frozen["topics"] == ["ai"]
+
+def test_json_is_serialized_once():
+    """A frozen value caches its JSON, and the cached string is reused"""
+    frozen = freeze({"b": 1, "a": [1, 2]})
+    first = dumps(frozen)
+    assert first is dumps(frozen)
+    assert json.loads(first) == {"a": [1, 2], "b": 1}
+    assert json.dumps(frozen, sort_keys=True) == first  # still a plain dict to json
+
+def test_identical_payloads_are_interned():
+    """Equal payloads, put directly or received as JSON, share one reference"""
+    store = PayloadStore()
+    first = store.put({"topics": ["ai"], "count": 2})
+    second = store.put({"count": 2, "topics": ["ai"]})
+    received = store.put_serialized(first.serialized)
+
+    assert first is second is received
+    assert store.get(first.digest) is first and store.get_stats()["reused"] == 2
+
+    other = store.put_serialized(json.dumps({"topics": ["ml"]}))
+    assert other is not first and other.serialized == json.dumps({"topics": ["ml"]})
+
+def main():
+    """Run all payload tests"""
+    print("🧊 Testing shared payloads...")
+    print("=" * 50)
+    tests = [
+        test_frozen_structures_are_immutable,
+        test_copies_share_and_thaw_detaches,
+        test_json_is_serialized_once,
+        test_identical_payloads_are_interned
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test the Redis Streams task queue backend against fakeredis
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Optional
+
+import pytest
+
+try:
+    import fakeredis
+except ImportError:  # pip install fakeredis
+    fakeredis = None
+
+from orchestrator.queue_backends import RedisStreamsQueueBackend
+
+pytestmark = pytest.mark.skipif(fakeredis is None, reason="fakeredis is not installed")
+
+class Priority(Enum):
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    URGENT = 4
+
+@dataclass
+class QueuedTask:
+    """The parts of a coordinator Task the backend relies on"""
+    id: str
+    agent_type: str
+    priority: Priority
+    reply_to: Optional[str] = None
+    receipt: Any = field(default=None, repr=False)
+
+def encode(task: QueuedTask) -> Dict[str, Any]:
+    return {"id": task.id, "agent_type": task.agent_type, "priority": task.priority.value, "reply_to": task.reply_to}
+
+def decode(payload: Dict[str, Any]) -> QueuedTask:
+    return QueuedTask(payload["id"], payload["agent_type"], Priority(payload["priority"]), payload.get("reply_to"))
+
+def make_task(task_id: str, priority: Priority = Priority.MEDIUM, reply_to: Optional[str] = None) -> QueuedTask:
+    return QueuedTask(task_id, "content", priority, reply_to)
+
+def make_backend(server, consumer_name: str, **kwargs) -> RedisStreamsQueueBackend:
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return RedisStreamsQueueBackend("", encode, decode, consumer_name=consumer_name, client=client, **kwargs)
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_priority_order_and_single_delivery():
+    """Higher priority streams are read first, and each entry goes to one consumer of the group"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        first, second = make_backend(server, "first"), make_backend(server, "second")
+        await first.enqueue(make_task("low", Priority.LOW))
+        await first.enqueue(make_task("urgent", Priority.URGENT))
+
+        assert (await first.dequeue("content")).id == "urgent"
+        assert (await second.dequeue("content")).id == "low"
+        assert await first.dequeue("content") is None
+        assert await second.dequeue("content") is None
+    run(scenario())
+
+def test_ack_removes_entry():
+    """Acked tasks are neither pending nor redelivered"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        backend = make_backend(server, "worker", visibility_timeout=0.1)
+        await backend.enqueue(make_task("t1"))
+        task = await backend.dequeue("content")
+        stream, group, _ = task.receipt
+        await backend.ack(task)
+
+        assert await backend.client.xpending_range(stream, group, min="-", max="+", count=10) == []
+        await asyncio.sleep(0.15)
+        assert await backend.dequeue("content") is None
+        assert backend.stats["acked"] == 1
+    run(scenario())
+
+def test_redelivery_after_visibility_timeout():
+    """A task its consumer never acked is claimed by another consumer once the timeout passes"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        crashed, survivor = make_backend(server, "crashed", visibility_timeout=0.1), make_backend(server, "survivor", visibility_timeout=0.1)
+        await crashed.enqueue(make_task("t1"))
+        assert (await crashed.dequeue("content")).id == "t1"
+
+        assert await survivor.dequeue("content") is None  # still within the timeout
+        await asyncio.sleep(0.15)
+        task = await survivor.dequeue("content")
+        assert task is not None and task.id == "t1"
+        assert survivor.stats["redelivered"] == 1
+    run(scenario())
+
+def test_touch_keeps_running_task_hidden():
+    """Renewing the visibility timeout stops other consumers from claiming a long-running task"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        runner, other = make_backend(server, "runner", visibility_timeout=0.2), make_backend(server, "other", visibility_timeout=0.2)
+        await runner.enqueue(make_task("long"))
+        task = await runner.dequeue("content")
+
+        for _ in range(4):
+            await asyncio.sleep(0.1)
+            assert await runner.touch(task)
+            assert await other.dequeue("content") is None
+
+        # Once the runner stops renewing, the task is redelivered and the runner learns it lost it
+        await asyncio.sleep(0.25)
+        assert (await other.dequeue("content")).id == "long"
+        assert not await runner.touch(task)
+    run(scenario())
+
+def test_dead_letter_after_max_deliveries():
+    """Entries delivered max_deliveries times without an ack go to the dead-letter stream and fail for the submitter"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        submitter = make_backend(server, "submitter")
+        backend = make_backend(server, "worker", visibility_timeout=0.05, max_deliveries=2)
+        await submitter.enqueue(make_task("poison", reply_to="submitter"))
+
+        assert (await backend.dequeue("content")).id == "poison"
+        await asyncio.sleep(0.06)
+        assert (await backend.dequeue("content")).id == "poison"  # second delivery
+        await asyncio.sleep(0.06)
+        assert await backend.dequeue("content") is None
+
+        entries = await backend.client.xrange(backend.dead_letter_stream)
+        assert len(entries) == 1 and "poison" in entries[0][1]["task"]
+        assert backend.stats["dead_lettered"] == 1
+
+        [outcome] = await submitter.read_results(timeout=0.1)
+        assert outcome["task_id"] == "poison" and not outcome["success"]
+    run(scenario())
+
+def test_requeue_keeps_task_until_enqueued():
+    """A requeued task is added back before its delivery is acked, so a failed enqueue leaves it pending"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        backend = make_backend(server, "worker")
+        await backend.enqueue(make_task("busy"))
+        task = await backend.dequeue("content")
+        stream, group, _ = task.receipt
+
+        async def failing_enqueue(task):
+            raise ConnectionError("redis went away")
+        working_enqueue, backend.enqueue = backend.enqueue, failing_enqueue
+        with pytest.raises(ConnectionError):
+            await backend.requeue(task)
+        assert len(await backend.client.xpending_range(stream, group, min="-", max="+", count=10)) == 1
+
+        backend.enqueue = working_enqueue
+        await backend.requeue(task)
+        assert (await backend.dequeue("content")).id == "busy"
+    run(scenario())
+
+def test_explicit_dead_letter_and_results():
+    """Failed tasks are dead-lettered on request and outcomes reach the submitting coordinator"""
+    async def scenario():
+        server = fakeredis.FakeServer()
+        submitter, worker = make_backend(server, "submitter"), make_backend(server, "worker")
+        await submitter.enqueue(make_task("t1"))
+        task = await worker.dequeue("content")
+        await worker.dead_letter(task, "agent failed")
+        await worker.publish_result("submitter", {"task_id": "t1", "success": False, "error": "agent failed"})
+
+        assert await worker.client.xlen(worker.dead_letter_stream) == 1
+        results = await submitter.read_results(timeout=0.1)
+        assert results == [{"task_id": "t1", "success": False, "error": "agent failed"}]
+        assert await submitter.read_results(timeout=0.1) == []
+    run(scenario())
+
+def main():
+    """Run all queue backend tests"""
+    print("📬 Testing Redis Streams task queue backend...")
+    print("=" * 50)
+    if fakeredis is None:
+        print("   ⏭️  Skipped: fakeredis is not installed")
+        return True
+    tests = [
+        test_priority_order_and_single_delivery,
+        test_ack_removes_entry,
+        test_redelivery_after_visibility_timeout,
+        test_touch_keeps_running_task_hidden,
+        test_dead_letter_after_max_deliveries,
+        test_explicit_dead_letter_and_results,
+        test_requeue_keeps_task_until_enqueued
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test LLM rate limiting: token buckets, priority-ordered waiters and provider throttling
+"""
+
+import sys
+import time
+import uuid
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import RateLimiter, RateLimitTimeout, request_rank
+
+try:
+    from agents import base_agent
+except ImportError:  # agent and memory dependencies (langchain, chromadb)
+    base_agent = None
+
+MODEL = "gpt-4"
+
+async def drain_requests(limiter: RateLimiter, count: int):
+    for _ in range(count):
+        await limiter.acquire(MODEL, "key", 1)
+
+def test_waiters_are_admitted_by_rank():
+    """Once the request bucket is empty, interactive calls go ahead of background calls queued earlier"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=1_000_000)  # refills 10 requests/s
+        await drain_requests(limiter, 600)
+
+        order = []
+        async def call(name: str, rank: int):
+            await limiter.acquire(MODEL, "key", 1, rank=rank)
+            order.append(name)
+
+        background = asyncio.create_task(call("background", request_rank(2, background=True)))
+        await asyncio.sleep(0)
+        interactive = [asyncio.create_task(call(f"interactive-{priority}", request_rank(priority)))
+                       for priority in (1, 3)]
+        await asyncio.gather(background, *interactive)
+        return order
+    assert asyncio.run(scenario()) == ["interactive-3", "interactive-1", "background"]
+
+def test_wait_is_bounded_by_max_wait():
+    """A call that cannot get capacity in time fails with RateLimitTimeout"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1_000_000, max_wait=0.05)
+        await drain_requests(limiter, 60)
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire(MODEL, "key", 1)
+        assert next(iter(limiter.get_stats().values()))["timeouts"] == 1
+    asyncio.run(scenario())
+
+def test_settle_returns_unused_tokens():
+    """Reservations are corrected with the tokens a call actually used"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1000)
+        reserved = await limiter.acquire(MODEL, "key", 800)
+        limiter.settle(MODEL, "key", reserved, used=200)
+        return next(iter(limiter.get_stats().values()))["tokens_available"]
+    assert asyncio.run(scenario()) >= 799
+
+requires_agents = pytest.mark.skipif(base_agent is None, reason="agent dependencies are not installed")
+
+class Generation:
+    def __init__(self, text: str):
+        self.text = text
+
+class LLMResult:
+    def __init__(self, generations, llm_output=None):
+        self.generations = generations
+        self.llm_output = llm_output
+
+def settle_through_callbacks(finish) -> float:
+    """Reserve 1000 tokens through the agent callback handler, let `finish` end the call; returns tokens available"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=10000)
+        handler = base_agent.RateLimitCallbackHandler(MODEL, "key", max_tokens=996)
+        shared, base_agent.llm_rate_limiter = base_agent.llm_rate_limiter, limiter
+        try:
+            run_id = uuid.uuid4()
+            await handler.on_llm_start({}, ["x" * 12], run_id=run_id)  # 4 prompt tokens
+            await finish(handler, run_id)
+        finally:
+            base_agent.llm_rate_limiter = shared
+        assert handler.reserved == {}
+        return next(iter(limiter.get_stats().values()))["tokens_available"]
+    return asyncio.run(scenario())
+
+@requires_agents
+def test_callbacks_settle_every_call():
+    """Agent LLM calls settle their reservation with the usage reported, estimated or, on errors, nothing"""
+    reported = settle_through_callbacks(lambda handler, run_id: handler.on_llm_end(
+        LLMResult([[Generation("ok")]], {"token_usage": {"total_tokens": 300}}), run_id=run_id))
+    assert 9699 <= reported < 9710
+
+    # Streaming responses report no usage: the prompt and the 400 character completion are charged
+    estimated = settle_through_callbacks(lambda handler, run_id: handler.on_llm_end(
+        LLMResult([[Generation("y" * 400)]]), run_id=run_id))
+    assert 9894 <= estimated < 9905
+
+    failed = settle_through_callbacks(lambda handler, run_id: handler.on_llm_error(RuntimeError("boom"), run_id=run_id))
+    assert failed >= 9999
+
+def test_throttled_key_pauses_callers():
+    """After a provider 429, calls for the key wait out the retry-after period; other keys are unaffected"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1_000_000)
+        limiter.throttled(MODEL, "key", retry_after=0.2)
+
+        started = time.monotonic()
+        await limiter.acquire(MODEL, "other-key", 10)
+        assert time.monotonic() - started < 0.1
+
+        await limiter.acquire(MODEL, "key", 10)
+        assert time.monotonic() - started >= 0.19
+    asyncio.run(scenario())
+
+def test_model_limits_override_defaults():
+    """Per-model limits replace the defaults for that model only"""
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1000,
+                              model_limits={"small": {"tokens_per_minute": 100}})
+        assert await limiter.acquire("small", "key", 500) == 100  # capped at the bucket size
+        assert await limiter.acquire(MODEL, "key", 500) == 500
+    asyncio.run(scenario())
+
+def main():
+    """Run all rate limiter tests"""
+    print("⏳ Testing LLM rate limiting...")
+    print("=" * 50)
+    tests = [
+        test_waiters_are_admitted_by_rank,
+        test_wait_is_bounded_by_max_wait,
+        test_settle_returns_unused_tokens,
+        test_throttled_key_pauses_callers,
+        test_model_limits_override_defaults
+    ]
+    if base_agent is not None:
+        tests.append(test_callbacks_settle_every_call)
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
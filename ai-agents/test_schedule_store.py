@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test durable scheduled tasks: misfire policies, the scheduler lease and syncing between instances
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from tools.advanced_scheduler import AdvancedScheduler, ScheduleType, MisfirePolicy
+from tools.schedule_store import SQLiteScheduleStore
+
+def make_record(task_id: str, **overrides):
+    now = datetime.now(timezone.utc)
+    record = {
+        "id": task_id, "name": task_id, "schedule_type": "hourly", "schedule_time": "01:00",
+        "schedule_day": None, "agent_type": "analytics", "task_data": {"action": "report"},
+        "enabled": True, "last_run": None, "next_run": now + timedelta(hours=1), "created_at": now,
+        "timezone": "UTC", "organization_id": "acme"
+    }
+    record.update(overrides)
+    return record
+
+def recorder():
+    fired = []
+    async def submit(**kwargs):
+        fired.append(kwargs["dedupe_key"])
+        return "task"
+    return submit, fired
+
+def run_missed_hourly_task(path: str, policy: MisfirePolicy):
+    """Restart a scheduler over a store whose hourly task last came due 3h01m ago; returns the runs fired"""
+    store = SQLiteScheduleStore(path)
+    store.save([make_record("hourly", next_run=datetime.now(timezone.utc) - timedelta(hours=3, minutes=1))])
+    store.close()
+
+    async def scenario():
+        submit, fired = recorder()
+        scheduler = AdvancedScheduler(coordinator_callback=submit, store=SQLiteScheduleStore(path),
+                                      misfire_policy=policy, misfire_grace=60)
+        await scheduler.start()
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+        assert scheduler.scheduled_tasks["hourly"].next_run > datetime.now(timezone.utc)
+        return [key for key in fired if key.startswith("schedule:hourly:")]
+    return asyncio.run(scenario())
+
+def test_misfire_skip():
+    """SKIP resumes at the next future run without firing the missed ones"""
+    with tempfile.TemporaryDirectory() as directory:
+        assert run_missed_hourly_task(os.path.join(directory, "scheduler.db"), MisfirePolicy.SKIP) == []
+
+def test_misfire_run_once():
+    """RUN_ONCE fires one catch-up run and records it, so another restart does not repeat it"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scheduler.db")
+        assert len(run_missed_hourly_task(path, MisfirePolicy.RUN_ONCE)) == 1
+
+        stored = {record["id"]: record for record in SQLiteScheduleStore(path).load()}["hourly"]
+        assert stored["last_run"] is not None
+        assert stored["next_run"] > datetime.now(timezone.utc)
+
+def test_misfire_run_all():
+    """RUN_ALL fires every missed run in order"""
+    with tempfile.TemporaryDirectory() as directory:
+        fired = run_missed_hourly_task(os.path.join(directory, "scheduler.db"), MisfirePolicy.RUN_ALL)
+        assert len(fired) == 4
+        assert fired == sorted(fired)
+
+def test_lease_is_exclusive_until_released_or_expired():
+    """Only one owner holds the lease; another takes it once it is released or expires"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scheduler.db")
+        first, second = SQLiteScheduleStore(path), SQLiteScheduleStore(path)
+
+        assert first.acquire_lease("first", ttl=30)
+        assert first.acquire_lease("first", ttl=30)  # renewal
+        assert not second.acquire_lease("second", ttl=30)
+
+        first.release_lease("first")
+        assert second.acquire_lease("second", ttl=0.1)
+        assert not first.acquire_lease("first", ttl=30)
+
+        # The holder stopped renewing (crashed): the lease expires
+        time.sleep(0.15)
+        assert first.acquire_lease("first", ttl=30)
+
+def test_lease_handover_between_schedulers():
+    """The follower takes in the leader's runs and starts firing once the leader stops"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scheduler.db")
+
+        async def scenario():
+            submit, fired = recorder()
+            leader = AdvancedScheduler(coordinator_callback=submit, store=SQLiteScheduleStore(path), lease_ttl=0.6)
+            follower = AdvancedScheduler(coordinator_callback=submit, store=SQLiteScheduleStore(path), lease_ttl=0.6)
+            await leader.start()
+            await asyncio.sleep(0.05)
+            await follower.start()
+            await asyncio.sleep(0.1)
+            assert leader.is_leader and not follower.is_leader
+
+            # Added on the follower, fired by the leader, and the run synced back
+            task_id = follower.add_scheduled_task("Soon", ScheduleType.CRON, "* * * * *", organization_id="acme")
+            follower.scheduled_tasks[task_id].next_run = datetime.now(timezone.utc) + timedelta(seconds=0.3)
+            follower._persist(saved=[follower.scheduled_tasks[task_id]])
+            await asyncio.sleep(0.8)
+            assert len([key for key in fired if task_id in key]) == 1
+            assert follower.scheduled_tasks[task_id].last_run is not None
+
+            await leader.stop()
+            await asyncio.sleep(0.4)
+            assert follower.is_leader
+            await follower.stop()
+        asyncio.run(scenario())
+
+def test_changes_are_read_incrementally():
+    """A store reports only what other processes saved or deleted since it last looked"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scheduler.db")
+        writer, reader = SQLiteScheduleStore(path), SQLiteScheduleStore(path)
+        writer.save([make_record("a"), make_record("b")])
+
+        records, deleted = reader.load_changes()
+        assert sorted(record["id"] for record in records) == ["a", "b"] and deleted == []
+        assert reader.load_changes() == ([], [])
+        assert writer.load_changes() == ([], [])  # its own writes
+
+        writer.save([make_record("a", enabled=False)])
+        writer.delete(["b"])
+        records, deleted = reader.load_changes()
+        assert [(record["id"], record["enabled"]) for record in records] == [("a", False)]
+        assert deleted == ["b"]
+
+def test_store_opens_on_start_and_deleted_defaults_stay_deleted():
+    """Nothing is opened until start; a default task a user deleted is not added back on restart"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data", "scheduler.db")
+
+        async def restart(delete_task_id=None):
+            scheduler = AdvancedScheduler(store_factory=lambda: SQLiteScheduleStore(path))
+            await scheduler.start()
+            if delete_task_id:
+                assert scheduler.delete_task(delete_task_id)
+            await scheduler.stop()
+            scheduler.store.close()
+            return set(scheduler.scheduled_tasks)
+
+        scheduler = AdvancedScheduler(store_factory=lambda: SQLiteScheduleStore(path))
+        assert scheduler.store is None and not os.path.exists(path)
+
+        defaults = asyncio.run(restart("default_trend_analysis"))
+        assert "default_trend_analysis" not in defaults and len(defaults) == 6
+        assert asyncio.run(restart()) == defaults
+
+def main():
+    """Run all schedule store tests"""
+    print("🗓️  Testing durable scheduled tasks...")
+    print("=" * 50)
+    tests = [
+        test_misfire_skip,
+        test_misfire_run_once,
+        test_misfire_run_all,
+        test_lease_is_exclusive_until_released_or_expired,
+        test_lease_handover_between_schedulers,
+        test_changes_are_read_incrementally,
+        test_store_opens_on_start_and_deleted_defaults_stay_deleted
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
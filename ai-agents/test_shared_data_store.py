@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test shared data between agents: timing wheel expiry, lookups and size-bounded eviction
+"""
+
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from services.shared_data_store import SharedDataStore, TimingWheel
+
+@dataclass
+class Share:
+    """The parts of a DataShare the store relies on"""
+    id: str
+    source_agent: str
+    data_type: str
+    data: Any
+    created_at: datetime
+    ttl_seconds: int = 3600
+
+def make_share(share_id: str, data_type: str = "trends", source_agent: str = "content", ttl_seconds: int = 3600) -> Share:
+    return Share(share_id, source_agent, data_type, {"id": share_id}, datetime.utcnow(), ttl_seconds)
+
+def run_wheel(wheel: TimingWheel, until: int) -> dict:
+    """Advance one tick at a time; returns key -> tick it expired at"""
+    expired_at = {}
+    for tick in range(wheel.current_tick + 1, until + 1):
+        for key in wheel.advance(tick):
+            expired_at[key] = tick
+    return expired_at
+
+def small_wheel() -> TimingWheel:
+    """4 slots over 3 levels: level 0 covers 4 ticks, level 1 16, level 2 (the last) everything beyond"""
+    wheel = TimingWheel(tick=1.0, slots=4, levels=3)
+    wheel.current_tick = 0
+    return wheel
+
+def test_wheel_expires_keys_on_their_tick_across_levels():
+    """Keys placed in every level cascade down and expire exactly on their deadline tick"""
+    wheel = small_wheel()
+    deadlines = {"level0": 3, "level1": 5, "level1_edge": 15, "level2": 16, "level2_far": 47,
+                 "beyond_range": 70}  # past the last level's turn, so it comes around once first
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+
+    assert run_wheel(wheel, 80) == deadlines
+    assert len(wheel) == 0
+
+def test_wheel_skips_cancelled_and_rescheduled_keys():
+    """A cancelled key never expires; a rescheduled one expires only at its new deadline"""
+    wheel = small_wheel()
+    wheel.schedule("cancelled", 10)
+    wheel.schedule("moved", 20)
+    wheel.cancel("cancelled")
+    wheel.schedule("moved", 6)
+    wheel.schedule("past", -5)  # already due: expires on the next tick
+
+    assert run_wheel(wheel, 30) == {"past": 1, "moved": 6}
+
+def test_lookups_by_type_and_source():
+    """Entries are found by id, by type and by (type, source agent), oldest first"""
+    store = SharedDataStore()
+    for share in (make_share("a"), make_share("b", source_agent="strategy"), make_share("c", data_type="plans")):
+        store.put(share)
+
+    assert store.get("a").id == "a" and store.get("missing") is None
+    assert [share.id for share in store.find("trends")] == ["a", "b"]
+    assert [share.id for share in store.find("trends", "strategy")] == ["b"]
+    assert store.remove("b") and store.find("trends", "strategy") == []
+
+def test_entries_expire_with_their_ttl():
+    """Reads stop returning an entry once its TTL runs out, and the wheel removes it"""
+    store = SharedDataStore()
+    store.put(make_share("short", ttl_seconds=5))
+    store.put(make_share("long", ttl_seconds=60))
+
+    assert store.expire(time.monotonic() + 2) == 0
+    assert store.expire(time.monotonic() + 7) == 1
+    assert "short" not in store and "long" in store
+    assert store.get_stats()["expired"] == 1
+
+def test_least_recently_used_entries_are_evicted():
+    """Past max_bytes the least recently used entries go first; reading an entry keeps it"""
+    store = SharedDataStore(max_bytes=30)
+    for share_id in ("a", "b", "c"):
+        store.put(make_share(share_id), size=10)
+    store.get("a")
+    store.find("trends", "content")  # touches all three, oldest first: a, b, c
+    store.get("a")
+
+    store.put(make_share("d"), size=10)
+    assert [share_id for share_id in store.entries] == ["c", "a", "d"]
+    assert store.total_bytes == 30 and store.evicted == 1
+
+    # An entry too big for the limit on its own evicts the rest but is kept
+    store.put(make_share("huge"), size=100)
+    assert list(store.entries) == ["huge"] and store.total_bytes == 100
+
+def main():
+    """Run all shared data store tests"""
+    print("🗃️  Testing shared data store...")
+    print("=" * 50)
+    tests = [
+        test_wheel_expires_keys_on_their_tick_across_levels,
+        test_wheel_skips_cancelled_and_rescheduled_keys,
+        test_lookups_by_type_and_source,
+        test_entries_expire_with_their_ttl,
+        test_least_recently_used_entries_are_evicted
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
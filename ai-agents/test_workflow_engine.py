@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test workflow execution: cancellation, fan-out steps and sharing agents with the coordinator
+"""
+
+import sys
+import asyncio
+
+import pytest
+
+try:
+    from agents.base_agent import AgentResponse, AgentBusyError
+    from orchestrator.workflow_engine import WorkflowEngine
+except ImportError:  # agent and memory dependencies (langchain, chromadb)
+    WorkflowEngine = None
+
+from orchestrator.admission_control import AdmissionController
+
+pytestmark = pytest.mark.skipif(WorkflowEngine is None, reason="agent dependencies are not installed")
+
+WORKFLOW_ID = "multi_platform_content_creation"  # trend analysis, then one content task per platform
+
+class RecordingAgent:
+    """Answers after `delay` seconds and records its calls; like BaseAgent, it refuses a second task while busy"""
+
+    def __init__(self, agent_type: str, index: int = 0, delay: float = 0.01):
+        self.agent_type = agent_type
+        self.agent_id = f"{agent_type}_{index}"
+        self.delay = delay
+        self.is_busy = False
+        self.calls = []
+        self.cancelled = []
+
+    async def execute_task(self, task):
+        if self.is_busy:
+            raise AgentBusyError(f"Agent {self.agent_id} is currently busy")
+        self.is_busy = True
+        self.calls.append(task.id)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(task.id)
+            raise
+        finally:
+            self.is_busy = False
+        platform = task.input_data.get("platform")
+        return AgentResponse(task_id=task.id, agent_type=self.agent_type, success=True, confidence=1.0,
+                             execution_time=self.delay, tokens_used=0, cost=0.0,
+                             result={"trending_topics": ["ai"], "hashtag_recommendations": [],
+                                     "generated_content": f"{self.agent_id}:{platform}"})
+
+def make_engine(registry) -> "WorkflowEngine":
+    return WorkflowEngine(registry, admission=AdmissionController(max_concurrent=10, max_per_org=10))
+
+async def wait_until_finished(engine, execution_id: str, timeout: float = 5.0) -> dict:
+    async def poll():
+        while engine.get_execution_status(execution_id)["status"] in ("pending", "running"):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+    return engine.get_execution_status(execution_id)
+
+def start_workflow(engine, platforms):
+    return engine.execute_workflow(WORKFLOW_ID, {"organization_id": "acme", "platforms": platforms, "topic": "ai"},
+                                   "acme")
+
+def test_cancel_reaches_in_flight_agent_calls():
+    """Cancelling a running execution cancels the agent calls under way and records it once"""
+    async def scenario():
+        content = [RecordingAgent("content", index, delay=10) for index in range(2)]
+        engine = make_engine({"intelligence": RecordingAgent("intelligence"), "content": content})
+        execution_id = await start_workflow(engine, ["instagram", "twitter"])
+        while sum(len(agent.calls) for agent in content) < 2:
+            await asyncio.sleep(0.01)
+
+        assert await engine.cancel_execution(execution_id)
+        assert sorted(sum((agent.cancelled for agent in content), [])) == sorted(sum((agent.calls for agent in content), []))
+        assert not any(agent.is_busy for agent in content)
+
+        status = engine.get_execution_status(execution_id)
+        assert status["status"] == "cancelled"
+        assert [execution.id for execution in engine.execution_history] == [execution_id]
+        assert not await engine.cancel_execution(execution_id)
+    asyncio.run(scenario())
+
+def test_finished_execution_cannot_be_cancelled():
+    """Cancelling a completed execution changes nothing and does not record it twice"""
+    async def scenario():
+        engine = make_engine({"intelligence": RecordingAgent("intelligence"), "content": RecordingAgent("content")})
+        execution_id = await start_workflow(engine, ["instagram"])
+        assert (await wait_until_finished(engine, execution_id))["status"] == "completed"
+
+        assert not await engine.cancel_execution(execution_id)
+        assert engine.get_execution_status(execution_id)["status"] == "completed"
+        assert [execution.id for execution in engine.execution_history] == [execution_id]
+    asyncio.run(scenario())
+
+class RacedAgent(RecordingAgent):
+    """Rejects its first task as if the coordinator had taken it between being picked and called"""
+
+    async def execute_task(self, task):
+        if not self.calls:
+            self.calls.append(None)
+            raise AgentBusyError(f"Agent {self.agent_id} is currently busy")
+        return await super().execute_task(task)
+
+def test_map_step_fans_out_over_idle_agents():
+    """Map items run on idle instances, one task per instance at a time, and each item keeps its task id"""
+    async def scenario():
+        content = [RecordingAgent("content", index, delay=0.05) for index in range(2)]
+        engine = make_engine({"intelligence": RecordingAgent("intelligence"), "content": content})
+        execution_id = await start_workflow(engine, ["instagram", "twitter", "linkedin", "facebook"])
+        assert (await wait_until_finished(engine, execution_id))["status"] == "completed"
+
+        execution = engine.execution_history[-1]
+        generated = execution.workflow_data.intermediate_data["content"]["generated_content"]
+        assert [text.split(":")[1] for text in generated] == ["instagram", "twitter", "linkedin", "facebook"]
+        assert all(len(agent.calls) == 2 for agent in content)
+
+        step = execution.steps[1]
+        assert sorted(step.agent_task_ids) == sorted(sum((agent.calls for agent in content), []))
+        assert len(set(step.agent_task_ids)) == 4
+    asyncio.run(scenario())
+
+def test_agents_busy_with_other_work_are_skipped():
+    """Instances running a task from elsewhere (the coordinator) are left alone until they are free"""
+    async def scenario():
+        busy, idle = RecordingAgent("content", 0, delay=0.3), RecordingAgent("content", 1)
+        engine = make_engine({"intelligence": RecordingAgent("intelligence"), "content": [busy, idle]})
+        dispatched = asyncio.create_task(busy.execute_task(type("Task", (), {"id": "coordinator", "input_data": {}})()))
+        await asyncio.sleep(0)
+
+        execution_id = await start_workflow(engine, ["instagram", "twitter"])
+        assert (await wait_until_finished(engine, execution_id))["status"] == "completed"
+        assert busy.calls == ["coordinator"] and len(idle.calls) == 2
+        await dispatched
+    asyncio.run(scenario())
+
+def test_agent_taken_after_being_picked_is_retried():
+    """A step whose agent turns out busy when called picks an agent again instead of failing"""
+    async def scenario():
+        content = RacedAgent("content")
+        engine = make_engine({"intelligence": RecordingAgent("intelligence"), "content": content})
+        execution_id = await start_workflow(engine, ["instagram"])
+        status = await wait_until_finished(engine, execution_id)
+        assert status["status"] == "completed" and status["steps"][1]["retry_count"] == 0
+        assert len(content.calls) == 2
+    asyncio.run(scenario())
+
+def main():
+    """Run all workflow engine tests"""
+    print("🎼 Testing workflow execution...")
+    print("=" * 50)
+    if WorkflowEngine is None:
+        print("   ⏭️  Skipped: agent dependencies are not installed")
+        return True
+    tests = [
+        test_cancel_reaches_in_flight_agent_calls,
+        test_finished_execution_cannot_be_cancelled,
+        test_map_step_fans_out_over_idle_agents,
+        test_agents_busy_with_other_work_are_skipped,
+        test_agent_taken_after_being_picked_is_retried
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {test.__doc__}: {e!r}")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,48 +1,117 @@
+import os
+import time
+import socket
 import asyncio
+import calendar
+import heapq
+import itertools
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional, Callable
 from enum import Enum
 from dataclasses import dataclass
 from utils.logger import logger
+from tools.cron import parse_cron, get_timezone, next_cron_run
+from tools.schedule_store import ScheduleStore, InMemoryScheduleStore, RECORD_FIELDS
+
+DEFAULT_TIMEZONE = "UTC"
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
 
 class ScheduleType(Enum):
     DAILY = "daily"
     WEEKLY = "weekly"
     MONTHLY = "monthly"
     HOURLY = "hourly"
+    CRON = "cron"
     CUSTOM = "custom"
 
+class MisfirePolicy(Enum):
+    """What happens to runs missed while the scheduler was down or suspended"""
+    SKIP = "skip"  # resume at the next future run
+    RUN_ONCE = "run_once"  # one catch-up run, then resume
+    RUN_ALL = "run_all"  # every missed run, in order (up to MAX_CATCH_UP_RUNS)
+
 @dataclass
 class ScheduledTask:
     id: str
     name: str
     schedule_type: ScheduleType
-    schedule_time: str  # "HH:MM" format
+    schedule_time: str  # "HH:MM" format; a cron expression for CRON
     schedule_day: Optional[str] = None  # For weekly/monthly
     agent_type: str = "strategy"
     task_data: Dict[str, Any] = None
     enabled: bool = True
     last_run: Optional[datetime] = None
-    next_run: Optional[datetime] = None
+    next_run: Optional[datetime] = None  # aware, UTC
     created_at: datetime = None
+    timezone: str = DEFAULT_TIMEZONE  # IANA name; schedule times are wall-clock times there
+    organization_id: Optional[str] = None  # None for system-wide tasks
 
 class AdvancedScheduler:
-    def __init__(self, coordinator_callback: Callable = None):
-        self.scheduled_tasks: List[ScheduledTask] = []
+    """
+    Runs scheduled tasks at their next_run times
+
+    Next runs are kept in a min-heap; the loop sleeps until the earliest one (or until
+    a task is added or enabled) and dispatches every due task concurrently, so one
+    slow submission does not hold back the others. Heap entries left behind by
+    rescheduled, disabled or deleted tasks are skipped when they come up.
+    
+    Schedule times are wall-clock times in each task's timezone. Tasks can belong to
+    an organization, whose tasks are listed and removed together. Next runs are
+    computed from the occurrence that just ran, so tenants sharing a schedule and
+    timezone share one cached computation.
+    
+    Tasks and their run state are kept in a ScheduleStore and restored on start;
+    runs are recorded before they are dispatched, so a restart never repeats one.
+    Runs missed while down follow the misfire policy (under SKIP, a run up to
+    misfire_grace late still starts). Several instances can share a store: only the
+    one holding the store's lease fires schedules, and each picks up the tasks the
+    others changed when it renews its lease.
+    
+    While the loop runs, store I/O happens in worker threads: changes are applied
+    in memory right away and written by the loop in the order they were made.
+    """
+    
+    MAX_SLEEP = 300  # seconds; re-check at least this often in case the wall clock jumps
+    MAX_CATCH_UP_RUNS = 100  # per task, under MisfirePolicy.RUN_ALL
+    
+    def __init__(self, coordinator_callback: Callable = None, max_concurrent_dispatches: int = 50,
+                 store: Optional[ScheduleStore] = None, store_factory: Optional[Callable[[], ScheduleStore]] = None,
+                 misfire_policy: MisfirePolicy = MisfirePolicy.RUN_ONCE,
+                 misfire_grace: float = 60.0, lease_ttl: float = 30.0):
+        self.scheduled_tasks: Dict[str, ScheduledTask] = {}
         self.running = False
         self.coordinator_callback = coordinator_callback
         self.task_counter = 0
+        self.organization_tasks: Dict[Optional[str], Dict[str, None]] = {}  # organization_id -> task ids
         
-        # Initialize default scheduled tasks
-        self._initialize_default_tasks()
+        self._heap: List[tuple] = []  # (next_run, sequence, task_id)
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatch_slots = asyncio.Semaphore(max_concurrent_dispatches)
+        self._dispatches: set = set()  # in-flight dispatch tasks
+        
+        self.store = store  # opened on start when only a factory is given
+        self._store_factory = store_factory
+        self.misfire_policy = misfire_policy
+        self.misfire_grace = timedelta(seconds=misfire_grace)
+        self.lease_ttl = lease_ttl
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}-{id(self):x}"
+        self.is_leader = False
+        self._lease_renew_at = 0.0  # monotonic
+        self._catch_up_runs: Dict[str, int] = {}  # task id -> consecutive missed runs dispatched
+        self._unsaved: Dict[str, Optional[ScheduledTask]] = {}  # task id -> task to save, None to delete
+        self._flush_lock = asyncio.Lock()
     
-    def _initialize_default_tasks(self):
-        """Initialize default automated tasks"""
-        current_time = datetime.now()
+    def _initialize_default_tasks(self, known_ids: set):
+        """Add the default automated tasks the store has no record of; ones a user deleted stay deleted"""
+        def add_scheduled_task(task_id: str, **kwargs):
+            if task_id not in known_ids:
+                self.add_scheduled_task(task_id=task_id, **kwargs)
         
         # Daily Analytics Processing (11 PM daily)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_daily_analytics_processing",
             name="Daily Analytics Processing",
             schedule_type=ScheduleType.DAILY,
             schedule_time="23:00",
@@ -55,7 +124,8 @@ class AdvancedScheduler:
         )
         
         # Weekly Performance Reports (Sunday 9 AM)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_weekly_performance_reports",
             name="Weekly Performance Reports",
             schedule_type=ScheduleType.WEEKLY,
             schedule_time="09:00",
@@ -69,7 +139,8 @@ class AdvancedScheduler:
         )
         
         # Content Calendar Refresh (Monday 8 AM)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_content_calendar_refresh",
             name="Content Calendar Refresh",
             schedule_type=ScheduleType.WEEKLY,
             schedule_time="08:00",
@@ -83,7 +154,8 @@ class AdvancedScheduler:
         )
         
         # Trend Analysis (Every 6 hours)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_trend_analysis",
             name="Trend Analysis",
             schedule_type=ScheduleType.HOURLY,
             schedule_time="06:00",  # Every 6 hours
@@ -96,7 +168,8 @@ class AdvancedScheduler:
         )
         
         # Engagement Monitoring (Every 2 hours)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_engagement_monitoring",
             name="Engagement Monitoring",
             schedule_type=ScheduleType.HOURLY,
             schedule_time="02:00",  # Every 2 hours
@@ -109,7 +182,8 @@ class AdvancedScheduler:
         )
         
         # Learning Agent Optimization (Daily 1 AM)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_learning_agent_optimization",
             name="Learning Agent Optimization",
             schedule_type=ScheduleType.DAILY,
             schedule_time="01:00",
@@ -122,7 +196,8 @@ class AdvancedScheduler:
         )
         
         # Monthly Strategy Review (1st of month, 10 AM)
-        self.add_scheduled_task(
+        add_scheduled_task(
+            task_id="default_monthly_strategy_review",
             name="Monthly Strategy Review",
             schedule_type=ScheduleType.MONTHLY,
             schedule_time="10:00",
@@ -138,10 +213,16 @@ class AdvancedScheduler:
     def add_scheduled_task(self, name: str, schedule_type: ScheduleType, 
                           schedule_time: str, agent_type: str = "strategy",
                           schedule_day: Optional[str] = None,
-                          task_data: Dict[str, Any] = None) -> str:
-        """Add a new scheduled task"""
-        task_id = f"scheduled_{self.task_counter}_{name.lower().replace(' ', '_')}"
-        self.task_counter += 1
+                          task_data: Dict[str, Any] = None,
+                          timezone_name: str = DEFAULT_TIMEZONE,
+                          organization_id: Optional[str] = None,
+                          task_id: Optional[str] = None) -> str:
+        """
+        Add a new scheduled task (raises ValueError for an invalid schedule or timezone)
+        
+        Adding a task under an existing task_id redefines it and keeps its run state.
+        """
+        task_id = task_id or self._new_task_id(name, organization_id)
         
         task = ScheduledTask(
             id=task_id,
@@ -151,65 +232,229 @@ class AdvancedScheduler:
             schedule_day=schedule_day,
             agent_type=agent_type,
             task_data=task_data or {},
-            created_at=datetime.now()
+            created_at=datetime.now(timezone.utc),
+            timezone=timezone_name,
+            organization_id=organization_id
         )
         
+        # Validate up front rather than when the task comes due
+        get_timezone(timezone_name)
+        if schedule_type == ScheduleType.CRON:
+            parse_cron(schedule_time)
+        
+        existing = self.scheduled_tasks.get(task_id)
+        if existing is not None:
+            task.enabled, task.last_run, task.created_at = existing.enabled, existing.last_run, existing.created_at
+            if self._schedule_key(existing) == self._schedule_key(task):
+                task.next_run = existing.next_run
+            self._unindex(existing)
+        
         # Calculate next run time
-        task.next_run = self._calculate_next_run(task)
+        if task.enabled and task.next_run is None:
+            task.next_run = self._calculate_next_run(task)
         
-        self.scheduled_tasks.append(task)
+        self._index(task)
+        self._persist(saved=[task])
         logger.info(f"Added scheduled task: {name} (ID: {task_id})")
         return task_id
     
-    def _calculate_next_run(self, task: ScheduledTask) -> datetime:
-        """Calculate the next run time for a task"""
-        now = datetime.now()
+    def _new_task_id(self, name: str, organization_id: Optional[str]) -> str:
+        while True:
+            task_id = f"scheduled_{self.task_counter}_{name.lower().replace(' ', '_')}"
+            if organization_id:
+                task_id = f"{organization_id}:{task_id}"
+            self.task_counter += 1
+            if task_id not in self.scheduled_tasks:  # restored tasks keep their ids
+                return task_id
+    
+    @staticmethod
+    def _schedule_key(task: ScheduledTask) -> tuple:
+        return (task.schedule_type, task.schedule_time, task.schedule_day, task.timezone)
+    
+    def _index(self, task: ScheduledTask):
+        self.scheduled_tasks[task.id] = task
+        self.organization_tasks.setdefault(task.organization_id, {})[task.id] = None
+        self._push(task)
+    
+    def _unindex(self, task: ScheduledTask):
+        self.scheduled_tasks.pop(task.id, None)
+        namespace = self.organization_tasks.get(task.organization_id, {})
+        namespace.pop(task.id, None)
+        if not namespace:
+            self.organization_tasks.pop(task.organization_id, None)
+        self._catch_up_runs.pop(task.id, None)
+    
+    def _to_record(self, task: ScheduledTask) -> Dict[str, Any]:
+        record = {field: getattr(task, field) for field in RECORD_FIELDS}
+        record["schedule_type"] = task.schedule_type.value
+        return record
+    
+    def _from_record(self, record: Dict[str, Any]) -> ScheduledTask:
+        return ScheduledTask(**{**record, "schedule_type": ScheduleType(record["schedule_type"])})
+    
+    def _persist(self, saved: List[ScheduledTask] = (), deleted: List[str] = ()):
+        """Queue store writes for the loop, or write them right away while it is not running"""
+        for task in saved:
+            self._unsaved[task.id] = task
+        for task_id in deleted:
+            self._unsaved[task_id] = None
+        if self.store is None:
+            return  # written once start() opens the store
+        if self.running:
+            self._wakeup.set()
+            return
+        records, deleted, unsaved = self._take_unsaved()
+        try:
+            self._write(records, deleted)
+        except Exception:
+            self._requeue_unsaved(unsaved)
+            raise
+    
+    def _take_unsaved(self) -> tuple:
+        """Queued changes as (records to save, ids to delete, the queue entries taken)"""
+        unsaved, self._unsaved = self._unsaved, {}
+        records = [self._to_record(task) for task in unsaved.values() if task is not None]
+        deleted = [task_id for task_id, task in unsaved.items() if task is None]
+        return records, deleted, unsaved
+    
+    def _requeue_unsaved(self, unsaved: Dict[str, Optional[ScheduledTask]]):
+        """Put back changes whose write failed; those queued since are newer and win"""
+        self._unsaved = {**unsaved, **self._unsaved}
+    
+    def _write(self, records: List[Dict[str, Any]], deleted: List[str]):
+        if records:
+            self.store.save(records)
+        if deleted:
+            self.store.delete(deleted)
+    
+    async def _flush(self):
+        """Write queued changes from a worker thread; on failure they stay queued for the next flush"""
+        async with self._flush_lock:
+            records, deleted, unsaved = self._take_unsaved()
+            if not unsaved:
+                return
+            try:
+                await asyncio.to_thread(self._write, records, deleted)
+            except Exception:
+                self._requeue_unsaved(unsaved)
+                raise
+    
+    def _apply_changes(self, records: List[Dict[str, Any]], deleted: List[str]):
+        """Take in tasks other instances saved or deleted; local changes not yet written win"""
+        for task_id in deleted:
+            task = self.scheduled_tasks.get(task_id)
+            if task is not None and task_id not in self._unsaved:
+                self._unindex(task)
+        
+        applied = 0
+        for record in records:
+            if record["id"] in self._unsaved:
+                continue
+            try:
+                task = self._from_record(record)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Skipping unreadable scheduled task {record.get('id')}: {e}")
+                continue
+            existing = self.scheduled_tasks.get(task.id)
+            if existing is not None:
+                self._unindex(existing)
+            self._index(task)
+            applied += 1
+        
+        if applied or deleted:
+            logger.info(f"Synced {applied} changed and {len(deleted)} deleted scheduled tasks from other instances")
+    
+    def _open_store(self) -> tuple:
+        """Runs in a worker thread: opens the store, returns (stored records, ids of deleted tasks)"""
+        if self.store is None:
+            self.store = self._store_factory() if self._store_factory else InMemoryScheduleStore()
+        return self.store.load(), self.store.deleted_ids()
+    
+    def _load_tasks(self, records: List[Dict[str, Any]]):
+        """Replace the tasks in memory with the stored ones; changes not yet written win"""
+        self.scheduled_tasks = {}
+        self.organization_tasks = {}
+        self._heap = []
+        self._catch_up_runs = {}
+        
+        missed = 0
+        cutoff = datetime.now(timezone.utc) - self.misfire_grace
+        for record in records:
+            if record["id"] in self._unsaved:
+                continue
+            try:
+                task = self._from_record(record)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Skipping unreadable scheduled task {record.get('id')}: {e}")
+                continue
+            # Overdue runs stay in the heap; the loop applies the misfire policy to them
+            if task.enabled and task.next_run is not None and task.next_run < cutoff:
+                missed += 1
+            self._index(task)
+        
+        for task in self._unsaved.values():
+            if task is not None:
+                self._index(task)
+        
+        if self.scheduled_tasks:
+            logger.info(f"Restored {len(self.scheduled_tasks)} scheduled tasks from the {self.store.name} store "
+                        f"({missed} with missed runs, policy: {self.misfire_policy.value})")
+    
+    def _calculate_next_run(self, task: ScheduledTask, after: Optional[datetime] = None) -> datetime:
+        """Calculate the next run time for a task (aware, UTC) after `after` (default now)"""
+        now = datetime.now(timezone.utc)
+        after = after or now
+        
+        if task.schedule_type == ScheduleType.CRON:
+            return next_cron_run(task.schedule_time, task.timezone, after)
+        
         hour, minute = map(int, task.schedule_time.split(':'))
         
         if task.schedule_type == ScheduleType.DAILY:
-            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if next_run <= now:
-                next_run += timedelta(days=1)
-            return next_run
+            return next_cron_run(f"{minute} {hour} * * *", task.timezone, after)
             
         elif task.schedule_type == ScheduleType.WEEKLY:
-            days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-            target_day = days.index(task.schedule_day.lower()) if task.schedule_day else 0
-            
-            # Calculate days until target day
-            days_ahead = target_day - now.weekday()
-            if days_ahead <= 0:  # Target day already passed this week
-                days_ahead += 7
-            
-            next_run = now + timedelta(days=days_ahead)
-            next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            return next_run
+            target_day = WEEKDAYS.index(task.schedule_day.lower()) if task.schedule_day else 0
+            # Cron counts weekdays from Sunday
+            return next_cron_run(f"{minute} {hour} * * {(target_day + 1) % 7}", task.timezone, after)
             
         elif task.schedule_type == ScheduleType.MONTHLY:
             day = int(task.schedule_day) if task.schedule_day else 1
-            next_run = now.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
-            if next_run <= now:
-                # Move to next month
-                if now.month == 12:
-                    next_run = next_run.replace(year=now.year + 1, month=1)
-                else:
-                    next_run = next_run.replace(month=now.month + 1)
-            return next_run
+            tz = get_timezone(task.timezone)
+            local = after.astimezone(tz)
+            year, month = local.year, local.month
+            while True:
+                # Days past the end of a short month run on its last day
+                last_day = calendar.monthrange(year, month)[1]
+                next_run = datetime(year, month, min(day, last_day), hour, minute, tzinfo=tz)
+                if next_run > after:
+                    return next_run.astimezone(timezone.utc)
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
             
         elif task.schedule_type == ScheduleType.HOURLY:
             # For hourly tasks, schedule_time represents the interval in hours
-            interval_hours = int(task.schedule_time.split(':')[0])
-            next_run = now + timedelta(hours=interval_hours)
-            return next_run
+            return after + timedelta(hours=hour)
         
         return now + timedelta(minutes=1)  # Default fallback
     
+    def _push(self, task: ScheduledTask):
+        """Queue the task's next run and wake the loop if it is now the earliest"""
+        if not task.enabled or task.next_run is None:
+            return
+        heapq.heappush(self._heap, (task.next_run, next(self._sequence), task.id))
+        if self._heap[0][2] == task.id:
+            self._wakeup.set()
+    
     async def start(self):
-        """Start the scheduler"""
+        """Start the scheduler: open the store, restore its tasks and add the missing defaults"""
         logger.info("Starting Advanced Scheduler...")
-        self.running = True
+        records, deleted_ids = await asyncio.to_thread(self._open_store)
+        self._load_tasks(records)
+        self.running = True  # from here on the loop writes changes
+        self._initialize_default_tasks({record["id"] for record in records} | set(deleted_ids))
         
         # Start the main scheduling loop
+        self._lease_renew_at = 0.0
         asyncio.create_task(self._scheduling_loop())
         logger.info("Advanced Scheduler started successfully")
     
@@ -217,49 +462,130 @@ class AdvancedScheduler:
         """Stop the scheduler"""
         logger.info("Stopping Advanced Scheduler...")
         self.running = False
+        self._wakeup.set()
+        if self.store is None:
+            return  # never started
+        if self._dispatches:
+            # Let submissions already under way finish
+            await asyncio.wait(self._dispatches, timeout=10)
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.error(f"Error saving scheduled tasks: {e}")
+        if self.is_leader:
+            try:
+                await asyncio.to_thread(self.store.release_lease, self.instance_id)
+            except Exception as e:
+                logger.warning(f"Error releasing scheduler lease: {e}")
+            self.is_leader = False
         logger.info("Advanced Scheduler stopped")
     
+    def _renew_lease(self) -> tuple:
+        """Runs in a worker thread: (lease held, (records, deleted ids) changed by other instances)"""
+        return self.store.acquire_lease(self.instance_id, self.lease_ttl), self.store.load_changes()
+    
+    async def _maintain_lease(self):
+        """Take or renew the lease every third of its TTL, and take in tasks changed by other instances"""
+        if time.monotonic() < self._lease_renew_at:
+            return
+        self._lease_renew_at = time.monotonic() + self.lease_ttl / 3
+        
+        was_leader = self.is_leader
+        try:
+            self.is_leader, (records, deleted) = await asyncio.to_thread(self._renew_lease)
+            self._apply_changes(records, deleted)
+        except Exception as e:
+            # Without the store there is no telling whether another instance fires the schedules
+            logger.error(f"Error renewing scheduler lease: {e}")
+            self.is_leader = False
+        
+        if self.is_leader != was_leader:
+            logger.info(f"Scheduler {self.instance_id} {'now fires' if self.is_leader else 'no longer fires'} scheduled tasks")
+    
+    def _next_run_after(self, task: ScheduledTask, run_at: datetime, now: datetime) -> datetime:
+        """Next run after the occurrence at run_at; runs already missed follow the misfire policy"""
+        next_run = self._calculate_next_run(task, after=run_at)
+        if next_run <= now:
+            caught_up = self._catch_up_runs.get(task.id, 0)
+            if self.misfire_policy == MisfirePolicy.RUN_ALL and caught_up < self.MAX_CATCH_UP_RUNS:
+                self._catch_up_runs[task.id] = caught_up + 1
+                return next_run
+            # Skip to the next future run
+            next_run = self._calculate_next_run(task)
+        self._catch_up_runs.pop(task.id, None)
+        return next_run
+    
     async def _scheduling_loop(self):
         """Main scheduling loop"""
         while self.running:
             try:
-                now = datetime.now()
+                await self._flush()
+                await self._maintain_lease()
+                now = datetime.now(timezone.utc)
                 
-                # Check for tasks that need to run
-                for task in self.scheduled_tasks:
-                    if not task.enabled:
-                        continue
-                        
-                    if task.next_run and now >= task.next_run:
+                # Pop every task that is due (only the lease holder fires them)
+                due = []
+                changed = []
+                while self.is_leader and self._heap and self._heap[0][0] <= now:
+                    run_at, _, task_id = heapq.heappop(self._heap)
+                    task = self.scheduled_tasks.get(task_id)
+                    if task is None or not task.enabled or task.next_run != run_at:
+                        continue  # deleted, disabled or rescheduled since it was queued
+                    
+                    if self.misfire_policy == MisfirePolicy.SKIP and now - run_at > self.misfire_grace:
+                        logger.info(f"Skipping missed run of scheduled task {task.name} at {run_at}")
+                        task.next_run = self._calculate_next_run(task)
+                    else:
                         logger.info(f"Executing scheduled task: {task.name}")
-                        
-                        # Execute the task
-                        await self._execute_scheduled_task(task)
-                        
-                        # Update task status
                         task.last_run = now
-                        task.next_run = self._calculate_next_run(task)
-                        
-                        logger.info(f"Scheduled task {task.name} completed. Next run: {task.next_run}")
+                        task.next_run = self._next_run_after(task, run_at, now)
+                        due.append((task, run_at))
+                    changed.append(task)
+                    self._push(task)
+                
+                # Record the runs before dispatching them, so a restart does not repeat them
+                if changed:
+                    self._persist(saved=changed)
+                    await self._flush()
                 
-                # Sleep for 1 minute before next check
-                await asyncio.sleep(60)
+                for task, run_at in due:
+                    dispatch = asyncio.create_task(self._execute_scheduled_task(task, run_at))
+                    self._dispatches.add(dispatch)
+                    dispatch.add_done_callback(self._dispatches.discard)
+                    
+                    logger.info(f"Scheduled task {task.name} dispatched. Next run: {task.next_run}")
+                
+                # Sleep until the next task is due, until one is added or enabled, or until the lease is renewed
+                delay = min(self.MAX_SLEEP, max(0.0, self._lease_renew_at - time.monotonic()))
+                if self._heap and self.is_leader:
+                    delay = min(delay, max(0.0, (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()))
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 logger.error(f"Error in scheduling loop: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(1)
     
-    async def _execute_scheduled_task(self, task: ScheduledTask):
+    async def _execute_scheduled_task(self, task: ScheduledTask, run_at: Optional[datetime] = None):
         """Execute a scheduled task"""
         try:
             if self.coordinator_callback:
                 # Submit task to coordinator
-                task_id = await self.coordinator_callback(
-                    agent_type=task.agent_type,
-                    data=task.task_data,
-                    priority="medium",
-                    scheduled=True
-                )
+                data = dict(task.task_data)  # the coordinator adds metadata to what it is given
+                if task.organization_id:
+                    data["organization_id"] = task.organization_id
+                async with self._dispatch_slots:
+                    task_id = await self.coordinator_callback(
+                        agent_type=task.agent_type,
+                        data=data,
+                        priority="medium",
+                        scheduled=True,
+                        # One submission per scheduled occurrence
+                        dedupe_key=f"schedule:{task.id}:{run_at:%Y%m%d%H%M}" if run_at else None
+                    )
                 logger.info(f"Scheduled task {task.name} submitted to coordinator (ID: {task_id})")
             else:
                 logger.warning(f"No coordinator callback available for task: {task.name}")
@@ -267,8 +593,12 @@ class AdvancedScheduler:
         except Exception as e:
             logger.error(f"Error executing scheduled task {task.name}: {e}")
     
-    def get_scheduled_tasks(self) -> List[Dict[str, Any]]:
-        """Get all scheduled tasks"""
+    def get_scheduled_tasks(self, organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all scheduled tasks, or those of one organization"""
+        if organization_id is None:
+            tasks = self.scheduled_tasks.values()
+        else:
+            tasks = [self.scheduled_tasks[task_id] for task_id in self.organization_tasks.get(organization_id, {})]
         return [
             {
                 "id": task.id,
@@ -280,39 +610,55 @@ class AdvancedScheduler:
                 "enabled": task.enabled,
                 "last_run": task.last_run.isoformat() if task.last_run else None,
                 "next_run": task.next_run.isoformat() if task.next_run else None,
+                "next_run_local": task.next_run.astimezone(get_timezone(task.timezone)).isoformat() if task.next_run else None,
+                "timezone": task.timezone,
+                "organization_id": task.organization_id,
                 "created_at": task.created_at.isoformat() if task.created_at else None
             }
-            for task in self.scheduled_tasks
+            for task in tasks
         ]
     
     def enable_task(self, task_id: str) -> bool:
         """Enable a scheduled task"""
-        for task in self.scheduled_tasks:
-            if task.id == task_id:
-                task.enabled = True
-                task.next_run = self._calculate_next_run(task)
-                logger.info(f"Enabled scheduled task: {task.name}")
-                return True
-        return False
+        task = self.scheduled_tasks.get(task_id)
+        if task is None:
+            return False
+        task.enabled = True
+        task.next_run = self._calculate_next_run(task)
+        self._persist(saved=[task])
+        self._push(task)
+        logger.info(f"Enabled scheduled task: {task.name}")
+        return True
     
     def disable_task(self, task_id: str) -> bool:
         """Disable a scheduled task"""
-        for task in self.scheduled_tasks:
-            if task.id == task_id:
-                task.enabled = False
-                task.next_run = None
-                logger.info(f"Disabled scheduled task: {task.name}")
-                return True
-        return False
+        task = self.scheduled_tasks.get(task_id)
+        if task is None:
+            return False
+        task.enabled = False
+        task.next_run = None  # its heap entry is skipped when it comes up
+        self._persist(saved=[task])
+        logger.info(f"Disabled scheduled task: {task.name}")
+        return True
     
     def delete_task(self, task_id: str) -> bool:
         """Delete a scheduled task"""
-        for i, task in enumerate(self.scheduled_tasks):
-            if task.id == task_id:
-                del self.scheduled_tasks[i]
-                logger.info(f"Deleted scheduled task: {task.name}")
-                return True
-        return False
+        task = self.scheduled_tasks.get(task_id)
+        if task is None:
+            return False
+        self._unindex(task)
+        self._persist(deleted=[task_id])
+        logger.info(f"Deleted scheduled task: {task.name}")
+        return True
+    
+    def delete_organization_tasks(self, organization_id: str) -> int:
+        """Delete every scheduled task of an organization"""
+        task_ids = list(self.organization_tasks.get(organization_id, {}))
+        for task_id in task_ids:
+            self._unindex(self.scheduled_tasks[task_id])
+        self._persist(deleted=task_ids)
+        logger.info(f"Deleted {len(task_ids)} scheduled tasks of organization {organization_id}")
+        return len(task_ids)
 
 # Global scheduler instance
 scheduler = AdvancedScheduler()
@@ -0,0 +1,158 @@
+"""
+Cron expressions
+Five-field cron schedules evaluated in IANA timezones
+"""
+
+import calendar
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import FrozenSet, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MONTH_NAMES = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *"
+}
+
+# Search horizon for next_after; enough for any satisfiable expression (29 February included)
+MAX_SEARCH_YEARS = 9
+
+def _parse_field(field: str, low: int, high: int, names: Optional[dict] = None) -> FrozenSet[int]:
+    values = set()
+    for part in field.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in cron field '{field}'")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            # "5/15" means from 5 to the end of the range
+            end = high if step > 1 else start
+
+        if not low <= start <= high or not low <= end <= high or start > end:
+            raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+def _parse_value(text: str, names: Optional[dict]) -> int:
+    if names and text in names:
+        return names[text]
+    return int(text)
+
+class CronExpression:
+    """
+    Standard five-field cron schedule: minute hour day-of-month month day-of-week
+
+    Fields take *, lists, ranges and steps; months and weekdays also take names, and
+    7 means Sunday. "L" in the day of month is the last day of the month. When both
+    day fields are restricted, a day matching either one matches (as in Vixie cron).
+    @hourly, @daily, @weekly, @monthly and @yearly are accepted.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+        minute, hour, day, month, weekday = fields
+
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.last_day = "l" in day.lower().split(",")
+        day_fields = ",".join(part for part in day.lower().split(",") if part != "l")
+        self.days = _parse_field(day_fields, 1, 31) if day_fields else frozenset()
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        # Python weekdays: Monday = 0; cron: Sunday = 0 (or 7)
+        self.weekdays = frozenset((value - 1) % 7 for value in _parse_field(weekday, 0, 7, DAY_NAMES))
+
+        self.day_restricted = day != "*"
+        self.weekday_restricted = weekday != "*"
+
+    def _matches_day(self, candidate: datetime) -> bool:
+        in_days = candidate.day in self.days or (
+            self.last_day and candidate.day == calendar.monthrange(candidate.year, candidate.month)[1]
+        )
+        in_weekdays = candidate.weekday() in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return in_days or in_weekdays
+        if self.day_restricted:
+            return in_days
+        return in_weekdays
+
+    def next_after(self, after: datetime, tz: Optional[ZoneInfo] = None) -> datetime:
+        """First matching time strictly after `after`, evaluated in wall-clock time of tz (aware result)"""
+        tz = tz or timezone.utc
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=tz)
+
+        local = after.astimezone(tz).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = local + timedelta(days=366 * MAX_SEARCH_YEARS)
+
+        while local < limit:
+            if local.month not in self.months:
+                year, month = (local.year + 1, 1) if local.month == 12 else (local.year, local.month + 1)
+                local = datetime(year, month, 1)
+                continue
+            if not self._matches_day(local):
+                local = datetime(local.year, local.month, local.day) + timedelta(days=1)
+                continue
+            if local.hour not in self.hours:
+                later = [hour for hour in self.hours if hour > local.hour]
+                local = (local.replace(hour=min(later), minute=0) if later
+                         else datetime(local.year, local.month, local.day) + timedelta(days=1))
+                continue
+            if local.minute not in self.minutes:
+                later = [minute for minute in self.minutes if minute > local.minute]
+                local = (local.replace(minute=min(later)) if later
+                         else local.replace(minute=0) + timedelta(hours=1))
+                continue
+
+            candidate = local.replace(tzinfo=tz)
+            # Wall times skipped by a DST change normalize to the instant after the gap;
+            # repeated ones run once, at their first occurrence
+            if candidate.astimezone(timezone.utc) > after.astimezone(timezone.utc):
+                return candidate.astimezone(timezone.utc).astimezone(tz)
+            local += timedelta(minutes=1)
+
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __repr__(self) -> str:
+        return f"CronExpression('{self.expression}')"
+
+@lru_cache(maxsize=1024)
+def parse_cron(expression: str) -> CronExpression:
+    """Parsed expression, shared by every schedule that uses it"""
+    return CronExpression(expression)
+
+@lru_cache(maxsize=1024)
+def get_timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'")
+
+@lru_cache(maxsize=65536)
+def next_cron_run(expression: str, timezone_name: str, after: datetime) -> datetime:
+    """
+    Next run of a cron schedule in a timezone, as an aware UTC datetime
+
+    Cached: schedules sharing an expression and timezone that come due together (the
+    common case for tenants on the same posting times) compute their next run once.
+    """
+    return parse_cron(expression).next_after(after, get_timezone(timezone_name)).astimezone(timezone.utc)
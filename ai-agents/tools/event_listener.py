@@ -254,7 +254,7 @@ class EventListener:
                     logger.info(f"Processing event: {event.event_type.value} with rule: {rule.id}")
                     
                     # Execute actions
-                    await self._execute_actions(event, rule.actions)
+                    await self._execute_actions(event, rule)
                     
                     # Mark event as processed
                     event.processed = True
@@ -306,9 +306,9 @@ class EventListener:
             logger.error(f"Error evaluating conditions: {e}")
             return False
     
-    async def _execute_actions(self, event: Event, actions: List[Dict[str, Any]]):
+    async def _execute_actions(self, event: Event, rule: EventRule):
         """Execute actions for an event"""
-        for action in actions:
+        for action in rule.actions:
             try:
                 if self.coordinator_callback:
                     task_data = {
@@ -323,7 +323,10 @@ class EventListener:
                         agent_type=action["agent_type"],
                         data=task_data,
                         priority=action.get("priority", "medium"),
-                        event_triggered=True
+                        event_triggered=True,
+                        # Repeats of the event within the rule's cooldown reuse the first task
+                        dedupe_key=f"event:{rule.id}:{action['action']}:{event.platform}",
+                        dedupe_window=rule.cooldown_minutes * 60
                     )
                     
                     logger.info(f"Event action executed: {action['action']} (Task ID: {task_id})")
@@ -307,7 +307,10 @@ class PerformanceMonitor:
                     agent_type=agent_type,
                     data=task_data,
                     priority=priority,
-                    threshold_triggered=True
+                    threshold_triggered=True,
+                    # A breach stays visible for the whole 1 hour data window; act on it once
+                    dedupe_key=f"threshold:{threshold.metric_type.value}:{threshold.platform}:{threshold.threshold_type}:{threshold.threshold_value}",
+                    dedupe_window=3600
                 )
                 
                 logger.info(f"Threshold action triggered: {threshold.metric_type.value} on {threshold.platform} (Task ID: {task_id})")
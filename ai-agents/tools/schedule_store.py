@@ -0,0 +1,268 @@
+"""
+Schedule Store
+Durable scheduled task definitions and run state, and the lease that elects the scheduler instance that fires them
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Scheduled task fields kept by a store; records are dicts with these keys
+RECORD_FIELDS = ("id", "name", "schedule_type", "schedule_time", "schedule_day", "agent_type", "task_data",
+                 "enabled", "last_run", "next_run", "created_at", "timezone", "organization_id")
+DATETIME_FIELDS = ("last_run", "next_run", "created_at")
+
+class ScheduleStore(ABC):
+    """
+    Where AdvancedScheduler keeps its tasks between restarts
+
+    Records are plain dicts (RECORD_FIELDS) with aware datetimes. Only the instance
+    holding the lease fires schedules; the others keep serving reads and writes and
+    take over once the lease expires. Methods block on I/O and may be called from
+    worker threads, one call at a time.
+    """
+
+    name = "base"
+    durable = False
+
+    @abstractmethod
+    def load(self) -> List[Dict[str, Any]]:
+        """Every stored task record"""
+
+    @abstractmethod
+    def save(self, records: List[Dict[str, Any]]):
+        """Insert or replace task records, all at once"""
+
+    @abstractmethod
+    def delete(self, task_ids: List[str]):
+        pass
+
+    @abstractmethod
+    def acquire_lease(self, owner: str, ttl: float) -> bool:
+        """Take or renew the scheduler lease for ttl seconds; False while another owner holds it"""
+
+    @abstractmethod
+    def release_lease(self, owner: str):
+        pass
+
+    def load_changes(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Records saved and ids deleted by other processes since the last load or call"""
+        return [], []
+
+    def deleted_ids(self) -> List[str]:
+        """Ids of tasks deleted and not saved again since"""
+        return []
+
+    def close(self):
+        pass
+
+class InMemoryScheduleStore(ScheduleStore):
+    """Keeps nothing across restarts (the default when no store is configured); the lease is always granted"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.deleted: Dict[str, None] = {}
+
+    def load(self) -> List[Dict[str, Any]]:
+        return [dict(record) for record in self.records.values()]
+
+    def save(self, records: List[Dict[str, Any]]):
+        for record in records:
+            self.records[record["id"]] = dict(record)
+            self.deleted.pop(record["id"], None)
+
+    def delete(self, task_ids: List[str]):
+        for task_id in task_ids:
+            self.records.pop(task_id, None)
+            self.deleted[task_id] = None
+
+    def deleted_ids(self) -> List[str]:
+        return list(self.deleted)
+
+    def acquire_lease(self, owner: str, ttl: float) -> bool:
+        return True
+
+    def release_lease(self, owner: str):
+        pass
+
+class SQLiteScheduleStore(ScheduleStore):
+    """
+    SQLite file shared by the scheduler instances on one host
+
+    The lease is a row that an instance takes over only once its holder has let it
+    expire; taking and renewing it is a single conditional upsert, so two instances
+    can never both hold it. Every write to the tasks bumps a version number that is
+    stamped on the rows it saves and on tombstones of the ids it deletes, so other
+    processes read back only what changed since they last looked (lease renewals
+    do not count as changes). Tombstones are one row per deleted id.
+    """
+
+    name = "sqlite"
+    durable = True
+
+    LEASE_NAME = "scheduler"
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Calls come from worker threads; the lock keeps them to one at a time
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheduled_tasks (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    schedule_type TEXT NOT NULL,
+                    schedule_time TEXT NOT NULL,
+                    schedule_day TEXT,
+                    agent_type TEXT NOT NULL,
+                    task_data TEXT NOT NULL,
+                    enabled INTEGER NOT NULL,
+                    last_run TEXT,
+                    next_run TEXT,
+                    created_at TEXT,
+                    timezone TEXT NOT NULL,
+                    organization_id TEXT,
+                    version INTEGER NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS scheduled_tasks_organization ON scheduled_tasks (organization_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS scheduled_tasks_version ON scheduled_tasks (version)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS deleted_scheduled_tasks (
+                    id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheduler_lease (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS schedule_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)")
+            self.conn.execute("INSERT OR IGNORE INTO schedule_version (id, version) VALUES (0, 0)")
+        self._version = self._read_version()  # everything up to here has been read
+        self._own_versions = set()  # versions written by this process, not reported back to it
+
+    def _read_version(self) -> int:
+        return self.conn.execute("SELECT version FROM schedule_version WHERE id = 0").fetchone()[0]
+
+    def _bump_version(self) -> int:
+        """Called inside the transaction that changes the tasks; returns the version to stamp"""
+        self.conn.execute("UPDATE schedule_version SET version = version + 1 WHERE id = 0")
+        return self._read_version()
+
+    @staticmethod
+    def _decode(row) -> Dict[str, Any]:
+        record = dict(zip(RECORD_FIELDS, row))
+        record["task_data"] = json.loads(record["task_data"])
+        record["enabled"] = bool(record["enabled"])
+        for field in DATETIME_FIELDS:
+            if record[field] is not None:
+                record[field] = datetime.fromisoformat(record[field])
+        return record
+
+    def load(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._version = self._read_version()
+            rows = self.conn.execute(f"SELECT {', '.join(RECORD_FIELDS)} FROM scheduled_tasks").fetchall()
+        return [self._decode(row) for row in rows]
+
+    def load_changes(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        with self._lock:
+            version = self._read_version()
+            if version == self._version:
+                return [], []
+            # Rows written after the version was read come back again next time; applying them twice is harmless
+            rows = self.conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)}, version FROM scheduled_tasks WHERE version > ?", (self._version,)
+            ).fetchall()
+            tombstones = self.conn.execute(
+                "SELECT id, version FROM deleted_scheduled_tasks WHERE version > ?", (self._version,)
+            ).fetchall()
+            own = self._own_versions
+            self._own_versions = {own_version for own_version in own if own_version > version}
+            self._version = version
+        records = [self._decode(row[:-1]) for row in rows if row[-1] not in own]
+        deleted = [task_id for task_id, deleted_version in tombstones if deleted_version not in own]
+        return records, deleted
+
+    def deleted_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT id FROM deleted_scheduled_tasks")]
+
+    def save(self, records: List[Dict[str, Any]]):
+        rows = []
+        for record in records:
+            row = dict(record)
+            row["task_data"] = json.dumps(row["task_data"] or {}, default=str)
+            row["enabled"] = int(row["enabled"])
+            for field in DATETIME_FIELDS:
+                if row[field] is not None:
+                    row[field] = row[field].isoformat()
+            rows.append([row[field] for field in RECORD_FIELDS])
+        with self._lock:
+            with self.conn:
+                version = self._bump_version()
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO scheduled_tasks ({', '.join(RECORD_FIELDS)}, version) "
+                    f"VALUES ({', '.join('?' * (len(RECORD_FIELDS) + 1))})",
+                    [row + [version] for row in rows]
+                )
+                self.conn.executemany("DELETE FROM deleted_scheduled_tasks WHERE id = ?", [(row[0],) for row in rows])
+            self._own_versions.add(version)
+
+    def delete(self, task_ids: List[str]):
+        with self._lock:
+            with self.conn:
+                version = self._bump_version()
+                self.conn.executemany("DELETE FROM scheduled_tasks WHERE id = ?", [(task_id,) for task_id in task_ids])
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO deleted_scheduled_tasks (id, version) VALUES (?, ?)",
+                    [(task_id, version) for task_id in task_ids]
+                )
+            self._own_versions.add(version)
+
+    def acquire_lease(self, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT INTO scheduler_lease (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE scheduler_lease.owner = excluded.owner OR scheduler_lease.expires_at <= ?
+                """,
+                (self.LEASE_NAME, owner, now + ttl, now)
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, owner: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM scheduler_lease WHERE name = ? AND owner = ?", (self.LEASE_NAME, owner))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+def create_schedule_store(settings) -> ScheduleStore:
+    """Store selected by settings.scheduler_store ("sqlite" or "memory")"""
+    if settings.scheduler_store == "sqlite":
+        try:
+            return SQLiteScheduleStore(settings.scheduler_db_path)
+        except sqlite3.Error as e:
+            logger.error(f"Cannot open schedule store {settings.scheduler_db_path}, schedules will not persist: {e}")
+    return InMemoryScheduleStore()
@@ -0,0 +1,172 @@
+"""
+Shared payloads
+Immutable, content-addressed payloads that agents pass by reference and serialize at most once
+"""
+
+import json
+import hashlib
+import weakref
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("Shared payloads are immutable; use thaw() for a mutable copy")
+
+class FrozenDict(dict):
+    """Read-only dict that remembers its JSON once serialized; still a dict to json, isinstance and .get()"""
+
+    __slots__ = ("_serialized",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._serialized: Optional[str] = None
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    """Read-only list counterpart of FrozenDict"""
+
+    __slots__ = ("_serialized",)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._serialized: Optional[str] = None
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(value: Any) -> Any:
+    """Immutable copy of a JSON-like structure (frozen parts are reused, not copied)"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Mutable deep copy of a frozen structure"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+def _to_json(value: Any) -> str:
+    try:
+        # Sorted keys make equal payloads serialize (and hash) alike
+        return json.dumps(value, sort_keys=True, default=str)
+    except TypeError:  # keys of mixed types cannot be sorted
+        return json.dumps(value, default=str)
+
+def dumps(value: Any) -> str:
+    """JSON for a value; frozen values are serialized once and the result reused"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        if value._serialized is None:
+            value._serialized = _to_json(value)
+        return value._serialized
+    return _to_json(value)
+
+class PayloadRef:
+    """Handle to an immutable payload, identified by the SHA-256 of its JSON"""
+
+    __slots__ = ("digest", "value", "__weakref__")
+
+    def __init__(self, digest: str, value: Any):
+        self.digest = digest
+        self.value = value
+
+    @property
+    def serialized(self) -> str:
+        return dumps(self.value)
+
+    @property
+    def size(self) -> int:
+        return len(self.serialized)
+
+    def __repr__(self) -> str:
+        return f"PayloadRef({self.digest[:12]}, {self.size} bytes)"
+
+class PayloadStore:
+    """
+    Interns payloads by content
+
+    Putting a payload freezes it and serializes it once to compute its digest; an
+    identical payload put later (by another agent, or arriving from another process)
+    gets the existing reference. References are held weakly, so a payload is freed
+    once no data share, handoff or task refers to it.
+    """
+
+    def __init__(self):
+        self._refs: "weakref.WeakValueDictionary[str, PayloadRef]" = weakref.WeakValueDictionary()
+        self.stored = 0
+        self.reused = 0
+
+    def put(self, value: Any) -> PayloadRef:
+        if isinstance(value, PayloadRef):
+            return value
+        frozen = freeze(value)
+        return self._intern(self._digest(dumps(frozen)), frozen)
+
+    def put_serialized(self, serialized: str) -> PayloadRef:
+        """Reference for a payload received as JSON, without serializing it again"""
+        digest = self._digest(serialized)
+        ref = self._refs.get(digest)
+        if ref is not None:
+            self.reused += 1
+            return ref
+        frozen = freeze(json.loads(serialized))
+        if isinstance(frozen, (FrozenDict, FrozenList)):
+            frozen._serialized = serialized
+        return self._intern(digest, frozen)
+
+    def _digest(self, serialized: str) -> str:
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def _intern(self, digest: str, frozen: Any) -> PayloadRef:
+        ref = self._refs.get(digest)
+        if ref is not None:
+            self.reused += 1
+            return ref
+        ref = PayloadRef(digest, frozen)
+        self._refs[digest] = ref
+        self.stored += 1
+        return ref
+
+    def get(self, digest: str) -> Optional[PayloadRef]:
+        return self._refs.get(digest)
+
+    def get_stats(self) -> Dict[str, Any]:
+        refs = list(self._refs.values())
+        return {
+            "live_payloads": len(refs),
+            "live_bytes": sum(ref.size for ref in refs),
+            "stored": self.stored,
+            "reused": self.reused
+        }
+
+# Global payload store
+payload_store = PayloadStore()
@@ -0,0 +1,211 @@
+"""
+LLM rate limiting
+Token buckets for requests/min and tokens/min per (API key, model), shared by every agent in the process
+"""
+
+import time
+import heapq
+import asyncio
+import hashlib
+import logging
+import itertools
+from contextvars import ContextVar, Token
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower ranks are served first. Interactive work always goes ahead of automation;
+# within each class, higher task priorities go first.
+INTERACTIVE_RANK = 0
+BACKGROUND_RANK = 100
+
+_request_rank: ContextVar[int] = ContextVar("llm_request_rank", default=INTERACTIVE_RANK)
+
+def request_rank(priority: int = 2, background: bool = False) -> int:
+    """Queue rank for a task priority (higher = more urgent) and traffic class"""
+    return (BACKGROUND_RANK if background else INTERACTIVE_RANK) - priority
+
+def set_llm_priority(rank: int) -> Token:
+    """Rank LLM calls made from here on in this context (and tasks it spawns); pass the token to reset_llm_priority"""
+    return _request_rank.set(rank)
+
+def reset_llm_priority(token: Token):
+    _request_rank.reset(token)
+
+def estimate_tokens(text_length: int) -> int:
+    """Rough prompt token count from its length in characters"""
+    return text_length // 4 + 1
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited longer than the limiter's max_wait for capacity"""
+
+class TokenBucket:
+    """Refills continuously up to capacity; may go into debt when usage is settled above the estimate"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken"""
+        self._refill(now)
+        missing = amount - self.available
+        return 0.0 if missing <= 0 else missing / self.refill_rate
+
+    def take(self, amount: float):
+        self.available -= amount
+
+    def adjust(self, delta: float):
+        """Return (positive) or charge (negative) capacity after the fact"""
+        self.available = min(self.capacity, self.available + delta)
+
+class _LimitState:
+    """Buckets and priority-ordered waiters for one (API key, model)"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self.waiters = []  # heap of (rank, sequence, tokens, future)
+        self.wakeup = asyncio.Event()
+        self.pump: Optional[asyncio.Task] = None
+        self.stats = {"granted": 0, "queued": 0, "wait_seconds": 0.0, "timeouts": 0, "throttled": 0}
+
+    def delay(self, tokens: float) -> float:
+        now = time.monotonic()
+        return max(self.paused_until - now, self.requests.time_until(1, now), self.tokens.time_until(tokens, now))
+
+    def take(self, tokens: float):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.stats["granted"] += 1
+
+class RateLimiter:
+    """
+    Admits outbound LLM calls within requests/min and tokens/min limits
+
+    A call reserves its estimated tokens (prompt plus max completion) up front and
+    settles the difference once the provider reports actual usage. When a bucket is
+    short, callers wait in a queue ordered by rank, so interactive requests are
+    admitted before queued background automation. A provider 429 pauses the key for
+    its retry-after period instead of letting every retry path hit the API again.
+
+    Limits are per process; with worker processes, size them per process.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int,
+                 model_limits: Optional[Dict[str, Dict[str, int]]] = None, max_wait: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = model_limits or {}
+        self.max_wait = max_wait
+        self._states: Dict[Tuple[str, str], _LimitState] = {}
+        self._sequence = itertools.count()
+
+    def _state(self, model: str, api_key: Optional[str]) -> _LimitState:
+        # Keys are fingerprinted so they never show up in stats or logs
+        key = (hashlib.sha256((api_key or "").encode()).hexdigest()[:12], model)
+        state = self._states.get(key)
+        if state is None:
+            limits = self.model_limits.get(model, {})
+            state = _LimitState(
+                limits.get("requests_per_minute", self.requests_per_minute),
+                limits.get("tokens_per_minute", self.tokens_per_minute)
+            )
+            self._states[key] = state
+        return state
+
+    async def acquire(self, model: str, api_key: Optional[str], tokens: int, rank: Optional[int] = None) -> int:
+        """Wait until a call of about `tokens` tokens may be sent; returns the tokens reserved"""
+        state = self._state(model, api_key)
+        tokens = min(tokens, int(state.tokens.capacity))  # a larger call could never be admitted
+
+        if not state.waiters and state.delay(tokens) <= 0:
+            state.take(tokens)
+            return tokens
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        rank = _request_rank.get() if rank is None else rank
+        heapq.heappush(state.waiters, (rank, next(self._sequence), tokens, future))
+        state.stats["queued"] += 1
+        state.wakeup.set()
+        if state.pump is None:
+            state.pump = loop.create_task(self._pump(state))
+
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            state.stats["timeouts"] += 1
+            raise RateLimitTimeout(f"No LLM capacity for {model} within {self.max_wait}s")
+        finally:
+            state.stats["wait_seconds"] += time.monotonic() - queued_at
+        return tokens
+
+    async def _pump(self, state: _LimitState):
+        """Admit waiters in rank order as the buckets refill"""
+        try:
+            while state.waiters:
+                _, _, tokens, future = state.waiters[0]
+                if future.done():  # caller timed out or was cancelled
+                    heapq.heappop(state.waiters)
+                    continue
+
+                delay = state.delay(tokens)
+                if delay <= 0:
+                    heapq.heappop(state.waiters)
+                    state.take(tokens)
+                    future.set_result(None)
+                    continue
+
+                # Sleep until the head can go, or until a new (maybe higher ranked) waiter arrives
+                state.wakeup.clear()
+                try:
+                    await asyncio.wait_for(state.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            state.pump = None
+
+    def settle(self, model: str, api_key: Optional[str], reserved: int, used: int):
+        """Correct a reservation with the tokens the call actually used"""
+        self._state(model, api_key).tokens.adjust(reserved - used)
+
+    def throttled(self, model: str, api_key: Optional[str], retry_after: Optional[float] = None):
+        """The provider rejected a call with 429: hold every caller for the key back"""
+        state = self._state(model, api_key)
+        state.paused_until = max(state.paused_until, time.monotonic() + (retry_after or 1.0))
+        state.stats["throttled"] += 1
+        logger.warning(f"LLM rate limited by provider for {model}, pausing for {retry_after or 1.0}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        stats = {}
+        for (key_id, model), state in self._states.items():
+            state.requests._refill(now)
+            state.tokens._refill(now)
+            stats[f"{key_id}:{model}"] = {
+                "requests_available": int(state.requests.available),
+                "tokens_available": int(state.tokens.available),
+                "waiting": sum(1 for *_, future in state.waiters if not future.done()),
+                "paused_for": round(max(0.0, state.paused_until - now), 2),
+                **{name: round(value, 3) if isinstance(value, float) else value for name, value in state.stats.items()}
+            }
+        return stats
+
+# Global rate limiter instance
+llm_rate_limiter = RateLimiter(
+    requests_per_minute=settings.llm_requests_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    model_limits=settings.llm_model_rate_limits,
+    max_wait=settings.llm_rate_limit_max_wait
+)